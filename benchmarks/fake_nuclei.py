@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the nuclei binary used by the benchmarks.
+
+Accepts the arguments NucleiService passes and writes generated JSONL
+findings for every target instead of scanning it. Volume and pace are
+set with environment variables:
+
+    FAKE_NUCLEI_FINDINGS      findings per target, default 1000
+    FAKE_NUCLEI_RATE          findings per second of the whole process,
+                              0 writes them as fast as possible (default)
+    FAKE_NUCLEI_PAYLOAD_SIZE  bytes of HTTP response in each finding,
+                              default 2048
+    FAKE_NUCLEI_SEED          seed of the generated findings, default 0
+
+Apart from timestamps, the output only depends on the arguments and
+these variables, so runs are reproducible. Only the standard library is
+used.
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+# Relative share of each severity, most real findings are informational.
+SEVERITY_WEIGHTS = (55, 20, 13, 9, 3)
+TEMPLATES = (
+    ("tech-detect", "http/technologies/tech-detect.yaml", "nginx"),
+    (
+        "http-missing-security-headers",
+        "http/misconfiguration/http-missing-security-headers.yaml",
+        "strict-transport-security",
+    ),
+    ("ssl-dns-names", "ssl/ssl-dns-names.yaml", None),
+    ("git-config", "http/exposures/configs/git-config.yaml", None),
+    ("exposed-env-file", "http/exposures/files/exposed-env-file.yaml", None),
+    (
+        "cors-misconfig",
+        "http/vulnerabilities/generic/cors-misconfig.yaml",
+        "arbitrary-origin",
+    ),
+    ("open-redirect", "http/vulnerabilities/generic/open-redirect.yaml", None),
+    ("CVE-2021-44228", "http/cves/2021/CVE-2021-44228.yaml", None),
+)
+STATS_EVERY = 500
+
+
+def make_finding(
+    target: str,
+    index: int,
+    rng: random.Random,
+    body: str,
+    severities: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Build one finding the way Nuclei writes it with ``-j``.
+
+    :param target: scanned URL.
+    :param index: number of the finding, makes its matched URL unique.
+    :param rng: source of randomness.
+    :param body: HTTP response body to embed.
+    :param severities: severities to pick from, all when empty.
+    :return: finding.
+    """
+    template_id, path, matcher = TEMPLATES[index % len(TEMPLATES)]
+    choices = [
+        (severity, weight)
+        for severity, weight in zip(SEVERITIES, SEVERITY_WEIGHTS)
+        if not severities or severity in severities
+    ] or [(SEVERITIES[0], 1)]
+    severity = rng.choices(
+        [severity for severity, _ in choices],
+        [weight for _, weight in choices],
+    )[0]
+    parts = urlsplit(target)
+    host = parts.hostname or target
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    matched_at = f"{target.rstrip('/')}/path/{index}"
+    finding: Dict[str, Any] = {
+        "template": path,
+        "template-url": f"https://cloud.projectdiscovery.io/public/{template_id}",
+        "template-id": template_id,
+        "template-path": f"/root/nuclei-templates/{path}",
+        "info": {
+            "name": template_id.replace("-", " ").title(),
+            "author": ["pdteam"],
+            "tags": ["exposure", "misconfig"],
+            "description": f"Detected {template_id} on the target.",
+            "reference": [f"https://example.org/docs/{template_id}"],
+            "severity": severity,
+            "metadata": {"max-request": 1},
+            "classification": {"cve-id": None, "cwe-id": ["cwe-200"]},
+        },
+        "type": "http",
+        "host": host,
+        "port": str(port),
+        "scheme": parts.scheme,
+        "url": target,
+        "path": f"/path/{index}",
+        "matched-at": matched_at,
+        "extracted-results": [f"value-{rng.randrange(1000)}"],
+        "request": (
+            f"GET /path/{index} HTTP/1.1\r\nHost: {host}\r\n"
+            "User-Agent: Mozilla/5.0\r\nAccept: */*\r\n\r\n"
+        ),
+        "response": (
+            "HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n{body}"
+        ),
+        "ip": f"93.184.{index // 256 % 256}.{index % 256}",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "curl-command": f"curl -X 'GET' '{matched_at}'",
+        "matcher-status": True,
+    }
+    if matcher:
+        finding["matcher-name"] = matcher
+    return finding
+
+
+def generate_findings(
+    targets: List[str],
+    count: int,
+    payload_size: int,
+    seed: int = 0,
+    severities: Optional[List[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Generate ``count`` findings for each target, interleaving the targets.
+
+    :param targets: scanned URLs.
+    :param count: findings per target.
+    :param payload_size: bytes of HTTP response in each finding.
+    :param seed: seed of the generated findings.
+    :param severities: severities to pick from, all when empty.
+    :yield: findings.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    # Responses are slices of one block of text, so generating findings
+    # stays cheap while their bodies still differ.
+    alphabet = string.ascii_letters + string.digits + " <>/=\n"
+    block = "".join(rng.choices(alphabet, k=payload_size * 2 + 1))
+    for index in range(count):
+        for target in targets:
+            offset = rng.randrange(payload_size + 1)
+            body = block[offset : offset + payload_size]
+            yield make_finding(target, index, rng, body, severities)
+
+
+def _stats(started: float, written: int, total: int) -> str:
+    elapsed = max(time.monotonic() - started, 1e-9)
+    minutes, seconds = divmod(int(elapsed), 60)
+    return json.dumps(
+        {
+            "duration": f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}",
+            "errors": "0",
+            "hosts": "1",
+            "matched": str(written),
+            "percent": str(written * 100 // total if total else 100),
+            "requests": str(written),
+            "rps": str(int(written / elapsed)),
+            "startedAt": datetime.now(timezone.utc).isoformat(),
+            "templates": str(len(TEMPLATES)),
+            "total": str(total),
+        },
+    )
+
+
+def _update_templates(directory: Optional[str]) -> None:
+    root = Path(directory or Path.home() / "nuclei-templates")
+    for _, path, _ in TEMPLATES:
+        template = root / path
+        template.parent.mkdir(parents=True, exist_ok=True)
+        template.write_text(f"id: {template.stem}\n")
+    (root / "templates-checksum.txt").write_text("fake-nuclei-templates\n")
+    sys.stderr.write("[INF] Successfully installed nuclei-templates\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the fake scanner.
+
+    :param argv: command line arguments, without the program name.
+    :return: exit code.
+    """
+    parser = argparse.ArgumentParser(prog="nuclei", add_help=False)
+    parser.add_argument("-target", "-u")
+    parser.add_argument("-list", "-l")
+    parser.add_argument("-severity", "-s")
+    parser.add_argument("-update-templates", "-ut", action="store_true")
+    parser.add_argument("-update-template-dir", "-ud")
+    parser.add_argument("-stats", action="store_true")
+    args, _ = parser.parse_known_args(argv)
+
+    if args.update_templates:
+        _update_templates(args.update_template_dir)
+        return 0
+
+    if args.list:
+        targets = [
+            line.strip()
+            for line in Path(args.list).read_text().splitlines()
+            if line.strip()
+        ]
+    else:
+        targets = [args.target] if args.target else []
+
+    count = int(os.environ.get("FAKE_NUCLEI_FINDINGS", "1000"))
+    rate = float(os.environ.get("FAKE_NUCLEI_RATE", "0"))
+    payload_size = int(os.environ.get("FAKE_NUCLEI_PAYLOAD_SIZE", "2048"))
+    seed = int(os.environ.get("FAKE_NUCLEI_SEED", "0"))
+    severities = args.severity.split(",") if args.severity else None
+
+    total = count * len(targets)
+    started = time.monotonic()
+    out = sys.stdout
+    for written, finding in enumerate(
+        generate_findings(targets, count, payload_size, seed, severities),
+        start=1,
+    ):
+        out.write(json.dumps(finding))
+        out.write("\n")
+        if rate > 0:
+            # Hold the pace of the whole run, not of single findings.
+            delay = started + written / rate - time.monotonic()
+            if delay > 0:
+                out.flush()
+                time.sleep(delay)
+        if args.stats and written % STATS_EVERY == 0:
+            sys.stderr.write(_stats(started, written, total) + "\n")
+    out.flush()
+    if args.stats:
+        sys.stderr.write(_stats(started, total, total) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,551 @@
+"""
+Benchmarks of the scan pipeline.
+
+    python -m benchmarks.run --output benchmark-results.json
+
+Runs against a dedicated database, LAUNCH_CHECK_API_DB_BASE defaults to
+launch_check_api_bench, which is created and dropped by the run. Tasks go
+through taskiq's InMemoryBroker and Nuclei is replaced by
+benchmarks/fake_nuclei.py, so only Postgres is needed. Redis is optional,
+the host rate budget and the scan response cache are disabled.
+
+Results are written as JSON, compare the files of two releases to spot
+regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from unittest import mock
+
+# Settings are read on import, configure them before importing the app.
+_BENCH_DIR = Path(tempfile.mkdtemp(prefix="launch_check_bench-"))
+os.environ.setdefault("LAUNCH_CHECK_API_ENVIRONMENT", "benchmark")
+os.environ.setdefault("LAUNCH_CHECK_API_DB_BASE", "launch_check_api_bench")
+os.environ.setdefault("LAUNCH_CHECK_API_LOG_LEVEL", "WARNING")
+os.environ.setdefault("LAUNCH_CHECK_API_HOST_RATE_BUDGET", "0")
+os.environ.setdefault("LAUNCH_CHECK_API_SCAN_COALESCE_MAX_TARGETS", "1")
+os.environ.setdefault("LAUNCH_CHECK_API_SCAN_RESPONSE_CACHE_TTL", "0")
+os.environ.setdefault("LAUNCH_CHECK_API_FINDINGS_BLOB_DIR", str(_BENCH_DIR / "blobs"))
+
+from fastapi import FastAPI  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from taskiq_fastapi import populate_dependency_context  # noqa: E402
+
+from benchmarks.fake_nuclei import generate_findings  # noqa: E402
+from launch_check_api.db.dao.finding_dao import FindingDAO  # noqa: E402
+from launch_check_api.db.dao.scan_dao import ScanDAO  # noqa: E402
+from launch_check_api.db.meta import meta  # noqa: E402
+from launch_check_api.db.models import load_all_models  # noqa: E402
+from launch_check_api.db.models.scan_model import ScanStatus  # noqa: E402
+from launch_check_api.db.utils import create_database, drop_database  # noqa: E402
+from launch_check_api.services.coalescer import ScanCoalescer  # noqa: E402
+from launch_check_api.services.findings_store import (  # noqa: E402
+    FindingsArchive,
+    get_findings_store,
+)
+from launch_check_api.services.nuclei import (  # noqa: E402
+    DEFAULT_BATCH_SIZE,
+    Finding,
+    NucleiService,
+)
+from launch_check_api.services.scheduler import NucleiScheduler  # noqa: E402
+from launch_check_api.services.templates import TemplateManager  # noqa: E402
+from launch_check_api.settings import settings  # noqa: E402
+from launch_check_api.tkq import broker  # noqa: E402
+from launch_check_api.web.api.scan import views  # noqa: E402
+from launch_check_api.web.application import get_app  # noqa: E402
+
+SCHEMA_VERSION = 1
+SCENARIOS = ("api_create_scan", "run_scan", "parse", "db_write")
+FAKE_NUCLEI = Path(__file__).with_name("fake_nuclei.py")
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """
+    Percentiles of latency samples.
+
+    :param samples: latencies in seconds.
+    :return: percentiles and maximum in milliseconds.
+    """
+    ordered = sorted(samples)
+    cuts = statistics.quantiles(ordered, n=100) if len(ordered) > 1 else ordered * 99
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+@contextmanager
+def fake_nuclei(**variables: Any) -> Iterator[None]:
+    """
+    Configure the fake Nuclei processes started inside the block.
+
+    :param variables: FAKE_NUCLEI_* variables without their prefix.
+    :yield: nothing.
+    """
+    names = {
+        f"FAKE_NUCLEI_{name.upper()}": str(value) for name, value in variables.items()
+    }
+    previous = {name: os.environ.get(name) for name in names}
+    os.environ.update(names)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def install_fake_nuclei(directory: Path) -> None:
+    """
+    Put a ``nuclei`` executable running fake_nuclei.py first on PATH.
+
+    :param directory: directory for the executable.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    binary = directory / "nuclei"
+    binary.write_text(
+        "#!/bin/sh\n"
+        f'exec {shlex.quote(sys.executable)} {shlex.quote(str(FAKE_NUCLEI))} "$@"\n',
+    )
+    binary.chmod(0o755)
+    os.environ["PATH"] = f"{directory}{os.pathsep}{os.environ.get('PATH', '')}"
+
+
+async def bench_api_create_scan(
+    client: AsyncClient,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """
+    Throughput and latency of POST /api/scan/.
+
+    Tasks are not sent, run_scan is measured separately.
+
+    :param client: client of the application.
+    :param requests: number of requests.
+    :param concurrency: requests in flight at once.
+    :return: results.
+    """
+
+    async def discard(scan_id: int, scan_request: Any) -> None:
+        """Drop the task of a created scan."""
+
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def send(prefix: str, samples: Optional[List[float]]) -> None:
+        for index in counter:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/scan/",
+                json={"target_url": f"https://{prefix}-{index}.example.com/"},
+            )
+            response.raise_for_status()
+            if samples is not None:
+                samples.append(time.perf_counter() - started)
+
+    with mock.patch.object(views, "enqueue_scan", discard):
+        # Warm up connections and caches.
+        counter = iter(range(min(requests, 50)))
+        await asyncio.gather(*(send("warmup", None) for _ in range(concurrency)))
+
+        counter = iter(range(requests))
+        started = time.perf_counter()
+        await asyncio.gather(*(send("create", latencies) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(requests / elapsed, 1),
+        "latency": latency_summary(latencies),
+    }
+
+
+async def bench_run_scan(
+    client: AsyncClient,
+    session_factory: async_sessionmaker[AsyncSession],
+    findings_counts: List[int],
+    payload_size: int,
+    repeats: int,
+) -> List[Dict[str, Any]]:
+    """
+    End-to-end time of a scan, from POST /api/scan/ until it completed.
+
+    :param client: client of the application.
+    :param session_factory: sessions of the benchmark database.
+    :param findings_counts: findings written by Nuclei per run.
+    :param payload_size: bytes of HTTP response in each finding.
+    :param repeats: runs per findings count, the median is reported.
+    :return: results per findings count.
+    """
+    results = []
+    for count in findings_counts:
+        timings = []
+        with fake_nuclei(findings=count, payload_size=payload_size):
+            for repeat in range(repeats):
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/scan/",
+                    json={
+                        "target_url": f"https://scan-{count}-{repeat}.example.com/",
+                        "force": True,
+                    },
+                )
+                response.raise_for_status()
+                await broker.wait_all()
+                timings.append(time.perf_counter() - started)
+
+                async with session_factory() as session:
+                    scan = await ScanDAO(session).get_scan_summary(
+                        response.json()["scan_id"],
+                    )
+                if scan is None or scan.status != ScanStatus.COMPLETED:
+                    raise RuntimeError(f"Benchmark scan did not complete: {scan}")
+                if scan.total_findings != count:
+                    raise RuntimeError(
+                        f"Expected {count} findings, got {scan.total_findings}",
+                    )
+
+        seconds = statistics.median(timings)
+        results.append(
+            {
+                "findings": count,
+                "payload_size": payload_size,
+                "seconds": round(seconds, 4),
+                "findings_per_second": round(count / seconds, 1),
+                "runs": [round(timing, 4) for timing in timings],
+            },
+        )
+    return results
+
+
+async def bench_parse(
+    findings_counts: List[int],
+    payload_size: int,
+    repeats: int,
+) -> List[Dict[str, Any]]:
+    """
+    Throughput and peak Python memory of NucleiService.scan_target.
+
+    Findings are handed to a sink dropping them, so only reading and
+    parsing Nuclei's output is measured. Peak memory is traced in an extra
+    run, tracing slows parsing down.
+
+    :param findings_counts: findings written by Nuclei per run.
+    :param payload_size: bytes of HTTP response in each finding.
+    :param repeats: runs per findings count, the median is reported.
+    :return: results per findings count.
+    """
+
+    async def discard(findings: List[Dict[str, Any]]) -> None:
+        """Drop a batch of findings."""
+
+    service = NucleiService()
+    target = "https://parse.example.com/"
+    results = []
+    for count in findings_counts:
+        output_size = sum(
+            len(json.dumps(finding)) + 1
+            for finding in generate_findings([target], count, payload_size)
+        )
+        with fake_nuclei(findings=count, payload_size=payload_size):
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                scan = await service.scan_target(target, sink=discard)
+                timings.append(time.perf_counter() - started)
+                if scan["total_findings"] != count:
+                    raise RuntimeError(
+                        f"Expected {count} findings, got {scan['total_findings']}",
+                    )
+
+            tracemalloc.start()
+            try:
+                await service.scan_target(target, sink=discard)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        seconds = statistics.median(timings)
+        results.append(
+            {
+                "findings": count,
+                "payload_size": payload_size,
+                "output_bytes": output_size,
+                "seconds": round(seconds, 4),
+                "findings_per_second": round(count / seconds, 1),
+                "mb_per_second": round(output_size / seconds / 1e6, 2),
+                "peak_traced_bytes": peak,
+            },
+        )
+    return results
+
+
+async def bench_db_write(
+    session_factory: async_sessionmaker[AsyncSession],
+    findings: int,
+    payload_sizes: List[int],
+    repeats: int,
+) -> List[Dict[str, Any]]:
+    """
+    Time spent storing findings depending on their payload size.
+
+    Findings are written the way run_scan writes them: COPY batches into
+    the findings table, then the compressed raw payload into the scan row
+    or the blob backend.
+
+    :param session_factory: sessions of the benchmark database.
+    :param findings: findings stored per run.
+    :param payload_sizes: bytes of HTTP response in each finding.
+    :param repeats: runs per payload size, the median is reported.
+    :return: results per payload size.
+    """
+    findings_store = get_findings_store()
+    results = []
+    for payload_size in payload_sizes:
+        target = f"https://write-{payload_size}.example.com/"
+        generated = [
+            Finding.from_dict(finding)
+            for finding in generate_findings([target], findings, payload_size)
+        ]
+        payload_bytes = sum(len(finding.raw) + 1 for finding in generated)
+        batches = [
+            generated[start : start + DEFAULT_BATCH_SIZE]
+            for start in range(0, len(generated), DEFAULT_BATCH_SIZE)
+        ]
+
+        copy_timings = []
+        store_timings = []
+        compressed = 0
+        for _ in range(repeats):
+            async with session_factory() as session:
+                scan = await ScanDAO(session).create_scan(
+                    target_url=target,
+                    severity_levels=["info"],
+                )
+
+            started = time.perf_counter()
+            for batch in batches:
+                async with session_factory() as session:
+                    await FindingDAO(session).bulk_create(
+                        scan.id,
+                        batch,
+                        scan.started_at,
+                    )
+            copy_timings.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            archive = FindingsArchive()
+            try:
+                for batch in batches:
+                    await asyncio.to_thread(archive.write, batch)
+                payload = await findings_store.save(scan.id, archive)
+                async with session_factory() as session:
+                    await ScanDAO(session).update_scan(scan.id, payload)
+            finally:
+                archive.close()
+            store_timings.append(time.perf_counter() - started)
+            compressed = archive.size
+
+        copy_seconds = statistics.median(copy_timings)
+        store_seconds = statistics.median(store_timings)
+        results.append(
+            {
+                "findings": findings,
+                "payload_size": payload_size,
+                "payload_bytes": payload_bytes,
+                "compressed_bytes": compressed,
+                "inline": compressed <= findings_store.inline_max_size,
+                "copy_seconds": round(copy_seconds, 4),
+                "store_seconds": round(store_seconds, 4),
+                "findings_per_second": round(
+                    findings / (copy_seconds + store_seconds),
+                    1,
+                ),
+                "mb_per_second": round(
+                    payload_bytes / (copy_seconds + store_seconds) / 1e6,
+                    2,
+                ),
+            },
+        )
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(  # noqa: S603
+            ["git", "rev-parse", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _setup_worker_state(app: FastAPI) -> None:
+    """Give the app the worker state run_scan depends on."""
+    app.state.nuclei_scheduler = NucleiScheduler(4)
+    app.state.scan_coalescer = ScanCoalescer(
+        app.state.nuclei_scheduler,
+        max_targets=settings.scan_coalesce_max_targets,
+    )
+    app.state.template_manager = TemplateManager(
+        _BENCH_DIR / "templates",
+        max_age=settings.nuclei_templates_max_age,
+    )
+    populate_dependency_context(broker, app)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run the selected scenarios.
+
+    :param args: command line arguments.
+    :return: report.
+    """
+    install_fake_nuclei(_BENCH_DIR / "bin")
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.begin() as connection:
+        await connection.run_sync(meta.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    results: Dict[str, Any] = {}
+    scenarios = args.only or SCENARIOS
+    try:
+        app = get_app()
+        async with app.router.lifespan_context(app):
+            _setup_worker_state(app)
+            async with AsyncClient(
+                transport=ASGITransport(app=app),
+                base_url="http://bench",
+                timeout=600,
+            ) as client:
+                if "api_create_scan" in scenarios:
+                    results["api_create_scan"] = await bench_api_create_scan(
+                        client,
+                        args.requests,
+                        args.concurrency,
+                    )
+                if "run_scan" in scenarios:
+                    results["run_scan"] = await bench_run_scan(
+                        client,
+                        session_factory,
+                        args.findings,
+                        args.payload_size,
+                        args.repeats,
+                    )
+            if "parse" in scenarios:
+                results["parse"] = await bench_parse(
+                    args.findings,
+                    args.payload_size,
+                    args.repeats,
+                )
+            if "db_write" in scenarios:
+                results["db_write"] = await bench_db_write(
+                    session_factory,
+                    args.db_findings,
+                    args.payload_sizes,
+                    args.repeats,
+                )
+    finally:
+        await engine.dispose()
+        await drop_database()
+        shutil.rmtree(_BENCH_DIR, ignore_errors=True)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "findings": args.findings,
+            "payload_size": args.payload_size,
+            "db_findings": args.db_findings,
+            "payload_sizes": args.payload_sizes,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    :param argv: arguments, defaults to sys.argv.
+    :return: parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--only", action="append", choices=SCENARIOS)
+    parser.add_argument("--quick", action="store_true", help="smaller runs for CI")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--findings", type=_int_list, default=[100, 1000, 10000])
+    parser.add_argument("--payload-size", type=int, default=2048)
+    parser.add_argument("--db-findings", type=int, default=5000)
+    parser.add_argument("--payload-sizes", type=_int_list, default=[512, 4096, 32768])
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.repeats = 1
+        args.requests = min(args.requests, 100)
+        args.findings = [count for count in args.findings if count <= 1000]
+        args.db_findings = min(args.db_findings, 500)
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the benchmarks and write the report.
+
+    :param argv: command line arguments.
+    """
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(json.dumps(report["results"], indent=2))  # noqa: T201
+    print(f"Results written to {args.output}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,30 @@
+import os
+import shutil
+
 import uvicorn
 
 from launch_check_api.gunicorn_runner import GunicornApplication
 from launch_check_api.settings import settings
 
 
+def set_multiproc_dir() -> None:
+    """
+    Sets the multiprocess directory of prometheus-client.
+
+    This function cleans up the multiprocess directory
+    and recreates it. This actions are required by prometheus-client
+    to share metrics between processes.
+    """
+    shutil.rmtree(settings.prometheus_dir, ignore_errors=True)
+    settings.prometheus_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(
+        settings.prometheus_dir.expanduser().absolute(),
+    )
+
+
 def main() -> None:
     """Entrypoint of the application."""
+    set_multiproc_dir()
     if settings.reload:
         uvicorn.run(
             "launch_check_api.web.application:get_app",
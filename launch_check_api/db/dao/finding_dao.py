@@ -0,0 +1,258 @@
+from datetime import datetime
+from typing import Any, Collection, Dict, List, Optional, Sequence
+
+from fastapi import Depends
+from sqlalchemy import Row, Select, and_, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from launch_check_api.db.dependencies import get_db_session
+from launch_check_api.db.models.finding_model import FindingModel
+from launch_check_api.db.models.fingerprint_model import FingerprintModel
+from launch_check_api.db.models.scan_model import ScanModel
+from launch_check_api.db.routing import replica_bind
+from launch_check_api.services import fastjson
+from launch_check_api.services.metrics import findings_ingested
+from launch_check_api.services.nuclei import Finding
+
+# Column order used for COPY records.
+COPY_COLUMNS = (
+    "scan_id",
+    "scan_started_at",
+    "template_id",
+    "name",
+    "severity",
+    "matcher_name",
+    "host",
+    "matched_at",
+    "extracted_results",
+    "fingerprint",
+)
+
+
+class FindingDAO:
+    """Data Access Object for scan findings."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)) -> None:
+        self.session = session
+
+    async def bulk_create(
+        self,
+        scan_id: int,
+        findings: List[Finding],
+        scan_started_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        Store a batch of Nuclei findings with a single COPY.
+
+        Findings are stored in the partition of their scan's month, pass
+        ``scan_started_at`` to skip looking it up.
+
+        Args:
+            scan_id: ID of the scan the findings belong to
+            findings: Decoded Nuclei findings
+            scan_started_at: started_at of the scan
+
+        Returns:
+            int: Number of stored findings
+        """
+        if not findings:
+            return 0
+
+        if scan_started_at is None:
+            scan_started_at = await self.session.scalar(
+                select(ScanModel.started_at).where(ScanModel.id == scan_id),
+            )
+
+        records = []
+        for finding in findings:
+            columns = FindingModel.columns_from_nuclei(finding)
+            extracted = columns["extracted_results"]
+            columns["scan_id"] = scan_id
+            columns["scan_started_at"] = scan_started_at
+            columns["extracted_results"] = (
+                fastjson.dumps_str(extracted) if extracted is not None else None
+            )
+            records.append(tuple(columns[name] for name in COPY_COLUMNS))
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+            FindingModel.__tablename__,
+            records=records,
+            columns=COPY_COLUMNS,
+        )
+        await self.session.commit()
+        findings_ingested.inc(len(records))
+        return len(records)
+
+    async def count_by_severity(self, scan_id: int) -> Dict[str, int]:
+        """
+        Count findings of a scan by severity.
+
+        Args:
+            scan_id: ID of the scan
+        """
+        query = (
+            select(FindingModel.severity, func.count())
+            .where(FindingModel.scan_id == scan_id)
+            .group_by(FindingModel.severity)
+        )
+        result = await self.session.execute(
+            query,
+            bind_arguments=replica_bind(self.session),
+        )
+        return dict(result.tuples().all())
+
+    async def get_findings(
+        self,
+        scan_id: int,
+        limit: int,
+        after: Optional[int] = None,
+        severities: Optional[Collection[str]] = None,
+    ) -> Sequence[Row[Any]]:
+        """
+        Get findings of a scan in insertion order with keyset pagination.
+
+        Args:
+            scan_id: ID of the scan
+            limit: Maximum number of findings to return
+            after: Only return findings with a greater ID
+            severities: Only return findings with one of these severities
+
+        Returns:
+            Rows of the finding and when it was first and last seen on
+            the host, see _with_sightings
+        """
+        query = select(FindingModel).where(FindingModel.scan_id == scan_id)
+        if after is not None:
+            query = query.where(FindingModel.id > after)
+        if severities:
+            query = query.where(FindingModel.severity.in_(severities))
+        query = query.order_by(FindingModel.id).limit(limit)
+        result = await self.session.execute(
+            _with_sightings(query),
+            bind_arguments=replica_bind(self.session),
+        )
+        return result.all()
+
+    async def track_fingerprints(self, scan_id: int, target_host: str) -> None:
+        """
+        Record the fingerprints of a completed scan's findings for its host.
+
+        Only complete scans are tracked, so a finding missing from a
+        partial run doesn't look older than it is. New fingerprints are
+        inserted with the scan as first and last sighting, known ones get
+        their last sighting moved to the scan. Runs as a single
+        INSERT ... SELECT ... ON CONFLICT statement.
+
+        Args:
+            scan_id: ID of the scan
+            target_host: Host the scan ran against
+        """
+        sightings = (
+            select(
+                literal(target_host),
+                FindingModel.fingerprint,
+                FindingModel.template_id,
+                FindingModel.severity,
+                FindingModel.matched_at,
+                func.now(),
+                func.now(),
+                literal(scan_id),
+                literal(scan_id),
+            )
+            .where(
+                FindingModel.scan_id == scan_id,
+                FindingModel.fingerprint.is_not(None),
+            )
+            .distinct(FindingModel.fingerprint)
+            .order_by(FindingModel.fingerprint)
+        )
+        statement = insert(FingerprintModel).from_select(
+            [
+                "target_host",
+                "fingerprint",
+                "template_id",
+                "severity",
+                "matched_at",
+                "first_seen",
+                "last_seen",
+                "first_scan_id",
+                "last_scan_id",
+            ],
+            sightings,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["target_host", "fingerprint"],
+            set_={
+                "severity": statement.excluded.severity,
+                "last_seen": statement.excluded.last_seen,
+                "last_scan_id": statement.excluded.last_scan_id,
+            },
+        )
+        await self.session.execute(statement)
+        await self.session.commit()
+
+    async def get_findings_not_in(
+        self,
+        scan_id: int,
+        other_scan_id: Optional[int],
+        limit: int,
+    ) -> Sequence[Row[Any]]:
+        """
+        Get findings of a scan whose fingerprint is not in another scan.
+
+        Args:
+            scan_id: ID of the scan to take findings from
+            other_scan_id: ID of the scan to compare with, None returns
+                all findings
+            limit: Maximum number of findings to return
+
+        Returns:
+            Rows of the finding and when it was first and last seen on
+            the host, see _with_sightings
+        """
+        query = select(FindingModel).where(FindingModel.scan_id == scan_id)
+        if other_scan_id is not None:
+            other = aliased(FindingModel)
+            query = query.where(
+                ~exists().where(
+                    other.scan_id == other_scan_id,
+                    other.fingerprint == FindingModel.fingerprint,
+                ),
+            )
+        query = query.order_by(FindingModel.id).limit(limit)
+        result = await self.session.execute(
+            _with_sightings(query),
+            bind_arguments=replica_bind(self.session),
+        )
+        return result.all()
+
+
+def _with_sightings(query: Select[Any]) -> Select[Any]:
+    """
+    Add when each finding was first and last seen on its scan's host.
+
+    The rows carry the finding as ``FindingModel`` plus ``first_seen``
+    and ``last_seen``, which are None until a completed scan of the host
+    recorded its fingerprint.
+    """
+    return (
+        query.join(
+            ScanModel,
+            and_(
+                ScanModel.id == FindingModel.scan_id,
+                ScanModel.started_at == FindingModel.scan_started_at,
+            ),
+        )
+        .outerjoin(
+            FingerprintModel,
+            and_(
+                FingerprintModel.target_host == ScanModel.target_host,
+                FingerprintModel.fingerprint == FindingModel.fingerprint,
+            ),
+        )
+        .add_columns(FingerprintModel.first_seen, FingerprintModel.last_seen)
+    )
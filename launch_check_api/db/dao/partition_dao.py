@@ -0,0 +1,188 @@
+from datetime import date
+from typing import AsyncIterator, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from launch_check_api.db.partitions import add_months, partition_month
+
+# Rows fetched at once while exporting a partition.
+EXPORT_BATCH_SIZE = 1000
+
+
+class PartitionDAO:
+    """
+    Data Access Object for the monthly partitions of scans and findings.
+
+    Partition names are built by launch_check_api.db.partitions and only
+    contain word characters, so they are safe to use in DDL.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_partitions(self, table: str) -> Dict[date, bool]:
+        """
+        Get the monthly partitions of a table.
+
+        Detached partitions whose archival didn't finish are included.
+
+        Args:
+            table: Partitioned table
+
+        Returns:
+            Whether the partition is attached, by month
+        """
+        rows = await self.session.execute(
+            text(
+                "SELECT relname, relispartition FROM pg_class "
+                "WHERE relnamespace = current_schema()::regnamespace "
+                "AND relkind IN ('r', 'p') AND relname LIKE :pattern",
+            ),
+            {"pattern": f"{table}\\_p%"},
+        )
+        partitions = {}
+        for name, attached in rows:
+            month = partition_month(name, table)
+            if month is not None:
+                partitions[month] = attached
+        return partitions
+
+    async def set_lock_timeout(self, timeout: str) -> None:
+        """
+        Limit how long DDL of the current transaction waits for locks.
+
+        Args:
+            timeout: Postgres interval, e.g. "10s"
+        """
+        await self.session.execute(
+            text("SELECT set_config('lock_timeout', :timeout, true)"),
+            {"timeout": timeout},
+        )
+
+    async def create_partition(self, table: str, name: str, month: date) -> None:
+        """
+        Create the partition of a month unless it exists.
+
+        Args:
+            table: Partitioned table
+            name: Name of the partition
+            month: First day of the month
+        """
+        upper = add_months(month, 1)
+        await self.session.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month} 00:00+00') TO ('{upper} 00:00+00')",
+            ),
+        )
+
+    async def detach_partition(self, table: str, name: str) -> None:
+        """
+        Detach a partition, keeping it as a standalone table.
+
+        Args:
+            table: Partitioned table
+            name: Name of the partition
+        """
+        await self.session.execute(
+            text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'),
+        )
+
+    async def stream_rows(self, name: str) -> AsyncIterator[List[str]]:
+        """
+        Read all rows of a table as JSON, in batches ordered by id.
+
+        Args:
+            name: Name of the table
+
+        Yields:
+            Rows serialized as JSON objects
+        """
+        query = text(
+            f'SELECT t.id, row_to_json(t)::text FROM "{name}" t '  # noqa: S608
+            "WHERE t.id > :after ORDER BY t.id LIMIT :limit",
+        )
+        after = 0
+        while True:
+            rows = (
+                await self.session.execute(
+                    query,
+                    {"after": after, "limit": EXPORT_BATCH_SIZE},
+                )
+            ).all()
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield [row for _, row in rows]
+
+    async def get_findings_locations(self, name: str) -> List[str]:
+        """
+        Get the keys of offloaded findings payloads of a scans table.
+
+        Args:
+            name: Name of the scans partition
+
+        Returns:
+            Blob keys
+        """
+        result = await self.session.scalars(
+            text(
+                f'SELECT findings_location FROM "{name}" '  # noqa: S608
+                "WHERE findings_location IS NOT NULL",
+            ),
+        )
+        return list(result.all())
+
+    async def get_scan_ids(self, name: str) -> List[int]:
+        """
+        Get the ids of the scans in a scans table.
+
+        Args:
+            name: Name of the scans partition
+
+        Returns:
+            Scan ids
+        """
+        result = await self.session.scalars(
+            text(f'SELECT id FROM "{name}"'),  # noqa: S608
+        )
+        return list(result.all())
+
+    async def drop_table(self, name: str) -> None:
+        """
+        Drop a detached partition if it exists.
+
+        Args:
+            name: Name of the table
+        """
+        await self.session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+
+    async def try_lock(self, key: int) -> bool:
+        """
+        Take a session level advisory lock without waiting.
+
+        Args:
+            key: Lock key
+
+        Returns:
+            Whether the lock was taken
+        """
+        return bool(
+            await self.session.scalar(
+                text("SELECT pg_try_advisory_lock(:key)"),
+                {"key": key},
+            ),
+        )
+
+    async def unlock(self, key: int) -> None:
+        """
+        Release a session level advisory lock.
+
+        Args:
+            key: Lock key
+        """
+        await self.session.execute(
+            text("SELECT pg_advisory_unlock(:key)"),
+            {"key": key},
+        )
@@ -0,0 +1,197 @@
+import hashlib
+from datetime import date, timezone
+from typing import Any, List, Sequence
+
+from fastapi import Depends
+from sqlalchemy import case, desc, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from launch_check_api.db.dependencies import get_db_session
+from launch_check_api.db.models.constants import SEVERITIES
+from launch_check_api.db.models.rollup_model import RollupPeriod, TargetRollupModel
+from launch_check_api.db.models.scan_model import ScanModel
+from launch_check_api.db.routing import replica_bind
+
+# Counters copied from the last scan of a bucket.
+COUNTER_COLUMNS = ("total_findings", *(f"{severity}_count" for severity in SEVERITIES))
+# Columns taken from the last scan of a bucket.
+LATEST_COLUMNS = (*COUNTER_COLUMNS, "target_url", "last_scan_id", "last_scan_at")
+
+
+def scan_key(scan: ScanModel) -> str:
+    """
+    Key of the scan configuration a scan is rolled up under.
+
+    Scans requested through the API share the cache_key of identical
+    requests. Older scans without one are keyed by their URL.
+
+    Args:
+        scan: The scan
+
+    Returns:
+        Hex digest identifying the configuration
+    """
+    if scan.cache_key:
+        return scan.cache_key
+    return hashlib.sha256(scan.target_url.encode()).hexdigest()
+
+
+class RollupDAO:
+    """Data Access Object for per-host severity rollups."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)) -> None:
+        self.session = session
+
+    async def record_scan(self, scan: ScanModel) -> None:
+        """
+        Add a completed scan to the daily and weekly rollups of its host.
+
+        Buckets are kept per scan configuration, see scan_key, so a scan
+        of another URL or with other severities of the same host doesn't
+        replace the counts. Each bucket is updated with one upsert. The
+        scan only replaces the counters if it started after the bucket's
+        last scan. Recording the last scan of a bucket again changes
+        nothing, other scans must be recorded once.
+
+        Args:
+            scan: The completed scan
+        """
+        if not scan.target_host:
+            return
+        started_at = scan.started_at
+        if started_at.tzinfo is not None:
+            started_at = started_at.astimezone(timezone.utc)
+        counters = {column: getattr(scan, column) or 0 for column in COUNTER_COLUMNS}
+        rows = [
+            {
+                "target_host": scan.target_host,
+                "period": period.value,
+                "period_start": period.start_of(started_at.date()),
+                "scan_key": scan_key(scan),
+                "target_url": scan.target_url,
+                "severity_levels": scan.severity_levels,
+                "scans": 1,
+                "last_scan_id": scan.id,
+                "last_scan_at": scan.started_at,
+                **counters,
+            }
+            for period in RollupPeriod
+        ]
+        statement = insert(TargetRollupModel).values(rows)
+        excluded = statement.excluded
+        newer = excluded.last_scan_at >= TargetRollupModel.last_scan_at
+        latest = {
+            column: case(
+                (newer, excluded[column]),
+                else_=getattr(TargetRollupModel, column),
+            )
+            for column in LATEST_COLUMNS
+        }
+        statement = statement.on_conflict_do_update(
+            index_elements=["target_host", "period", "period_start", "scan_key"],
+            set_={"scans": TargetRollupModel.scans + 1, **latest},
+            where=TargetRollupModel.last_scan_id != excluded.last_scan_id,
+        )
+        await self.session.execute(statement)
+        await self.session.commit()
+
+    async def get_trend(
+        self,
+        target_host: str,
+        period: RollupPeriod,
+        since: date,
+    ) -> Sequence[TargetRollupModel]:
+        """
+        Get the rollups of a host, oldest first.
+
+        A bucket holds one rollup per scan configuration, ordered by URL.
+
+        Args:
+            target_host: Lowercased host name
+            period: Length of the buckets
+            since: Buckets starting before this day are skipped
+
+        Returns:
+            Rollups of the host
+        """
+        query = (
+            select(TargetRollupModel)
+            .where(
+                TargetRollupModel.target_host == target_host,
+                TargetRollupModel.period == period.value,
+                TargetRollupModel.period_start >= since,
+            )
+            .order_by(
+                TargetRollupModel.period_start,
+                TargetRollupModel.target_url,
+                TargetRollupModel.scan_key,
+            )
+        )
+        result = await self.session.execute(
+            query,
+            bind_arguments=replica_bind(self.session),
+        )
+        return result.scalars().all()
+
+    async def get_worst_hosts(
+        self,
+        since: date,
+        limit: int,
+    ) -> Sequence[TargetRollupModel]:
+        """
+        Get the hosts with the most severe findings.
+
+        Every host is ranked by its worst scan configuration, taking the
+        counters of the latest daily bucket of each configuration since
+        ``since``: critical findings first, then high, medium and low
+        ones, ties go to the host with more findings.
+
+        Args:
+            since: Hosts without a completed scan since this day are skipped
+            limit: Maximum number of hosts
+
+        Returns:
+            Worst latest daily rollup of each host, worst first
+        """
+        latest = (
+            select(TargetRollupModel)
+            .where(
+                TargetRollupModel.period == RollupPeriod.DAY.value,
+                TargetRollupModel.period_start >= since,
+            )
+            .distinct(TargetRollupModel.target_host, TargetRollupModel.scan_key)
+            .order_by(
+                TargetRollupModel.target_host,
+                TargetRollupModel.scan_key,
+                desc(TargetRollupModel.period_start),
+            )
+            .subquery()
+        )
+        rollup = aliased(TargetRollupModel, latest)
+        worst = (
+            select(rollup)
+            .distinct(rollup.target_host)
+            .order_by(rollup.target_host, *_severity_order(rollup))
+            .subquery()
+        )
+        host = aliased(TargetRollupModel, worst)
+        query = (
+            select(host).order_by(*_severity_order(host), host.target_host).limit(limit)
+        )
+        result = await self.session.execute(
+            query,
+            bind_arguments=replica_bind(self.session),
+        )
+        return result.scalars().all()
+
+
+def _severity_order(rollup: Any) -> List[Any]:
+    return [
+        desc(rollup.critical_count),
+        desc(rollup.high_count),
+        desc(rollup.medium_count),
+        desc(rollup.low_count),
+        desc(rollup.total_findings),
+    ]
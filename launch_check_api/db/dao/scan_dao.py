@@ -1,20 +1,70 @@
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Collection, List, Optional, Dict, Any, Tuple
 
 from fastapi import Depends
-from sqlalchemy import select, desc
+from sqlalchemy import (
+    ColumnElement,
+    Executable,
+    Result,
+    Row,
+    and_,
+    delete,
+    desc,
+    func,
+    insert,
+    inspect,
+    or_,
+    select,
+    tuple_,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from launch_check_api.db.dependencies import get_db_session
+from launch_check_api.db.routing import replica_bind
 from launch_check_api.db.models.scan_model import ScanModel, ScanStatus
+from launch_check_api.services.findings_store import get_findings_store
+from launch_check_api.services.metrics import scan_status_changes
+from launch_check_api.services.scan_cache import ScanCache, get_scan_cache
+from launch_check_api.services.targets import target_host
+
+# Every status has a series from the start, so increase() sees the first scan.
+for _status in ScanStatus:
+    scan_status_changes.labels(_status.value)
 
 
 class ScanDAO:
     """Data Access Object for scan operations."""
 
-    def __init__(self, session: AsyncSession = Depends(get_db_session)) -> None:
+    def __init__(
+        self,
+        session: AsyncSession = Depends(get_db_session),
+        scan_cache: Annotated[Optional[ScanCache], Depends(get_scan_cache)] = None,
+    ) -> None:
         self.session = session
+        # Cached responses of scans changed through a DAO without a cache
+        # are only dropped when they expire.
+        self.scan_cache = scan_cache
+
+    async def _read(self, query: Executable) -> Result[Any]:
+        """Run a read-only query, on a replica if the session has one."""
+        return await self.session.execute(
+            query,
+            bind_arguments=replica_bind(self.session),
+        )
+
+    async def _read_one(self, query: Executable) -> Optional[Row[Any]]:
+        """
+        Read a single row, on a replica if the session has one.
+
+        A scan created moments ago may not have reached the replica yet,
+        so a missing row is looked up on the primary again.
+        """
+        row = (await self._read(query)).one_or_none()
+        if row is None and replica_bind(self.session) is not None:
+            row = (await self.session.execute(query)).one_or_none()
+        return row
 
     async def create_scan(
         self,
@@ -22,6 +72,8 @@ class ScanDAO:
         severity_levels: List[str],
         rate_limit: int = 150,
         timeout: int = 5,
+        templates: Optional[List[str]] = None,
+        cache_key: Optional[str] = None,
     ) -> ScanModel:
         """
         Create a new scan record.
@@ -31,20 +83,65 @@ class ScanDAO:
             severity_levels: List of severity levels to scan for
             rate_limit: Rate limit for the scan
             timeout: Timeout in minutes
+            templates: Templates to use, None for the default set
+            cache_key: Key of the scan configuration used for reuse
         """
-        scan = ScanModel(
-            target_url=target_url,
-            status=ScanStatus.PENDING,
-            started_at=datetime.utcnow(),
-            severity_levels=severity_levels,
-            rate_limit=rate_limit,
-            timeout=timeout,
+        query = (
+            insert(ScanModel)
+            .values(
+                target_url=target_url,
+                target_host=target_host(target_url),
+                status=ScanStatus.PENDING,
+                started_at=datetime.now(timezone.utc),
+                severity_levels=severity_levels,
+                rate_limit=rate_limit,
+                timeout=timeout,
+                templates=templates,
+                cache_key=cache_key,
+            )
+            .returning(ScanModel)
         )
-        self.session.add(scan)
+        scan = (await self.session.execute(query)).scalar_one()
         await self.session.commit()
-        await self.session.refresh(scan)
+        scan_status_changes.labels(ScanStatus.PENDING.value).inc()
         return scan
 
+    async def create_scans(self, scans: List[Dict[str, Any]]) -> List[int]:
+        """
+        Create many pending scan records at once.
+
+        Rows are written with multi-row INSERT ... RETURNING statements
+        and a single commit.
+
+        Args:
+            scans: Column values of each scan, as accepted by create_scan
+                plus an optional batch_id
+
+        Returns:
+            IDs of the new scans, in the order of ``scans``
+        """
+        if not scans:
+            return []
+
+        started_at = datetime.now(timezone.utc)
+        rows = [
+            {
+                "status": ScanStatus.PENDING,
+                "started_at": started_at,
+                "target_host": target_host(scan["target_url"]),
+                **scan,
+            }
+            for scan in scans
+        ]
+        result = await self.session.execute(
+            insert(ScanModel).returning(ScanModel.id, sort_by_parameter_order=True),
+            rows,
+        )
+        scan_ids = list(result.scalars().all())
+        await self.session.commit()
+        scan_status_changes.labels(ScanStatus.PENDING.value).inc(len(scan_ids))
+        return scan_ids
+
     async def get_scan_by_id(self, scan_id: int) -> Optional[ScanModel]:
         """
         Get a specific scan by ID.
@@ -53,66 +150,281 @@ class ScanDAO:
             scan_id: ID of the scan to retrieve
         """
         query = select(ScanModel).where(ScanModel.id == scan_id)
+        row = await self._read_one(query)
+        return row[0] if row is not None else None
+
+    async def get_scan_fields(
+        self,
+        scan_id: int,
+        fields: Collection[str],
+    ) -> Optional[Row[Any]]:
+        """
+        Get only some columns of a scan.
+
+        Deferred columns like the legacy findings document are only read
+        when they are part of ``fields``.
+
+        Args:
+            scan_id: ID of the scan to retrieve
+            fields: Names of the columns to select
+        """
+        query = select(
+            *(getattr(ScanModel, field) for field in fields),
+        ).where(ScanModel.id == scan_id)
+        return await self._read_one(query)
+
+    async def load_findings(self, scan_id: int) -> Optional[Any]:
+        """
+        Load the raw findings of a scan.
+
+        The payload is only read here, from the row or from the blob
+        backend, and decompressed. Scans stored before payloads were
+        compressed return their legacy findings document.
+
+        Args:
+            scan_id: ID of the scan
+
+        Returns:
+            Raw findings, None if the scan has none stored
+        """
+        query = select(
+            ScanModel.findings_codec,
+            ScanModel.findings_checksum,
+            ScanModel.findings_location,
+            ScanModel.findings_data,
+            ScanModel.findings,
+        ).where(ScanModel.id == scan_id)
+        row = await self._read_one(query)
+        if row is None:
+            return None
+        if row.findings_codec is None:
+            return row.findings
+        return await get_findings_store().load(
+            row.findings_codec,
+            row.findings_checksum,
+            data=row.findings_data,
+            location=row.findings_location,
+        )
+
+    async def find_reusable_scan(
+        self,
+        cache_key: str,
+        ttl: int,
+        active_max_age: int = 0,
+    ) -> Optional[ScanModel]:
+        """
+        Find a scan whose results can be shared with an identical request.
+
+        A pending or running scan is reused if it was created less than
+        ``active_max_age`` seconds ago, older ones were most likely left
+        behind by a dead worker. A completed scan is reused if it finished
+        less than ``ttl`` seconds ago. A transaction level advisory lock on
+        the key serializes concurrent identical requests until the caller
+        commits, so they don't both start a new scan.
+
+        Args:
+            cache_key: Key of the scan configuration
+            ttl: Maximum age of a completed scan in seconds
+            active_max_age: Maximum age of a pending or running scan in
+                seconds, 0 reuses them at any age
+        """
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(func.hashtextextended(cache_key, 0))),
+        )
+
+        reusable: ColumnElement[bool] = ScanModel.status.in_(
+            [ScanStatus.PENDING, ScanStatus.IN_PROGRESS],
+        )
+        if active_max_age > 0:
+            reusable = and_(
+                reusable,
+                ScanModel.started_at >= func.now() - timedelta(seconds=active_max_age),
+            )
+        if ttl > 0:
+            reusable = or_(
+                reusable,
+                and_(
+                    ScanModel.status == ScanStatus.COMPLETED,
+                    ScanModel.completed_at >= func.now() - timedelta(seconds=ttl),
+                ),
+            )
+
+        query = (
+            select(ScanModel)
+            .where(ScanModel.cache_key == cache_key, reusable)
+            .order_by(desc(ScanModel.started_at))
+            .limit(1)
+        )
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_previous_scan_id(self, scan_id: int) -> Optional[int]:
+        """
+        Get the completed scan that ran before a scan with the same setup.
+
+        Scans match on their cache key, so only scans of the same target
+        with the same configuration are compared. Older scans without a
+        cache key match on their target URL.
+
+        Args:
+            scan_id: ID of the scan
+
+        Returns:
+            ID of the previous completed scan, None if there is none
+        """
+        scan = await self.get_scan_fields(
+            scan_id,
+            ["cache_key", "target_url", "started_at"],
+        )
+        if scan is None:
+            return None
+
+        if scan.cache_key is not None:
+            same_setup = ScanModel.cache_key == scan.cache_key
+        else:
+            same_setup = ScanModel.target_url == scan.target_url
+        query = (
+            select(ScanModel.id)
+            .where(
+                same_setup,
+                ScanModel.status == ScanStatus.COMPLETED,
+                tuple_(ScanModel.started_at, ScanModel.id)
+                < tuple_(scan.started_at, scan_id),
+            )
+            .order_by(desc(ScanModel.started_at), desc(ScanModel.id))
+            .limit(1)
+        )
+        result = await self._read(query)
+        return result.scalar_one_or_none()
+
+    async def get_scan_summary(self, scan_id: int) -> Optional[Row[Any]]:
+        """
+        Get status and severity counters of a scan.
+
+        Only the counter columns are selected, so the findings payload is
+        never read.
+
+        Args:
+            scan_id: ID of the scan to summarize
+        """
+        query = select(
+            ScanModel.id,
+            ScanModel.target_url,
+            ScanModel.status,
+            ScanModel.started_at,
+            ScanModel.completed_at,
+            ScanModel.total_findings,
+            ScanModel.critical_count,
+            ScanModel.high_count,
+            ScanModel.medium_count,
+            ScanModel.low_count,
+            ScanModel.info_count,
+        ).where(ScanModel.id == scan_id)
+        return await self._read_one(query)
+
     async def update_scan(
         self,
         scan_id: int,
         update_data: Dict[str, Any],
+        expected_status: Optional[Collection[ScanStatus]] = None,
     ) -> Optional[ScanModel]:
         """
         Update a scan record with new data.
 
+        The update is a single UPDATE ... RETURNING statement. When
+        ``expected_status`` is given, the row is only updated while its
+        status is one of them, which makes status transitions atomic.
+        Cached responses of the scan are dropped, a new status is counted
+        in the scan status metric.
+
         Args:
             scan_id: ID of the scan to update
             update_data: Dictionary containing fields to update
+            expected_status: Statuses the scan must currently have
+
+        Returns:
+            The updated scan, None if it doesn't exist or is in another status
         """
-        scan = await self.get_scan_by_id(scan_id)
-        if not scan:
-            return None
+        columns = inspect(ScanModel).column_attrs.keys()
+        values = {key: value for key, value in update_data.items() if key in columns}
 
-        for key, value in update_data.items():
-            if hasattr(scan, key):
-                setattr(scan, key, value)
+        query = update(ScanModel).where(ScanModel.id == scan_id)
+        if expected_status is not None:
+            query = query.where(ScanModel.status.in_(expected_status))
+        # With nothing to change, still lock the row and report it back.
+        query = query.values(**values) if values else query.values(id=ScanModel.id)
 
+        result = await self.session.execute(
+            query.returning(ScanModel),
+            execution_options={"synchronize_session": "fetch"},
+        )
+        scan = result.scalar_one_or_none()
         await self.session.commit()
-        await self.session.refresh(scan)
+        if scan is not None and "status" in values:
+            scan_status_changes.labels(scan.status.value).inc()
+        if scan is not None and self.scan_cache is not None:
+            await self.scan_cache.invalidate(scan_id)
         return scan
 
+    async def get_batch_progress(self, batch_id: str) -> Dict[ScanStatus, int]:
+        """
+        Count scans of a batch by status.
+
+        Args:
+            batch_id: ID of the batch
+        """
+        query = (
+            select(ScanModel.status, func.count().label("scans"))
+            .where(ScanModel.batch_id == batch_id)
+            .group_by(ScanModel.status)
+        )
+        result = await self._read(query)
+        return {row.status: row.scans for row in result}
+
     async def get_scans(
         self,
         limit: int = 10,
-        offset: int = 0,
+        after: Optional[Tuple[datetime, int]] = None,
         status: Optional[ScanStatus] = None,
-        target_url: Optional[str] = None,
+        host_prefix: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
     ) -> List[ScanModel]:
         """
-        Get scans with filtering and pagination.
+        Get scans with filtering and keyset pagination.
+
+        Scans are ordered by (started_at, id) descending. Pages continue
+        strictly after the ``after`` position instead of using OFFSET, so
+        every page is an index range scan regardless of its depth.
 
         Args:
             limit: Maximum number of scans to return
-            offset: Number of scans to skip
+            after: (started_at, id) of the last scan of the previous page
             status: Filter by scan status
-            target_url: Filter by target URL
+            host_prefix: Filter by target hosts starting with this prefix
             start_date: Filter scans after this date
             end_date: Filter scans before this date
         """
-        query = select(ScanModel).order_by(desc(ScanModel.started_at))
+        query = select(ScanModel).order_by(
+            desc(ScanModel.started_at),
+            desc(ScanModel.id),
+        )
 
+        if after:
+            query = query.where(tuple_(ScanModel.started_at, ScanModel.id) < after)
         if status:
             query = query.where(ScanModel.status == status)
-        if target_url:
-            query = query.where(ScanModel.target_url.ilike(f"%{target_url}%"))
+        if host_prefix:
+            query = query.where(
+                ScanModel.target_host.startswith(host_prefix.lower(), autoescape=True),
+            )
         if start_date:
             query = query.where(ScanModel.started_at >= start_date)
         if end_date:
             query = query.where(ScanModel.started_at <= end_date)
 
-        query = query.limit(limit).offset(offset)
-        result = await self.session.execute(query)
+        query = query.limit(limit)
+        result = await self._read(query)
         return list(result.scalars().all())
 
     async def delete_scan(self, scan_id: int) -> bool:
@@ -125,10 +437,16 @@ class ScanDAO:
         Returns:
             bool: True if scan was deleted, False if not found
         """
-        scan = await self.get_scan_by_id(scan_id)
-        if not scan:
-            return False
-
-        await self.session.delete(scan)
+        query = (
+            delete(ScanModel)
+            .where(ScanModel.id == scan_id)
+            .returning(ScanModel.id, ScanModel.findings_location)
+        )
+        deleted = (await self.session.execute(query)).one_or_none()
         await self.session.commit()
+        if deleted is None:
+            return False
+        if self.scan_cache is not None:
+            await self.scan_cache.invalidate(scan_id)
+        await get_findings_store().delete(deleted.findings_location)
         return True
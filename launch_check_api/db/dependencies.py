@@ -1,6 +1,6 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette.requests import Request
 from taskiq import TaskiqDepends
 
@@ -21,3 +21,18 @@ async def get_db_session(
     finally:
         await session.commit()
         await session.close()
+
+
+def get_db_session_factory(
+    request: Request = TaskiqDepends(),
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Get the factory of database sessions.
+
+    Long running tasks use it to open short-lived sessions,
+    so they don't hold a connection between writes.
+
+    :param request: current request.
+    :return: session factory.
+    """
+    return request.app.state.db_session_factory
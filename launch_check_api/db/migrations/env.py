@@ -1,11 +1,14 @@
 import asyncio
 from logging.config import fileConfig
+from typing import Any, Optional
 
 from alembic import context
+from alembic.runtime.environment import NameFilterParentNames, NameFilterType
 from sqlalchemy.ext.asyncio.engine import create_async_engine
 from sqlalchemy.future import Connection
 from launch_check_api.db.meta import meta
 from launch_check_api.db.models import load_all_models
+from launch_check_api.db.partitions import is_partition
 from launch_check_api.settings import settings
 
 # this is the Alembic Config object, which provides
@@ -31,6 +34,46 @@ target_metadata = meta
 # ... etc.
 
 
+def include_name(
+    name: Optional[str],
+    type_: NameFilterType,
+    parent_names: NameFilterParentNames,
+) -> bool:
+    """
+    Skip monthly and default partitions, they are not part of the models.
+
+    :param name: name of the object.
+    :param type_: kind of the object.
+    :param parent_names: names of the schema and table of the object.
+    :return: whether autogenerate compares the object.
+    """
+    if type_ == "table" and name is not None:
+        return not is_partition(name)
+    return True
+
+
+def include_object(
+    object_: Any,
+    name: Optional[str],
+    type_: str,
+    reflected: bool,
+    compare_to: Any,
+) -> bool:
+    """
+    Skip the foreign keys Postgres clones for every referenced partition.
+
+    :param object_: schema item.
+    :param name: name of the item.
+    :param type_: kind of the item.
+    :param reflected: whether the item was reflected from the database.
+    :param compare_to: matching item of the models, if any.
+    :return: whether autogenerate compares the object.
+    """
+    if type_ == "foreign_key_constraint" and reflected:
+        return not is_partition(object_.referred_table.name)
+    return True
+
+
 async def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -46,6 +89,8 @@ async def run_migrations_offline() -> None:
     context.configure(
         url=str(settings.db_url),
         target_metadata=target_metadata,
+        include_name=include_name,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -60,7 +105,12 @@ def do_run_migrations(connection: Connection) -> None:
 
     :param connection: connection to the database.
     """
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
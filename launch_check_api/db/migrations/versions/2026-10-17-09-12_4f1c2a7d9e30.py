@@ -0,0 +1,55 @@
+"""Add findings table.
+
+Revision ID: 4f1c2a7d9e30
+Revises: 9fc8649179aa
+Create Date: 2026-10-17 09:12:41.118204
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4f1c2a7d9e30"
+down_revision = "9fc8649179aa"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_table(
+        "findings",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("scan_id", sa.Integer(), nullable=False),
+        sa.Column("template_id", sa.String(length=255), nullable=False),
+        sa.Column("name", sa.String(length=512), nullable=True),
+        sa.Column("severity", sa.String(length=16), nullable=False),
+        sa.Column("matcher_name", sa.String(length=255), nullable=True),
+        sa.Column("host", sa.String(length=2048), nullable=True),
+        sa.Column("matched_at", sa.String(length=2048), nullable=True),
+        sa.Column("extracted_results", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_findings_scan_id_severity",
+        "findings",
+        ["scan_id", "severity"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_findings_template_id",
+        "findings",
+        ["template_id"],
+        unique=False,
+    )
+    op.create_index("ix_findings_host", "findings", ["host"], unique=False)
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index("ix_findings_host", table_name="findings")
+    op.drop_index("ix_findings_template_id", table_name="findings")
+    op.drop_index("ix_findings_scan_id_severity", table_name="findings")
+    op.drop_table("findings")
@@ -0,0 +1,38 @@
+"""Add scan templates and cache key.
+
+Revision ID: a83e5b1c0d47
+Revises: 4f1c2a7d9e30
+Create Date: 2026-10-17 10:05:12.640118
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a83e5b1c0d47"
+down_revision = "4f1c2a7d9e30"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.add_column("scans", sa.Column("templates", sa.JSON(), nullable=True))
+    op.add_column(
+        "scans",
+        sa.Column("cache_key", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        "ix_scans_cache_key_started_at",
+        "scans",
+        ["cache_key", "started_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index("ix_scans_cache_key_started_at", table_name="scans")
+    op.drop_column("scans", "cache_key")
+    op.drop_column("scans", "templates")
@@ -0,0 +1,65 @@
+"""Add scan target host and listing indexes.
+
+Revision ID: c2d9f04e6b18
+Revises: a83e5b1c0d47
+Create Date: 2026-10-17 11:20:37.904415
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c2d9f04e6b18"
+down_revision = "a83e5b1c0d47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.add_column(
+        "scans",
+        sa.Column(
+            "target_host",
+            sa.String(length=255),
+            server_default="",
+            nullable=False,
+        ),
+    )
+    op.execute(
+        """
+        UPDATE scans
+        SET target_host = coalesce(
+            lower(substring(target_url from '^[^:]+://(?:[^@/]*@)?([^/:?#]+)')),
+            ''
+        )
+        """,
+    )
+    op.create_index(
+        "ix_scans_started_at_id",
+        "scans",
+        ["started_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_scans_status_started_at_id",
+        "scans",
+        ["status", "started_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_scans_target_host_prefix",
+        "scans",
+        ["target_host"],
+        unique=False,
+        postgresql_ops={"target_host": "varchar_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index("ix_scans_target_host_prefix", table_name="scans")
+    op.drop_index("ix_scans_status_started_at_id", table_name="scans")
+    op.drop_index("ix_scans_started_at_id", table_name="scans")
+    op.drop_column("scans", "target_host")
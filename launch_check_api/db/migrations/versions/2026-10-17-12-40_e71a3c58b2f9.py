@@ -0,0 +1,28 @@
+"""Add scan batch id.
+
+Revision ID: e71a3c58b2f9
+Revises: c2d9f04e6b18
+Create Date: 2026-10-17 12:40:03.552871
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e71a3c58b2f9"
+down_revision = "c2d9f04e6b18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.add_column("scans", sa.Column("batch_id", sa.String(length=36), nullable=True))
+    op.create_index("ix_scans_batch_id", "scans", ["batch_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index("ix_scans_batch_id", table_name="scans")
+    op.drop_column("scans", "batch_id")
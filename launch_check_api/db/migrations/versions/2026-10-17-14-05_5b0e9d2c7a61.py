@@ -0,0 +1,29 @@
+"""Add scan template version.
+
+Revision ID: 5b0e9d2c7a61
+Revises: e71a3c58b2f9
+Create Date: 2026-10-17 14:05:27.104416
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b0e9d2c7a61"
+down_revision = "e71a3c58b2f9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.add_column(
+        "scans",
+        sa.Column("template_version", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_column("scans", "template_version")
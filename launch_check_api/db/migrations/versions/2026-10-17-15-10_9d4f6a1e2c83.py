@@ -0,0 +1,30 @@
+"""Add findings keyset pagination index.
+
+Revision ID: 9d4f6a1e2c83
+Revises: 5b0e9d2c7a61
+Create Date: 2026-10-17 15:10:42.661093
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9d4f6a1e2c83"
+down_revision = "5b0e9d2c7a61"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_index(
+        "ix_findings_scan_id_id",
+        "findings",
+        ["scan_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index("ix_findings_scan_id_id", table_name="findings")
@@ -0,0 +1,48 @@
+"""Add compressed findings payload columns.
+
+Revision ID: 3e8a7c0f1b54
+Revises: 9d4f6a1e2c83
+Create Date: 2026-10-17 16:25:13.208734
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3e8a7c0f1b54"
+down_revision = "9d4f6a1e2c83"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.add_column(
+        "scans",
+        sa.Column("findings_codec", sa.String(length=16), nullable=True),
+    )
+    op.add_column(
+        "scans",
+        sa.Column("findings_checksum", sa.String(length=64), nullable=True),
+    )
+    op.add_column("scans", sa.Column("findings_size", sa.Integer(), nullable=True))
+    op.add_column(
+        "scans",
+        sa.Column("findings_location", sa.String(length=1024), nullable=True),
+    )
+    op.add_column(
+        "scans",
+        sa.Column("findings_data", sa.LargeBinary(), nullable=True),
+    )
+    # The payload is already compressed, don't let TOAST try again.
+    op.execute("ALTER TABLE scans ALTER COLUMN findings_data SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_column("scans", "findings_data")
+    op.drop_column("scans", "findings_location")
+    op.drop_column("scans", "findings_size")
+    op.drop_column("scans", "findings_checksum")
+    op.drop_column("scans", "findings_codec")
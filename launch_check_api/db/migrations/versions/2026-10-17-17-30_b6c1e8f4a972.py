@@ -0,0 +1,71 @@
+"""Add finding fingerprints.
+
+Revision ID: b6c1e8f4a972
+Revises: 3e8a7c0f1b54
+Create Date: 2026-10-17 17:30:08.417285
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b6c1e8f4a972"
+down_revision = "3e8a7c0f1b54"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.add_column(
+        "findings",
+        sa.Column("fingerprint", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        "ix_findings_scan_id_fingerprint",
+        "findings",
+        ["scan_id", "fingerprint"],
+        unique=False,
+    )
+    op.create_table(
+        "finding_fingerprints",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("target_host", sa.String(length=255), nullable=False),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("template_id", sa.String(length=255), nullable=False),
+        sa.Column("severity", sa.String(length=16), nullable=False),
+        sa.Column("matched_at", sa.String(length=2048), nullable=True),
+        sa.Column("first_seen", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_seen", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("first_scan_id", sa.Integer(), nullable=False),
+        sa.Column("last_scan_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ux_finding_fingerprints_host_fingerprint",
+        "finding_fingerprints",
+        ["target_host", "fingerprint"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_finding_fingerprints_host_last_seen",
+        "finding_fingerprints",
+        ["target_host", "last_seen"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index(
+        "ix_finding_fingerprints_host_last_seen",
+        table_name="finding_fingerprints",
+    )
+    op.drop_index(
+        "ux_finding_fingerprints_host_fingerprint",
+        table_name="finding_fingerprints",
+    )
+    op.drop_table("finding_fingerprints")
+    op.drop_index("ix_findings_scan_id_fingerprint", table_name="findings")
+    op.drop_column("findings", "fingerprint")
@@ -0,0 +1,41 @@
+"""Add cancelled and timed out scan statuses.
+
+Revision ID: 4c7e2b9d1f06
+Revises: b6c1e8f4a972
+Create Date: 2026-10-17 18:40:21.093518
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4c7e2b9d1f06"
+down_revision = "b6c1e8f4a972"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    # New enum values can't be used in the transaction that adds them.
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE scanstatus ADD VALUE IF NOT EXISTS 'CANCELLED'")
+        op.execute("ALTER TYPE scanstatus ADD VALUE IF NOT EXISTS 'TIMED_OUT'")
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.execute(
+        "UPDATE scans SET status = 'FAILED' "
+        "WHERE status IN ('CANCELLED', 'TIMED_OUT')",
+    )
+    op.execute("ALTER TYPE scanstatus RENAME TO scanstatus_old")
+    op.execute(
+        "CREATE TYPE scanstatus AS ENUM "
+        "('PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED')",
+    )
+    op.execute(
+        "ALTER TABLE scans ALTER COLUMN status TYPE scanstatus "
+        "USING status::text::scanstatus",
+    )
+    op.execute("DROP TYPE scanstatus_old")
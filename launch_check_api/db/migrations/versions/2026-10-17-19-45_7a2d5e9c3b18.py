@@ -0,0 +1,215 @@
+"""Partition scans and findings by month.
+
+Revision ID: 7a2d5e9c3b18
+Revises: 4c7e2b9d1f06
+Create Date: 2026-10-17 19:45:12.584301
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import List
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7a2d5e9c3b18"
+down_revision = "4c7e2b9d1f06"
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created after the current month.
+MONTHS_AHEAD = 3
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _columns(table: str) -> List[str]:
+    rows = op.get_bind().execute(
+        sa.text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table "
+            "ORDER BY ordinal_position",
+        ),
+        {"table": table},
+    )
+    return [f'"{column}"' for column in rows.scalars()]
+
+
+def _create_partitions(first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        upper = _next_month(month)
+        for table in ("scans", "findings"):
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month} 00:00+00') TO ('{upper} 00:00+00')",
+            )
+        month = upper
+    op.execute("CREATE TABLE scans_default PARTITION OF scans DEFAULT")
+    op.execute("CREATE TABLE findings_default PARTITION OF findings DEFAULT")
+
+
+def _create_scan_indexes() -> None:
+    op.create_index(
+        "ix_scans_cache_key_started_at",
+        "scans",
+        ["cache_key", "started_at"],
+        unique=False,
+    )
+    op.create_index("ix_scans_batch_id", "scans", ["batch_id"], unique=False)
+    op.create_index(
+        "ix_scans_started_at_id",
+        "scans",
+        ["started_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_scans_status_started_at_id",
+        "scans",
+        ["status", "started_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_scans_target_host_prefix",
+        "scans",
+        ["target_host"],
+        unique=False,
+        postgresql_ops={"target_host": "varchar_pattern_ops"},
+    )
+
+
+def _create_finding_indexes() -> None:
+    op.create_index(
+        "ix_findings_scan_id_severity",
+        "findings",
+        ["scan_id", "severity"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_findings_scan_id_id",
+        "findings",
+        ["scan_id", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_findings_scan_id_fingerprint",
+        "findings",
+        ["scan_id", "fingerprint"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_findings_template_id",
+        "findings",
+        ["template_id"],
+        unique=False,
+    )
+    op.create_index("ix_findings_host", "findings", ["host"], unique=False)
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.rename_table("findings", "findings_unpartitioned")
+    op.rename_table("scans", "scans_unpartitioned")
+
+    # Same columns and defaults, ids keep coming from the old sequences.
+    op.execute(
+        "CREATE TABLE scans (LIKE scans_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (started_at)",
+    )
+    op.execute(
+        "CREATE TABLE findings (LIKE findings_unpartitioned INCLUDING DEFAULTS, "
+        "scan_started_at TIMESTAMP WITH TIME ZONE NOT NULL) "
+        "PARTITION BY RANGE (scan_started_at)",
+    )
+    op.execute("ALTER SEQUENCE scans_id_seq OWNED BY scans.id")
+    op.execute("ALTER SEQUENCE findings_id_seq OWNED BY findings.id")
+
+    oldest = (
+        op.get_bind()
+        .execute(sa.text("SELECT min(started_at) FROM scans_unpartitioned"))
+        .scalar()
+    )
+    now = datetime.now(timezone.utc)
+    current = date(now.year, now.month, 1)
+    first = current
+    if oldest is not None:
+        oldest = oldest.astimezone(timezone.utc)
+        first = min(first, date(oldest.year, oldest.month, 1))
+    last = current
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    _create_partitions(first, last)
+
+    scan_columns = ", ".join(_columns("scans_unpartitioned"))
+    op.execute(
+        f"INSERT INTO scans ({scan_columns}) "  # noqa: S608
+        f"SELECT {scan_columns} FROM scans_unpartitioned",
+    )
+    finding_columns = _columns("findings_unpartitioned")
+    op.execute(
+        f"INSERT INTO findings ({', '.join(finding_columns)}, scan_started_at) "  # noqa: S608
+        f"SELECT {', '.join(f'f.{column}' for column in finding_columns)}, "
+        "s.started_at FROM findings_unpartitioned f "
+        "JOIN scans_unpartitioned s ON s.id = f.scan_id",
+    )
+    op.drop_table("findings_unpartitioned")
+    op.drop_table("scans_unpartitioned")
+
+    # Built after loading the rows, which is much faster.
+    op.create_primary_key("scans_pkey", "scans", ["id", "started_at"])
+    op.create_primary_key("findings_pkey", "findings", ["id", "scan_started_at"])
+    op.create_foreign_key(
+        "findings_scan_id_scan_started_at_fkey",
+        "findings",
+        "scans",
+        ["scan_id", "scan_started_at"],
+        ["id", "started_at"],
+        ondelete="CASCADE",
+    )
+    _create_scan_indexes()
+    _create_finding_indexes()
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.execute(
+        "CREATE TABLE scans_unpartitioned (LIKE scans INCLUDING DEFAULTS)",
+    )
+    op.execute(
+        "CREATE TABLE findings_unpartitioned (LIKE findings INCLUDING DEFAULTS)",
+    )
+    op.drop_column("findings_unpartitioned", "scan_started_at")
+    op.execute("ALTER SEQUENCE scans_id_seq OWNED BY scans_unpartitioned.id")
+    op.execute("ALTER SEQUENCE findings_id_seq OWNED BY findings_unpartitioned.id")
+
+    scan_columns = ", ".join(_columns("scans_unpartitioned"))
+    op.execute(
+        f"INSERT INTO scans_unpartitioned ({scan_columns}) "  # noqa: S608
+        f"SELECT {scan_columns} FROM scans",
+    )
+    finding_columns = ", ".join(_columns("findings_unpartitioned"))
+    op.execute(
+        f"INSERT INTO findings_unpartitioned ({finding_columns}) "  # noqa: S608
+        f"SELECT {finding_columns} FROM findings",
+    )
+    # Drops the partitions too, archived ones are already gone.
+    op.drop_table("findings")
+    op.drop_table("scans")
+    op.rename_table("scans_unpartitioned", "scans")
+    op.rename_table("findings_unpartitioned", "findings")
+
+    op.create_primary_key("scans_pkey", "scans", ["id"])
+    op.create_primary_key("findings_pkey", "findings", ["id"])
+    op.create_foreign_key(
+        "findings_scan_id_fkey",
+        "findings",
+        "scans",
+        ["scan_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    _create_scan_indexes()
+    _create_finding_indexes()
@@ -0,0 +1,95 @@
+"""Add per-host severity rollups.
+
+Revision ID: d3f8b61a4e27
+Revises: 7a2d5e9c3b18
+Create Date: 2026-10-17 20:50:41.309215
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d3f8b61a4e27"
+down_revision = "7a2d5e9c3b18"
+branch_labels = None
+depends_on = None
+
+COUNTERS = (
+    "total_findings",
+    "critical_count",
+    "high_count",
+    "medium_count",
+    "low_count",
+    "info_count",
+)
+# First day of the bucket of a scan, in UTC.
+PERIOD_STARTS = {
+    "day": "(started_at AT TIME ZONE 'UTC')::date",
+    "week": "date_trunc('week', started_at AT TIME ZONE 'UTC')::date",
+}
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_table(
+        "target_severity_rollups",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("target_host", sa.String(length=255), nullable=False),
+        sa.Column("period", sa.String(length=8), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("scan_key", sa.String(length=64), nullable=False),
+        sa.Column("target_url", sa.String(length=2048), nullable=False),
+        sa.Column("severity_levels", sa.JSON(), nullable=False),
+        sa.Column("scans", sa.Integer(), nullable=False),
+        sa.Column("last_scan_id", sa.Integer(), nullable=False),
+        sa.Column("last_scan_at", sa.DateTime(timezone=True), nullable=False),
+        *(sa.Column(counter, sa.Integer(), nullable=False) for counter in COUNTERS),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ux_target_severity_rollups_host_period_start_key",
+        "target_severity_rollups",
+        ["target_host", "period", "period_start", "scan_key"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_target_severity_rollups_period_start",
+        "target_severity_rollups",
+        ["period", "period_start"],
+        unique=False,
+    )
+
+    # Backfill from completed scans, the last scan of each bucket and
+    # configuration wins, keys match rollup_dao.scan_key.
+    counters = ", ".join(COUNTERS)
+    for period, period_start in PERIOD_STARTS.items():
+        op.execute(
+            "INSERT INTO target_severity_rollups (target_host, period, "  # noqa: S608
+            "period_start, scan_key, target_url, severity_levels, scans, "
+            f"last_scan_id, last_scan_at, {counters}) "
+            "SELECT DISTINCT ON (target_host, period_start, scan_key) "
+            f"target_host, '{period}', period_start, scan_key, target_url, "
+            "severity_levels, count(*) OVER "
+            "(PARTITION BY target_host, period_start, scan_key), "
+            f"id, started_at, {', '.join(f'coalesce({c}, 0)' for c in COUNTERS)} "
+            f"FROM (SELECT *, {period_start} AS period_start, "
+            "coalesce(cache_key, encode(sha256(convert_to(target_url, 'UTF8')), "
+            "'hex')) AS scan_key FROM scans "
+            "WHERE status = 'COMPLETED' AND target_host <> '') AS completed "
+            "ORDER BY target_host, period_start, scan_key, started_at DESC, "
+            "id DESC",
+        )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index(
+        "ix_target_severity_rollups_period_start",
+        table_name="target_severity_rollups",
+    )
+    op.drop_index(
+        "ux_target_severity_rollups_host_period_start_key",
+        table_name="target_severity_rollups",
+    )
+    op.drop_table("target_severity_rollups")
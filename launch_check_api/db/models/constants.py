@@ -0,0 +1,3 @@
+# Nuclei severities, most severe first. Scans and rollups keep a counter
+# column for each of them.
+SEVERITIES = ("critical", "high", "medium", "low", "info")
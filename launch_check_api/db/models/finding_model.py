@@ -0,0 +1,127 @@
+import hashlib
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    DateTime,
+    ForeignKeyConstraint,
+    Index,
+    String,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from launch_check_api.db.base import Base
+from launch_check_api.db.partitions import add_default_partition
+
+if TYPE_CHECKING:
+    from launch_check_api.services.nuclei import Finding
+
+
+class FindingModel(Base):
+    """Model for a single Nuclei finding of a scan."""
+
+    __tablename__ = "findings"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["scan_id", "scan_started_at"],
+            ["scans.id", "scans.started_at"],
+            ondelete="CASCADE",
+        ),
+        Index("ix_findings_scan_id_severity", "scan_id", "severity"),
+        # Keyset pagination of the findings of a scan
+        Index("ix_findings_scan_id_id", "scan_id", "id"),
+        # Anti-joins between the findings of two scans
+        Index("ix_findings_scan_id_fingerprint", "scan_id", "fingerprint"),
+        Index("ix_findings_template_id", "template_id"),
+        Index("ix_findings_host", "host"),
+        # Findings share the monthly partitions of their scans
+        {"postgresql_partition_by": "RANGE (scan_started_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    scan_id: Mapped[int] = mapped_column()
+    # started_at of the scan, the partition key
+    scan_started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+    )
+
+    # Template that produced the finding
+    template_id: Mapped[str] = mapped_column(String(length=255))
+    name: Mapped[Optional[str]] = mapped_column(String(length=512), nullable=True)
+    severity: Mapped[str] = mapped_column(String(length=16))
+    matcher_name: Mapped[Optional[str]] = mapped_column(
+        String(length=255),
+        nullable=True,
+    )
+
+    # Where it was found
+    host: Mapped[Optional[str]] = mapped_column(String(length=2048), nullable=True)
+    matched_at: Mapped[Optional[str]] = mapped_column(
+        String(length=2048),
+        nullable=True,
+    )
+    extracted_results: Mapped[Optional[list]] = mapped_column(  # type: ignore[type-arg]
+        JSON,
+        nullable=True,
+    )
+    # Identifies the same finding across scans, see fingerprint_of
+    fingerprint: Mapped[Optional[str]] = mapped_column(
+        String(length=64),
+        nullable=True,
+    )
+
+    def __repr__(self) -> str:
+        """String representation of the finding."""
+        return (
+            f"<Finding(id={self.id}, scan_id={self.scan_id}, "
+            f"template={self.template_id}, severity={self.severity})>"
+        )
+
+    @staticmethod
+    def columns_from_nuclei(finding: "Finding") -> Dict[str, Any]:
+        """
+        Pick the stored columns out of a Nuclei finding.
+
+        Long values are truncated to the column sizes, so one odd finding
+        can't fail a whole batch.
+        """
+        return {
+            "template_id": _truncate(finding.template_id, 255) or "",
+            "name": _truncate(finding.name, 512),
+            "severity": _truncate(finding.severity, 16) or "unknown",
+            "matcher_name": _truncate(finding.matcher_name, 255),
+            "host": _truncate(finding.host, 2048),
+            "matched_at": _truncate(finding.matched_at, 2048),
+            "extracted_results": finding.extracted_results or None,
+            "fingerprint": FindingModel.fingerprint_of(finding),
+        }
+
+    @staticmethod
+    def fingerprint_of(finding: "Finding") -> str:
+        """
+        Hash identifying a Nuclei finding across scans.
+
+        Built from template, matcher, matched URL and host, so rescans of
+        a target produce the same fingerprint for an unchanged issue.
+        """
+        parts = (
+            finding.template_id,
+            finding.matcher_name,
+            finding.matched_at,
+            finding.host,
+        )
+        raw = "\x1f".join(part or "" for part in parts)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _truncate(value: Optional[str], length: int) -> Optional[str]:
+    """Cut a value to at most ``length`` characters."""
+    if not value:
+        return None
+    return value[:length]
+
+
+add_default_partition(FindingModel)
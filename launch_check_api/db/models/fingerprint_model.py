@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from launch_check_api.db.base import Base
+
+
+class FingerprintModel(Base):
+    """
+    A finding seen on a target host, across all of its scans.
+
+    Findings of every scan carry a fingerprint, see
+    FindingModel.fingerprint_of. Each fingerprint is stored once per
+    host with the scans and times it was first and last seen.
+    """
+
+    __tablename__ = "finding_fingerprints"
+    __table_args__ = (
+        Index(
+            "ux_finding_fingerprints_host_fingerprint",
+            "target_host",
+            "fingerprint",
+            unique=True,
+        ),
+        Index(
+            "ix_finding_fingerprints_host_last_seen",
+            "target_host",
+            "last_seen",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    target_host: Mapped[str] = mapped_column(String(length=255))
+    fingerprint: Mapped[str] = mapped_column(String(length=64))
+
+    template_id: Mapped[str] = mapped_column(String(length=255))
+    severity: Mapped[str] = mapped_column(String(length=16))
+    matched_at: Mapped[Optional[str]] = mapped_column(
+        String(length=2048),
+        nullable=True,
+    )
+
+    first_seen: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_seen: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    first_scan_id: Mapped[int] = mapped_column()
+    last_scan_id: Mapped[int] = mapped_column()
+
+    def __repr__(self) -> str:
+        """String representation of the fingerprint."""
+        return (
+            f"<Fingerprint(host={self.target_host}, "
+            f"template={self.template_id}, last_seen={self.last_seen})>"
+        )
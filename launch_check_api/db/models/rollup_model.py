@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+from enum import Enum
+
+from sqlalchemy import JSON, BigInteger, Date, DateTime, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from launch_check_api.db.base import Base
+
+
+class RollupPeriod(str, Enum):
+    """Length of the buckets of severity rollups."""
+
+    DAY = "day"
+    # Weeks start on Monday, like date_trunc('week', ...)
+    WEEK = "week"
+
+    def start_of(self, day: date) -> date:
+        """First day of the bucket holding a day."""
+        if self == RollupPeriod.WEEK:
+            return day - timedelta(days=day.weekday())
+        return day
+
+
+class TargetRollupModel(Base):
+    """
+    Severity counts of a scan configuration of a host per day or week.
+
+    Updated whenever a scan of the host completes, see
+    RollupDAO.record_scan. A host has one row per bucket for each scan
+    configuration, scans of other URLs or severities don't replace each
+    other's counts. Counters are those of the last completed scan of the
+    bucket, the state of the host at its end. Rows outlive the scans they
+    were built from, including archived scan partitions.
+    """
+
+    __tablename__ = "target_severity_rollups"
+    __table_args__ = (
+        Index(
+            "ux_target_severity_rollups_host_period_start_key",
+            "target_host",
+            "period",
+            "period_start",
+            "scan_key",
+            unique=True,
+        ),
+        # Latest buckets of all hosts, for the worst hosts ranking
+        Index(
+            "ix_target_severity_rollups_period_start",
+            "period",
+            "period_start",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    target_host: Mapped[str] = mapped_column(String(length=255))
+    period: Mapped[str] = mapped_column(String(length=8))
+    # UTC day or Monday of the week
+    period_start: Mapped[date] = mapped_column(Date)
+    # Scan configuration, the cache_key of the scans, see RollupDAO
+    scan_key: Mapped[str] = mapped_column(String(length=64))
+    target_url: Mapped[str] = mapped_column(String(length=2048))
+    severity_levels: Mapped[list[str]] = mapped_column(JSON)
+
+    # Completed scans in the bucket
+    scans: Mapped[int] = mapped_column(default=0)
+    last_scan_id: Mapped[int] = mapped_column()
+    last_scan_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    total_findings: Mapped[int] = mapped_column(default=0)
+    critical_count: Mapped[int] = mapped_column(default=0)
+    high_count: Mapped[int] = mapped_column(default=0)
+    medium_count: Mapped[int] = mapped_column(default=0)
+    low_count: Mapped[int] = mapped_column(default=0)
+    info_count: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self) -> str:
+        """String representation of the rollup."""
+        return (
+            f"<TargetRollup(host={self.target_host}, period={self.period}, "
+            f"start={self.period_start})>"
+        )
@@ -1,50 +1,129 @@
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import String, JSON, DateTime, Enum as SQLAEnum
-from sqlalchemy.orm import Mapped, mapped_column
 from enum import Enum
+from typing import Dict, Optional
+
+from sqlalchemy import JSON, DateTime, Index, LargeBinary, String
+from sqlalchemy import Enum as SQLAEnum
+from sqlalchemy.orm import Mapped, mapped_column
 
 from launch_check_api.db.base import Base
+from launch_check_api.db.models.constants import SEVERITIES
+from launch_check_api.db.partitions import add_default_partition
+
 
 class ScanStatus(str, Enum):
     """Enum for scan status."""
+
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    # Stopped on request or after exceeding max_duration, with the
+    # findings collected until then
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
+
+
+# Statuses a scan never leaves
+TERMINAL_STATUSES = frozenset(
+    {
+        ScanStatus.COMPLETED,
+        ScanStatus.FAILED,
+        ScanStatus.CANCELLED,
+        ScanStatus.TIMED_OUT,
+    },
+)
+
 
 class ScanModel(Base):
     """Model for storing security scan results."""
 
     __tablename__ = "scans"
+    __table_args__ = (
+        Index("ix_scans_cache_key_started_at", "cache_key", "started_at"),
+        Index("ix_scans_batch_id", "batch_id"),
+        # Keyset pagination on (started_at, id), optionally by status
+        Index("ix_scans_started_at_id", "started_at", "id"),
+        Index("ix_scans_status_started_at_id", "status", "started_at", "id"),
+        # Host prefix search with LIKE 'prefix%'
+        Index(
+            "ix_scans_target_host_prefix",
+            "target_host",
+            postgresql_ops={"target_host": "varchar_pattern_ops"},
+        ),
+        # One partition per month of started_at, see ScanRetention
+        {"postgresql_partition_by": "RANGE (started_at)"},
+    )
 
-    # Primary key and basic info
+    # Primary key and basic info, the partition key is part of the key
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     target_url: Mapped[str] = mapped_column(String(length=2048))  # Long URL support
-    
+    target_host: Mapped[str] = mapped_column(String(length=255), server_default="")
+
     # Scan metadata
     status: Mapped[ScanStatus] = mapped_column(SQLAEnum(ScanStatus))
-    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
-    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
-    
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+    )
+    completed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
     # Scan configuration
-    severity_levels: Mapped[list] = mapped_column(JSON)  # Store as ["low", "medium", "high", etc.]
+    # Store as ["low", "medium", "high", etc.]
+    severity_levels: Mapped[list] = mapped_column(JSON)
     rate_limit: Mapped[int] = mapped_column(default=150)
     timeout: Mapped[int] = mapped_column(default=5)
-    
+    templates: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    # Hash of normalized target and configuration, see scan_cache_key
+    cache_key: Mapped[Optional[str]] = mapped_column(String(length=64), nullable=True)
+    # Set for scans submitted together through the batch endpoint
+    batch_id: Mapped[Optional[str]] = mapped_column(String(length=36), nullable=True)
+    # Nuclei template version the scan ran with, see TemplateManager
+    template_version: Mapped[Optional[str]] = mapped_column(
+        String(length=64),
+        nullable=True,
+    )
+
     # Results
     total_findings: Mapped[Optional[int]] = mapped_column(nullable=True)
-    findings: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # Store full JSON results
-    
+    # Legacy full JSON results, new scans store findings in the findings table
+    findings: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, deferred=True)
+    # Compressed raw findings, see FindingsStore. Small payloads are kept
+    # in findings_data, larger ones are offloaded to findings_location.
+    findings_codec: Mapped[Optional[str]] = mapped_column(
+        String(length=16),
+        nullable=True,
+    )
+    findings_checksum: Mapped[Optional[str]] = mapped_column(
+        String(length=64),
+        nullable=True,
+    )
+    findings_size: Mapped[Optional[int]] = mapped_column(nullable=True)
+    findings_location: Mapped[Optional[str]] = mapped_column(
+        String(length=1024),
+        nullable=True,
+    )
+    findings_data: Mapped[Optional[bytes]] = mapped_column(
+        LargeBinary,
+        nullable=True,
+        deferred=True,
+    )
+
     # Statistics
     critical_count: Mapped[int] = mapped_column(default=0)
     high_count: Mapped[int] = mapped_column(default=0)
     medium_count: Mapped[int] = mapped_column(default=0)
     low_count: Mapped[int] = mapped_column(default=0)
     info_count: Mapped[int] = mapped_column(default=0)
-    
+
     # Error handling
-    error_message: Mapped[Optional[str]] = mapped_column(String(length=1000), nullable=True)
+    error_message: Mapped[Optional[str]] = mapped_column(
+        String(length=1000),
+        nullable=True,
+    )
     warnings: Mapped[Optional[str]] = mapped_column(String(length=1000), nullable=True)
 
     def __repr__(self) -> str:
@@ -58,25 +137,30 @@ class ScanModel(Base):
             return (self.completed_at - self.started_at).total_seconds()
         return None
 
+    @staticmethod
+    def severity_columns(severity_count: Dict[str, int]) -> Dict[str, int]:
+        """Map per-severity finding counts to the counter columns."""
+        return {
+            f"{severity}_count": severity_count.get(severity, 0)
+            for severity in SEVERITIES
+        }
+
     def update_severity_counts(self, results: dict) -> None:
         """Update severity counts based on scan results."""
-        severity_count = {
-            'critical': 0,
-            'high': 0,
-            'medium': 0,
-            'low': 0,
-            'info': 0
-        }
-        
-        for finding in results.get('findings', []):
-            severity = finding.get('info', {}).get('severity', '').lower()
-            if severity in severity_count:
-                severity_count[severity] += 1
-        
-        self.critical_count = severity_count['critical']
-        self.high_count = severity_count['high']
-        self.medium_count = severity_count['medium']
-        self.low_count = severity_count['low']
-        self.info_count = severity_count['info']
-        self.total_findings = sum(severity_count.values())
-        
\ No newline at end of file
+        severity_count = results.get("severity_count")
+        if severity_count is None:
+            severity_count = dict.fromkeys(SEVERITIES, 0)
+            for finding in results.get("findings", []):
+                severity = finding.get("info", {}).get("severity", "").lower()
+                if severity in severity_count:
+                    severity_count[severity] += 1
+
+        for column, count in self.severity_columns(severity_count).items():
+            setattr(self, column, count)
+        self.total_findings = results.get(
+            "total_findings",
+            sum(severity_count.values()),
+        )
+
+
+add_default_partition(ScanModel)
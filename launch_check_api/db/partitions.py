@@ -0,0 +1,108 @@
+import re
+from datetime import date, datetime, timezone
+from typing import Iterator, Optional, Type
+
+from sqlalchemy import DDL, event
+
+from launch_check_api.db.base import Base
+
+# Tables range partitioned by month.
+PARTITIONED_TABLES = frozenset({"scans", "findings"})
+# Monthly partitions are named <table>_pYYYY_MM, e.g. scans_p2026_10,
+# catch-all partitions <table>_default.
+PARTITION_NAME = re.compile(
+    r"^(?P<table>\w+?)_(?:p(?P<year>\d{4})_(?P<month>\d{2})|default)$",
+)
+
+
+def month_of(moment: datetime) -> date:
+    """
+    First day of the UTC month of a moment.
+
+    :param moment: aware or UTC datetime.
+    :return: month.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    Move a month forwards or backwards.
+
+    :param month: first day of a month.
+    :param months: number of months, negative to go back.
+    :return: first day of the resulting month.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(first: date, last: date) -> Iterator[date]:
+    """
+    Months from ``first`` to ``last``, both included.
+
+    :param first: first month.
+    :param last: last month.
+    :yield: first day of every month.
+    """
+    month = first
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """
+    Name of the partition of a table holding a month.
+
+    :param table: partitioned table.
+    :param month: first day of the month.
+    :return: partition name.
+    """
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(name: str, table: str) -> Optional[date]:
+    """
+    Month held by a partition, parsed from its name.
+
+    :param name: name of the partition.
+    :param table: partitioned table the partition belongs to.
+    :return: first day of the month, None for other tables and defaults.
+    """
+    match = PARTITION_NAME.match(name)
+    if match is None or match["table"] != table or match["year"] is None:
+        return None
+    return date(int(match["year"]), int(match["month"]), 1)
+
+
+def is_partition(name: str) -> bool:
+    """
+    Whether a table is a monthly or default partition.
+
+    Partitions are not part of the models, migrations ignore them.
+
+    :param name: name of a table.
+    :return: True for partitions of PARTITIONED_TABLES.
+    """
+    match = PARTITION_NAME.match(name)
+    return match is not None and match["table"] in PARTITIONED_TABLES
+
+
+def add_default_partition(model: Type[Base]) -> None:
+    """
+    Create a catch-all partition whenever the table is created.
+
+    Tables created from the models, e.g. in tests, accept rows right
+    away. Migrations and ScanRetention create the monthly partitions.
+
+    :param model: model of a range partitioned table.
+    """
+    name = model.__tablename__
+    event.listen(
+        model.__table__,
+        "after_create",
+        DDL(f"CREATE TABLE {name}_default PARTITION OF {name} DEFAULT"),
+    )
@@ -0,0 +1,21 @@
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from launch_check_api.services.metrics import db_pool_checkout_wait
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool recording how long checkouts wait for a connection.
+
+    The time includes opening a new connection when the pool has none
+    idle, so it shows both an exhausted pool and a slow database.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started)
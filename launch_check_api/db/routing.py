@@ -0,0 +1,26 @@
+import random
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Key of the replica engines in the info of sessions that may use them.
+REPLICAS_KEY = "replicas"
+
+
+def replica_bind(session: AsyncSession) -> Optional[Dict[str, Any]]:
+    """
+    Bind arguments sending a read-only statement to a replica.
+
+    Sessions created by a factory with replicas in their info pick one
+    replica at their first read and keep using it, so all reads of a
+    request see the same snapshot.
+
+    :param session: current session.
+    :return: bind arguments, None if the session has no replicas.
+    """
+    replicas = session.info.get(REPLICAS_KEY)
+    if not replicas:
+        return None
+    if "replica" not in session.info:
+        session.info["replica"] = random.choice(replicas)  # noqa: S311
+    return {"bind": session.info["replica"].sync_engine}
@@ -1,7 +1,10 @@
 from typing import Any
 
 from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
 from gunicorn.util import import_app
+from gunicorn.workers.base import Worker
+from prometheus_client import multiprocess
 from uvicorn.workers import UvicornWorker as BaseUvicornWorker
 
 try:
@@ -28,6 +31,16 @@ class UvicornWorker(BaseUvicornWorker):
     }
 
 
+def child_exit(server: Arbiter, worker: Worker) -> None:
+    """
+    Drop metrics of live gauges of an exited worker.
+
+    :param server: gunicorn arbiter.
+    :param worker: exited worker.
+    """
+    multiprocess.mark_process_dead(worker.pid)
+
+
 class GunicornApplication(BaseApplication):
     """
     Custom gunicorn application.
@@ -48,6 +61,7 @@ class GunicornApplication(BaseApplication):
             "bind": f"{host}:{port}",
             "workers": workers,
             "worker_class": "launch_check_api.gunicorn_runner.UvicornWorker",
+            "child_exit": child_exit,
             **kwargs,
         }
         self.app = app
@@ -0,0 +1,77 @@
+import logging
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from taskiq import TaskiqDepends
+
+from launch_check_api.services.nuclei import ScanControl
+from launch_check_api.services.redis.dependency import get_redis_pool
+
+logger = logging.getLogger(__name__)
+
+# Cancel requests are kept for workers subscribing after they were sent.
+CANCEL_TTL = 3600
+
+
+def _channel(scan_id: int) -> str:
+    return f"launch_check:scan:{scan_id}:cancel"
+
+
+def _cancel_key(scan_id: int) -> str:
+    return f"launch_check:scan:{scan_id}:cancelled"
+
+
+class ScanCancellation:
+    """
+    Cancel requests of running scans over Redis pub/sub.
+
+    The API publishes a request on the channel of the scan and keeps a
+    marker key, the worker running the scan watches both and stops its
+    Nuclei process through a ScanControl.
+    """
+
+    def __init__(
+        self,
+        redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+    ) -> None:
+        self.redis_pool = redis_pool
+
+    async def request(self, scan_id: int) -> None:
+        """
+        Ask the worker running a scan to stop it.
+
+        :param scan_id: id of the scan.
+        :raises RedisError: if the request couldn't be sent.
+        """
+        async with Redis(
+            connection_pool=self.redis_pool,
+        ) as redis, redis.pipeline(transaction=False) as pipe:
+            pipe.set(_cancel_key(scan_id), 1, ex=CANCEL_TTL)
+            pipe.publish(_channel(scan_id), 1)
+            await pipe.execute()
+
+    async def watch(self, scan_id: int, control: ScanControl) -> None:
+        """
+        Cancel ``control`` once a cancel request for the scan arrives.
+
+        Runs until the request arrives or the task is cancelled. Without
+        Redis the scan keeps running and can only time out.
+
+        :param scan_id: id of the scan.
+        :param control: control of the scan's Nuclei process.
+        """
+        try:
+            async with Redis(
+                connection_pool=self.redis_pool,
+            ) as redis, redis.pubsub() as pubsub:
+                # Subscribe before checking the key to not miss a request.
+                await pubsub.subscribe(_channel(scan_id))
+                if not await redis.exists(_cancel_key(scan_id)):
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            break
+        except RedisError as error:
+            logger.warning("Scan %d can't be cancelled: %s", scan_id, error)
+            return
+        logger.info("Cancel requested for scan %d", scan_id)
+        control.cancel()
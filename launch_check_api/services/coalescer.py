@@ -0,0 +1,357 @@
+import asyncio
+import logging
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from starlette.requests import Request
+from taskiq import TaskiqDepends
+
+from launch_check_api.services.nuclei import (
+    CANCELLED,
+    Finding,
+    FindingSink,
+    NucleiService,
+    ScanControl,
+    StatsSink,
+)
+from launch_check_api.services.scheduler import NucleiScheduler
+from launch_check_api.services.targets import target_host
+
+logger = logging.getLogger(__name__)
+
+# Called once a scan got a Nuclei slot, right before it is handed to
+# Nuclei. Returns the requests per second it may send, or None to drop it.
+StartCallback = Callable[[], Awaitable[Optional[int]]]
+
+
+class _Member:
+    """A scan waiting in a group."""
+
+    def __init__(
+        self,
+        target: str,
+        on_start: StartCallback,
+        sink: FindingSink,
+        on_progress: Optional[StatsSink],
+        control: Optional[ScanControl],
+    ) -> None:
+        self.target = target
+        self.host = target_host(target)
+        # Granted by on_start.
+        self.rate_limit = 0
+        self.on_start = on_start
+        self.sink = sink
+        self.on_progress = on_progress
+        self.control = control
+        # Set once a cancelled member stopped receiving findings.
+        self.detached = False
+        self._lock = asyncio.Lock()
+        self.future: "asyncio.Future[Optional[Dict[str, Any]]]" = (
+            asyncio.get_running_loop().create_future()
+        )
+
+    async def deliver(self, findings: List[Finding]) -> None:
+        """Pass findings to the sink unless the member was detached."""
+        async with self._lock:
+            if not self.detached:
+                await self.sink(findings)
+
+    async def detach(self) -> None:
+        """Stop delivering findings, waiting for a delivery in flight."""
+        async with self._lock:
+            self.detached = True
+
+
+class _Group:
+    """Scans with identical options that will share one Nuclei process."""
+
+    def __init__(
+        self,
+        nuclei_service: NucleiService,
+        severity: Optional[List[str]],
+        templates: Optional[List[str]],
+        timeout: int,
+        templates_dir: Optional[str],
+        max_duration: Optional[float],
+        priority: int,
+    ) -> None:
+        self.nuclei_service = nuclei_service
+        self.severity = severity
+        self.templates = templates
+        self.timeout = timeout
+        self.templates_dir = templates_dir
+        self.max_duration = max_duration
+        self.priority = priority
+        self.members: List[_Member] = []
+
+    def has_host(self, host: str) -> bool:
+        return any(member.host == host for member in self.members)
+
+
+class ScanCoalescer:
+    """
+    Runs compatible scans of a worker in a single Nuclei process.
+
+    Scans with the same priority, severities, templates, template
+    version, timeout and maximum duration are collected into a group of
+    at most ``max_targets`` targets of different hosts while the group
+    waits for a scheduler slot. The group closes as soon as it gets the
+    slot, so a scan never waits for others while a slot is free, and is
+    scanned with ``nuclei -list``: templates are loaded and compiled
+    once instead of once per scan. A cancelled member of a running group
+    returns right away with the batches delivered so far, findings of its
+    unfinished batch are dropped. The process is only killed once every
+    member was cancelled.
+    """
+
+    def __init__(self, scheduler: NucleiScheduler, max_targets: int) -> None:
+        self.scheduler = scheduler
+        self.max_targets = max_targets
+        self._open: Dict[Hashable, _Group] = {}
+        self._runners: Set["asyncio.Task[None]"] = set()
+
+    async def scan(
+        self,
+        nuclei_service: NucleiService,
+        target: str,
+        on_start: StartCallback,
+        sink: FindingSink,
+        severity: Optional[List[str]] = None,
+        templates: Optional[List[str]] = None,
+        timeout: int = 5,
+        templates_dir: Optional[str] = None,
+        on_progress: Optional[StatsSink] = None,
+        control: Optional[ScanControl] = None,
+        coalesce: bool = True,
+        priority: int = 0,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Scan a target, possibly together with other pending scans.
+
+        Args:
+            nuclei_service: Service running Nuclei
+            target: URL to scan
+            on_start: Called when the scan is about to start, grants its
+                requests per second
+            sink: Coroutine receiving batches of findings of this target
+            severity: List of severities to scan for
+            templates: List of specific template paths to use
+            timeout: Seconds to wait for each request, passed as -timeout
+            templates_dir: Template version directory to scan with
+            on_progress: Optional coroutine receiving progress reports
+            control: Optional deadline and cancellation of the scan
+            coalesce: Whether the scan may share a Nuclei process
+            priority: Rank of the scan for a Nuclei slot, lower goes first
+
+        Returns:
+            Scan results, or None if ``on_start`` dropped the scan
+        """
+        if not coalesce or self.max_targets <= 1:
+            async with self.scheduler.slot(priority):
+                rate_limit = await on_start()
+                if rate_limit is None:
+                    return None
+                return await nuclei_service.scan_target(
+                    target=target,
+                    severity=severity,
+                    templates=templates,
+                    rate_limit=rate_limit,
+                    timeout=timeout,
+                    sink=sink,
+                    templates_dir=templates_dir,
+                    on_progress=on_progress,
+                    control=control,
+                )
+
+        max_duration = control.max_duration if control is not None else None
+        key = (
+            priority,
+            *_options_key(severity, templates, timeout, templates_dir, max_duration),
+        )
+        group = self._open.get(key)
+        # Members of a group start one after another, a second scan of a
+        # host could wait for a rate share its own group holds.
+        if group is None or group.has_host(target_host(target)):
+            group = _Group(
+                nuclei_service,
+                severity,
+                templates,
+                timeout,
+                templates_dir,
+                max_duration,
+                priority,
+            )
+            self._open[key] = group
+            runner = asyncio.create_task(self._run(key, group))
+            self._runners.add(runner)
+            runner.add_done_callback(self._runners.discard)
+
+        member = _Member(target, on_start, sink, on_progress, control)
+        group.members.append(member)
+        if len(group.members) >= self.max_targets:
+            self._close(key, group)
+        return await member.future
+
+    def _close(self, key: Hashable, group: _Group) -> None:
+        if self._open.get(key) is group:
+            del self._open[key]
+
+    async def _run(self, key: Hashable, group: _Group) -> None:
+        try:
+            async with self.scheduler.slot(group.priority):
+                self._close(key, group)
+                started: List[_Member] = []
+                for member in group.members:
+                    if member.future.done():
+                        # The waiting scan task was cancelled.
+                        continue
+                    try:
+                        rate_limit = await member.on_start()
+                    except Exception as error:
+                        _fail(member, error)
+                        continue
+                    if rate_limit is None:
+                        _resolve(member, None)
+                    else:
+                        member.rate_limit = rate_limit
+                        started.append(member)
+                if started:
+                    await self._scan(group, started)
+        except asyncio.CancelledError as error:
+            for member in group.members:
+                _fail(member, error)
+            raise
+        except Exception as error:
+            # Nobody awaits the runner, the members get the error instead.
+            logger.error(
+                "Coalesced scan of %d targets failed",
+                len(group.members),
+                exc_info=True,
+            )
+            for member in group.members:
+                _fail(member, error)
+
+    async def _scan(self, group: _Group, members: List[_Member]) -> None:
+        if len(members) == 1:
+            member = members[0]
+            try:
+                results = await group.nuclei_service.scan_target(
+                    target=member.target,
+                    severity=group.severity,
+                    templates=group.templates,
+                    rate_limit=member.rate_limit,
+                    timeout=group.timeout,
+                    sink=member.sink,
+                    templates_dir=group.templates_dir,
+                    on_progress=member.on_progress,
+                    control=member.control,
+                )
+            except Exception as error:
+                _fail(member, error)
+            else:
+                _resolve(member, results)
+            return
+
+        # Nuclei's rate limit covers the whole process and requests are
+        # spread over the targets, so every host gets about the smallest
+        # share granted to any member.
+        rate_limit = min(member.rate_limit for member in members) * len(members)
+        logger.info(
+            "Scanning %d targets in one Nuclei process | Rate Limit: %d",
+            len(members),
+            rate_limit,
+        )
+        control = ScanControl(group.max_duration)
+        watchers = [
+            asyncio.create_task(_detach_when_cancelled(member, members, control))
+            for member in members
+            if member.control is not None
+        ]
+        try:
+            group_results = await group.nuclei_service.scan_targets(
+                targets=[member.target for member in members],
+                sinks=[member.deliver for member in members],
+                severity=group.severity,
+                templates=group.templates,
+                rate_limit=rate_limit,
+                timeout=group.timeout,
+                templates_dir=group.templates_dir,
+                on_progress=[member.on_progress for member in members],
+                control=control,
+            )
+        except Exception as error:
+            for member in members:
+                _fail(member, error)
+        else:
+            for member, member_results in zip(members, group_results):
+                _resolve(member, member_results)
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
+
+
+async def _detach_when_cancelled(
+    member: _Member,
+    members: List[_Member],
+    control: ScanControl,
+) -> None:
+    """
+    Return a cancelled member of a running group right away.
+
+    Its findings delivered so far are kept, counts come from the caller's
+    own storage. The shared process is stopped once all members left.
+    """
+    await member.control.wait_cancelled()  # type: ignore[union-attr]
+    await member.detach()
+    _resolve(member, {"target": member.target, "status": CANCELLED})
+    if all(other.detached for other in members):
+        control.cancel()
+
+
+def _options_key(
+    severity: Optional[List[str]],
+    templates: Optional[List[str]],
+    timeout: int,
+    templates_dir: Optional[str],
+    max_duration: Optional[float],
+) -> Tuple[Hashable, ...]:
+    return (
+        tuple(sorted(severity or ())),
+        tuple(sorted(templates or ())),
+        timeout,
+        templates_dir,
+        max_duration,
+    )
+
+
+def _resolve(member: _Member, results: Optional[Dict[str, Any]]) -> None:
+    if not member.future.done():
+        member.future.set_result(results)
+
+
+def _fail(member: _Member, error: BaseException) -> None:
+    if member.future.done():
+        return
+    if isinstance(error, asyncio.CancelledError):
+        member.future.cancel()
+    else:
+        member.future.set_exception(error)
+
+
+def get_scan_coalescer(request: Request = TaskiqDepends()) -> ScanCoalescer:
+    """
+    Get the scan coalescer of the current worker.
+
+    :param request: current request.
+    :return: scan coalescer.
+    """
+    return request.app.state.scan_coalescer
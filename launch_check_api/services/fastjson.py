@@ -0,0 +1,40 @@
+"""
+JSON encoding shared by the Nuclei parser, the database and the API.
+
+Uses orjson, which produces compact UTF-8 JSON.
+"""
+
+from typing import Any, Union
+
+import orjson
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON.
+
+    :param value: JSON compatible value.
+    :return: encoded document.
+    """
+    return orjson.dumps(value)
+
+
+def dumps_str(value: Any) -> str:
+    """
+    Encode a value as compact JSON text, e.g. for SQLAlchemy JSON columns.
+
+    :param value: JSON compatible value.
+    :return: encoded document.
+    """
+    return dumps(value).decode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON document.
+
+    :param data: encoded document.
+    :raises ValueError: if the document is not valid JSON.
+    :return: decoded value.
+    """
+    return orjson.loads(data)
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Protocol
+
+import zstandard
+
+from launch_check_api.services import fastjson
+from launch_check_api.services.nuclei import Finding
+from launch_check_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ZSTD = "zstd"
+# Codec of archives written before zstandard was required, only read.
+GZIP = "gzip"
+
+# Compressed archives up to this size are kept in memory while written.
+SPOOL_SIZE = 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+class FindingsStoreError(Exception):
+    """Raised when a stored findings payload can't be read."""
+
+
+class FindingsArchive:
+    """
+    Raw Nuclei findings of a scan, compressed while they are written.
+
+    Findings are written as JSON lines through a streaming compressor into
+    a spooled temporary file, so the uncompressed payload never has to be
+    held in memory. Archives are compressed with zstd.
+    """
+
+    def __init__(self) -> None:
+        self.codec = ZSTD
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        self._file: IO[bytes] = tempfile.SpooledTemporaryFile(
+            max_size=SPOOL_SIZE,
+        )
+        self._digest = hashlib.sha256()
+        self.count = 0
+        self.size = 0
+
+    def write(self, findings: List[Finding]) -> None:
+        """
+        Append findings to the archive, as Nuclei wrote them.
+
+        :param findings: decoded Nuclei findings.
+        """
+        self.write_raw([finding.raw for finding in findings])
+
+    def write_lines(self, lines: List[str]) -> None:
+        """
+        Append records that are already serialized.
+
+        :param lines: JSON documents, without line breaks.
+        """
+        self.write_raw([line.encode() for line in lines])
+
+    def write_raw(self, lines: List[bytes]) -> None:
+        """
+        Append encoded records.
+
+        :param lines: UTF-8 JSON documents, without line breaks.
+        """
+        if not lines:
+            return
+        raw = b"\n".join(lines) + b"\n"
+        self._append(self._compressor.compress(raw))
+        self.count += len(lines)
+
+    def finish(self) -> IO[bytes]:
+        """
+        Flush the compressor.
+
+        :return: file with the compressed payload, positioned at its start.
+        """
+        self._append(self._compressor.flush())
+        self._file.seek(0)
+        return self._file
+
+    @property
+    def checksum(self) -> str:
+        """SHA-256 of the compressed payload written so far."""
+        return self._digest.hexdigest()
+
+    def close(self) -> None:
+        """Discard the archive."""
+        self._file.close()
+
+    def _append(self, data: bytes) -> None:
+        if data:
+            self._file.write(data)
+            self._digest.update(data)
+            self.size += len(data)
+
+
+class BlobBackend(Protocol):
+    """Storage for offloaded findings payloads."""
+
+    async def put(self, key: str, source: IO[bytes]) -> None:
+        """Store a blob."""
+
+    async def get(self, key: str) -> bytes:
+        """Read a blob."""
+
+    async def delete(self, key: str) -> None:
+        """Remove a blob."""
+
+
+class LocalBlobBackend:
+    """Stores blobs as files below a directory."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise FindingsStoreError(f"Invalid blob key: {key}")
+        return path
+
+    async def put(self, key: str, source: IO[bytes]) -> None:
+        """
+        Store a blob, replacing an existing one atomically.
+
+        :param key: relative key of the blob.
+        :param source: readable file with the payload.
+        """
+        await asyncio.to_thread(self._put, self._path(key), source)
+
+    async def get(self, key: str) -> bytes:
+        """
+        Read a blob.
+
+        :param key: relative key of the blob.
+        :return: payload.
+        """
+        return await asyncio.to_thread(self._path(key).read_bytes)
+
+    async def delete(self, key: str) -> None:
+        """
+        Remove a blob if it exists.
+
+        :param key: relative key of the blob.
+        """
+        await asyncio.to_thread(self._path(key).unlink, True)
+
+    @staticmethod
+    def _put(path: Path, source: IO[bytes]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.tmp")
+        with temporary.open("wb") as target:
+            while chunk := source.read(CHUNK_SIZE):
+                target.write(chunk)
+            target.flush()
+            os.fsync(target.fileno())
+        temporary.replace(path)
+
+
+class FindingsStore:
+    """
+    Keeps compressed raw findings of scans.
+
+    Payloads up to ``inline_max_size`` compressed bytes are stored in the
+    scan row, larger ones are offloaded to the blob backend and the row
+    only keeps their key. Rows always keep codec and checksum, so loading
+    verifies the payload.
+    """
+
+    def __init__(self, backend: BlobBackend, inline_max_size: int) -> None:
+        self.backend = backend
+        self.inline_max_size = inline_max_size
+
+    async def save(self, scan_id: int, archive: FindingsArchive) -> Dict[str, Any]:
+        """
+        Store a finished archive.
+
+        :param scan_id: id of the scan.
+        :param archive: archive with the findings of the scan.
+        :return: scan columns pointing to the stored payload.
+        """
+        payload = archive.finish()
+        columns: Dict[str, Any] = {
+            "findings_codec": archive.codec,
+            "findings_checksum": archive.checksum,
+            "findings_size": archive.size,
+            "findings_data": None,
+            "findings_location": None,
+        }
+        if archive.size <= self.inline_max_size:
+            columns["findings_data"] = payload.read()
+        else:
+            key = f"scans/{scan_id // 1000}/{scan_id}.jsonl.{archive.codec}"
+            await self.backend.put(key, payload)
+            columns["findings_location"] = key
+            logger.info(
+                "Offloaded %d bytes of findings of scan %d",
+                archive.size,
+                scan_id,
+            )
+        return columns
+
+    async def load(
+        self,
+        codec: str,
+        checksum: str,
+        data: Optional[bytes] = None,
+        location: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Load and decompress stored findings.
+
+        :param codec: compression of the payload.
+        :param checksum: expected SHA-256 of the compressed payload.
+        :param data: payload stored in the row.
+        :param location: key of the offloaded payload.
+        :raises FindingsStoreError: if the payload is missing or corrupted.
+        :return: raw findings.
+        """
+        if data is None:
+            if location is None:
+                raise FindingsStoreError("Findings payload is missing")
+            try:
+                data = await self.backend.get(location)
+            except OSError as exc:
+                raise FindingsStoreError(f"Failed to read {location}") from exc
+
+        if hashlib.sha256(data).hexdigest() != checksum:
+            raise FindingsStoreError("Findings payload checksum mismatch")
+
+        raw = await asyncio.to_thread(_decompress, codec, data)
+        return [fastjson.loads(line) for line in raw.splitlines() if line]
+
+    async def delete(self, location: Optional[str]) -> None:
+        """
+        Remove an offloaded payload.
+
+        :param location: key of the payload, nothing is done for None.
+        """
+        if location:
+            await self.backend.delete(location)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == GZIP:
+        return zlib.decompress(data, 31)
+    if codec == ZSTD:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    raise FindingsStoreError(f"Unknown findings codec: {codec}")
+
+
+@lru_cache(maxsize=1)
+def get_findings_store() -> FindingsStore:
+    """
+    Get the findings store configured in settings.
+
+    :return: findings store.
+    """
+    return FindingsStore(
+        LocalBlobBackend(settings.findings_blob_dir),
+        inline_max_size=settings.findings_inline_max_size,
+    )
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, List
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from taskiq import TaskiqDepends
+
+from launch_check_api.services.redis.dependency import get_redis_pool
+from launch_check_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# KEYS: shares hash (scan id -> rate), leases sorted set (scan id -> expiry)
+# ARGV: scan id, requested rate, budget, minimal share, now, lease expiry, key ttl
+ACQUIRE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[5])
+for _, scan_id in ipairs(expired) do
+    redis.call('HDEL', KEYS[1], scan_id)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[5])
+redis.call('HDEL', KEYS[1], ARGV[1])
+
+local shares = redis.call('HVALS', KEYS[1])
+local used = 0
+for _, rate in ipairs(shares) do
+    used = used + tonumber(rate)
+end
+
+local requested = tonumber(ARGV[2])
+local budget = tonumber(ARGV[3])
+local fair = math.floor(budget / (#shares + 1))
+local share = math.min(requested, fair, budget - used)
+if share < math.min(requested, tonumber(ARGV[4])) then
+    return 0
+end
+
+redis.call('HSET', KEYS[1], ARGV[1], share)
+redis.call('ZADD', KEYS[2], ARGV[6], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+redis.call('EXPIRE', KEYS[2], ARGV[7])
+return share
+"""
+
+# KEYS: shares hash, leases sorted set
+# ARGV: scan id, lease expiry, key ttl
+REFRESH_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+# Longest pause between two attempts to get a share of a busy host.
+MAX_RETRY_INTERVAL = 5.0
+
+
+class HostRateLimiter:
+    """
+    Shares a per-host request budget between scans on all workers.
+
+    Every running scan holds a lease on a share of its host's
+    ``host_rate_budget`` in Redis. A new scan gets an equal split of the
+    budget between itself and the scans already running, limited to what
+    they leave unused, and waits while that is less than
+    ``host_rate_min_share``. Nuclei can't change its rate limit while it
+    runs, so a share is fixed when its scan starts and never split again:
+    budget released by finished scans only goes to the scans that start
+    after them. Leases expire if a worker dies without releasing them.
+    """
+
+    def __init__(
+        self,
+        redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+    ) -> None:
+        self.redis_pool = redis_pool
+        self.budget = settings.host_rate_budget
+        self.min_share = settings.host_rate_min_share
+        self.lease_ttl = settings.host_rate_lease_ttl
+
+    @staticmethod
+    def _keys(host: str) -> List[str]:
+        # Hash tag keeps both keys of a host on one cluster slot.
+        prefix = f"launch_check:host_rate:{{{host}}}"
+        return [f"{prefix}:shares", f"{prefix}:leases"]
+
+    async def _acquire(self, redis: Redis, host: str, scan_id: int, rate: int) -> int:
+        """Wait until the host has a share for the scan and take it."""
+        acquire = redis.register_script(ACQUIRE_SCRIPT)
+        interval = 0.5
+        while True:
+            now = time.time()
+            share = int(
+                await acquire(
+                    keys=self._keys(host),
+                    args=[
+                        scan_id,
+                        rate,
+                        self.budget,
+                        self.min_share,
+                        now,
+                        now + self.lease_ttl,
+                        self.lease_ttl * 2,
+                    ],
+                ),
+            )
+            if share:
+                return share
+            logger.info(
+                "Rate budget of %s is taken by other scans, scan %d waits",
+                host,
+                scan_id,
+            )
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, MAX_RETRY_INTERVAL)
+
+    async def _heartbeat(self, redis: Redis, host: str, scan_id: int) -> None:
+        """Keep the lease of a running scan alive."""
+        refresh = redis.register_script(REFRESH_SCRIPT)
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                alive = await refresh(
+                    keys=self._keys(host),
+                    args=[scan_id, time.time() + self.lease_ttl, self.lease_ttl * 2],
+                )
+            except RedisError as error:
+                logger.warning(
+                    "Failed to refresh the rate lease of scan %d on %s: %s",
+                    scan_id,
+                    host,
+                    error,
+                )
+                continue
+            if not alive:
+                logger.warning(
+                    "Rate lease of scan %d on %s expired, "
+                    "its share may be given to other scans",
+                    scan_id,
+                    host,
+                )
+
+    @asynccontextmanager
+    async def lease(self, host: str, scan_id: int, rate: int) -> AsyncIterator[int]:
+        """
+        Hold a share of the host's rate budget.
+
+        :param host: host that is going to be scanned.
+        :param scan_id: id of the scan.
+        :param rate: requested requests per second.
+        :yields: requests per second the scan may use.
+        """
+        if self.budget <= 0:
+            yield rate
+            return
+
+        async with Redis(connection_pool=self.redis_pool) as redis:
+            share = await self._acquire(redis, host, scan_id, rate)
+            heartbeat = asyncio.create_task(self._heartbeat(redis, host, scan_id))
+            try:
+                yield share
+            finally:
+                heartbeat.cancel()
+                with suppress(asyncio.CancelledError):
+                    await heartbeat
+                shares_key, leases_key = self._keys(host)
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.hdel(shares_key, str(scan_id))
+                    pipe.zrem(leases_key, str(scan_id))
+                    await pipe.execute()
@@ -0,0 +1,165 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import Iterator, Mapping
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+)
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.registry import Collector
+
+# Scans run from seconds to hours.
+SCAN_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400)
+MEMORY_BUCKETS = tuple(2**power * 1024 * 1024 for power in range(5, 14))
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+http_request_duration = Histogram(
+    "launch_check_http_request_duration_seconds",
+    "Latency of API requests by route",
+    ["method", "route", "status"],
+)
+
+nuclei_wall_time = Histogram(
+    "launch_check_nuclei_wall_seconds",
+    "Wall time of Nuclei processes",
+    buckets=SCAN_BUCKETS,
+)
+nuclei_cpu_time = Histogram(
+    "launch_check_nuclei_cpu_seconds",
+    "User and system CPU time of Nuclei processes",
+    buckets=SCAN_BUCKETS,
+)
+nuclei_peak_rss = Histogram(
+    "launch_check_nuclei_peak_rss_bytes",
+    "Peak resident memory of Nuclei processes",
+    buckets=MEMORY_BUCKETS,
+)
+nuclei_running = Gauge(
+    "launch_check_nuclei_running",
+    "Nuclei processes currently running",
+    multiprocess_mode="livesum",
+)
+scan_status_changes = Counter(
+    "launch_check_scan_status_changes",
+    "Scans that entered each status, use increase() for scans per status",
+    ["status"],
+)
+findings_ingested = Counter(
+    "launch_check_findings_ingested",
+    "Findings stored, use rate() for findings per second",
+)
+
+db_pool_checkout_wait = Histogram(
+    "launch_check_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    buckets=CHECKOUT_BUCKETS,
+)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    Registry with the metrics of all processes of this service.
+
+    With PROMETHEUS_MULTIPROC_DIR set, gunicorn and taskiq worker
+    processes write their metrics to files there, which are merged at
+    scrape time. Otherwise the metrics of this process are returned.
+
+    :return: registry to expose.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+
+class SnapshotCollector(Collector):
+    """Exposes gauge values read right before a scrape."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Metric] = []
+
+    def add(
+        self,
+        name: str,
+        documentation: str,
+        label: str,
+        values: Mapping[str, float],
+    ) -> None:
+        """
+        Add a gauge with one sample per label value.
+
+        :param name: metric name.
+        :param documentation: help text.
+        :param label: name of the label.
+        :param values: value of each label value.
+        """
+        gauge = GaugeMetricFamily(name, documentation, labels=[label])
+        for label_value, value in values.items():
+            gauge.add_metric([label_value], value)
+        self._metrics.append(gauge)
+
+    def collect(self) -> Iterator[Metric]:
+        """Yield the added gauges."""
+        yield from self._metrics
+
+
+class ProcessMonitor:
+    """
+    Samples CPU time and peak memory of a child process from /proc.
+
+    The process is sampled every ``interval`` seconds until the monitor
+    is cancelled, so up to one interval of CPU time before the process
+    exits is missed. Nothing is recorded where /proc is not available.
+    """
+
+    clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def __init__(self, pid: int, interval: float = 1.0) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.sampled = False
+        self.cpu_seconds = 0.0
+        self.peak_rss = 0
+
+    def sample(self) -> None:
+        """Read the current CPU time and peak RSS of the process."""
+        proc = Path("/proc") / str(self.pid)
+        try:
+            # Fields after the parenthesized command start with the state
+            # (field 3), utime and stime are fields 14 and 15.
+            fields = (proc / "stat").read_text().rsplit(")", 1)[1].split()
+            self.cpu_seconds = (int(fields[11]) + int(fields[12])) / self.clock_ticks
+            with (proc / "status").open() as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        peak = int(line.split()[1]) * 1024
+                        self.peak_rss = max(self.peak_rss, peak)
+                        break
+        except (OSError, ValueError, IndexError):
+            return
+        self.sampled = True
+
+    async def run(self) -> None:
+        """Sample the process until cancelled."""
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def record(self, wall_seconds: float) -> None:
+        """
+        Record the samples in the Nuclei process metrics.
+
+        :param wall_seconds: wall time of the process.
+        """
+        nuclei_wall_time.observe(wall_seconds)
+        if self.sampled:
+            nuclei_cpu_time.observe(self.cpu_seconds)
+            if self.peak_rss:
+                nuclei_peak_rss.observe(self.peak_rss)
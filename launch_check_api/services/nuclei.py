@@ -1,15 +1,177 @@
 import asyncio
-import json
+import contextlib
 import logging
+import os
 import shutil
+import signal
+import tempfile
+import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+)
+from urllib.parse import urlsplit
+
+from launch_check_api.db.models.constants import SEVERITIES
+from launch_check_api.services import fastjson
+from launch_check_api.services.metrics import ProcessMonitor, nuclei_running
 
 logger = logging.getLogger(__name__)
 
+# Nuclei JSONL lines embed the raw request/response, so they can get
+# much longer than asyncio's default 64 KiB line limit.
+MAX_LINE_SIZE = 16 * 1024 * 1024
+# Number of findings handed to a sink at once.
+DEFAULT_BATCH_SIZE = 500
+# Only the tail of stderr is kept; it ends up in a 1000 character column.
+MAX_WARNINGS_LENGTH = 1000
+
+# Seconds between two progress reports of a running Nuclei process.
+STATS_INTERVAL = 2
+
+FindingSink = Callable[[List["Finding"]], Awaitable[None]]
+StatsSink = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Result statuses of a scan stopped before Nuclei finished.
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+
+
 class NucleiError(Exception):
     """Custom exception for Nuclei-related errors"""
 
+
+class ScanControl:
+    """
+    Stops a running Nuclei process early.
+
+    The process is killed once it ran for ``max_duration`` seconds or when
+    ``cancel`` is called, whichever comes first. Findings read until then
+    are kept and the scan results get ``reason`` as their status, which
+    stays None when the process finished on its own.
+    """
+
+    def __init__(self, max_duration: Optional[float] = None) -> None:
+        self.max_duration = max_duration
+        self.reason: Optional[str] = None
+        self._cancelled = asyncio.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel was called."""
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Request the scan to stop."""
+        self._cancelled.set()
+
+    async def wait_cancelled(self) -> None:
+        """Wait until cancel is called."""
+        await self._cancelled.wait()
+
+    async def wait(self) -> str:
+        """
+        Wait until the process has to be stopped.
+
+        Returns:
+            Why the process has to be stopped, CANCELLED or TIMED_OUT
+        """
+        try:
+            await asyncio.wait_for(self._cancelled.wait(), self.max_duration)
+        except asyncio.TimeoutError:
+            return TIMED_OUT
+        return CANCELLED
+
+
+class Finding:
+    """
+    A Nuclei finding reduced to the fields the API works with.
+
+    The JSONL line it was decoded from is kept in ``raw`` and archived as
+    is, so the full payload with requests and responses is never encoded
+    again. Text fields are None when Nuclei left them out or empty.
+    """
+
+    __slots__ = (
+        "template_id",
+        "name",
+        "severity",
+        "matcher_name",
+        "host",
+        "url",
+        "matched_at",
+        "extracted_results",
+        "raw",
+    )
+
+    def __init__(
+        self,
+        template_id: Optional[str],
+        severity: str,
+        raw: bytes,
+        name: Optional[str] = None,
+        matcher_name: Optional[str] = None,
+        host: Optional[str] = None,
+        url: Optional[str] = None,
+        matched_at: Optional[str] = None,
+        extracted_results: Optional[List[Any]] = None,
+    ) -> None:
+        self.template_id = template_id
+        # Lowercased, empty if the finding has none
+        self.severity = severity
+        self.raw = raw
+        self.name = name
+        self.matcher_name = matcher_name
+        self.host = host
+        self.url = url
+        self.matched_at = matched_at
+        self.extracted_results = extracted_results
+
+    @classmethod
+    def from_dict(
+        cls,
+        output: Dict[str, Any],
+        raw: Optional[bytes] = None,
+    ) -> "Finding":
+        """
+        Build a finding from a decoded Nuclei JSONL line.
+
+        Args:
+            output: Decoded line
+            raw: The line itself, encoded again from ``output`` if missing
+
+        Returns:
+            Finding
+        """
+        info = output.get("info")
+        if not isinstance(info, dict):
+            info = {}
+        extracted = output.get("extracted-results")
+        return cls(
+            template_id=_text(output.get("template-id")),
+            severity=(_text(info.get("severity")) or "").lower(),
+            raw=raw if raw is not None else fastjson.dumps(output),
+            name=_text(info.get("name")),
+            matcher_name=_text(output.get("matcher-name")),
+            host=_text(output.get("host")),
+            url=_text(output.get("url")),
+            matched_at=_text(output.get("matched-at")),
+            extracted_results=extracted if isinstance(extracted, list) else None,
+        )
+
+    def __repr__(self) -> str:
+        """String representation of the finding."""
+        return f"<Finding(template={self.template_id}, severity={self.severity})>"
+
+
 class NucleiService:
     def __init__(self):
         self.nuclei_path = shutil.which("nuclei")
@@ -22,13 +184,200 @@ class NucleiService:
         """
         try:
             process = await asyncio.create_subprocess_exec(
-                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
             stdout, stderr = await process.communicate()
             return stdout.decode(), stderr.decode()
         except Exception as e:
             raise NucleiError(f"Failed to execute Nuclei command: {e!s}")
 
+    async def _drain_stderr(
+        self,
+        stream: asyncio.StreamReader,
+        tail: Deque[str],
+        on_stats: Optional[StatsSink] = None,
+    ) -> None:
+        """
+        Read stderr until EOF keeping only its last lines.
+
+        Nuclei writes progress and warnings to stderr. The pipe has to be
+        drained while stdout is consumed, otherwise the process blocks once
+        the pipe buffer is full. JSON stats lines are passed to ``on_stats``
+        instead of being kept as warnings.
+        """
+        async for line in stream:
+            decoded = line.decode(errors="replace").rstrip()
+            if not decoded:
+                continue
+            if decoded.startswith("{"):
+                try:
+                    stats = fastjson.loads(decoded)
+                except ValueError:
+                    stats = None
+                if _is_stats(stats):
+                    await self._report_stats(stats, on_stats)
+                    continue
+            tail.append(decoded)
+
+    async def _report_stats(
+        self,
+        stats: Dict[str, Any],
+        on_stats: Optional[StatsSink],
+    ) -> None:
+        """Pass stats to ``on_stats``, progress reports never fail a scan."""
+        if on_stats is None:
+            return
+        try:
+            await on_stats(stats)
+        except Exception:
+            logger.warning("Failed to report Nuclei stats", exc_info=True)
+
+    async def stream_findings(
+        self,
+        command: List[str],
+        warnings: Optional[Deque[str]] = None,
+        on_stats: Optional[StatsSink] = None,
+        control: Optional[ScanControl] = None,
+    ) -> AsyncIterator[Finding]:
+        """
+        Run a Nuclei command and yield findings as they are written.
+
+        Nuclei runs in its own process group, which is killed as a whole
+        when ``control`` stops the scan or the caller stops iterating, so
+        no child process outlives the scan. Findings written until then
+        are still yielded.
+
+        Args:
+            command: Full Nuclei command line, it must include ``-j``
+            warnings: Optional deque collecting the tail of stderr
+            on_stats: Optional coroutine receiving ``-sj`` stats lines
+            control: Optional deadline and cancellation of the process
+
+        Yields:
+            Decoded JSONL findings, one at a time
+        """
+        if warnings is None:
+            warnings = deque(maxlen=50)
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=MAX_LINE_SIZE,
+                start_new_session=True,
+            )
+        except Exception as e:
+            raise NucleiError(f"Failed to execute Nuclei command: {e!s}") from e
+
+        started = time.monotonic()
+        nuclei_running.inc()
+        monitor = ProcessMonitor(process.pid)
+        monitor_task = asyncio.create_task(monitor.run())
+        stderr_task = asyncio.create_task(
+            self._drain_stderr(
+                process.stderr,  # type: ignore[arg-type]
+                warnings,
+                on_stats,
+            ),
+        )
+        watchdog = (
+            asyncio.create_task(self._stop_when_asked(process, control))
+            if control is not None
+            else None
+        )
+        try:
+            async for line in process.stdout:  # type: ignore[union-attr]
+                raw = line.strip()
+                output = _decode_line(raw)
+                if output is None:
+                    continue
+                if _is_stats(output):
+                    await self._report_stats(output, on_stats)
+                else:
+                    yield Finding.from_dict(output, raw)
+            # Last sample while the process is exiting.
+            monitor.sample()
+            await process.wait()
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            if process.returncode is None:
+                _kill_process_group(process)
+                await process.wait()
+            await stderr_task
+            monitor_task.cancel()
+            nuclei_running.dec()
+            monitor.record(time.monotonic() - started)
+
+        if control is not None and control.reason is not None:
+            return
+        if process.returncode:
+            logger.warning("Nuclei exited with code %d", process.returncode)
+
+    async def _stop_when_asked(
+        self,
+        process: asyncio.subprocess.Process,
+        control: ScanControl,
+    ) -> None:
+        """Kill the process group once ``control`` stops the scan."""
+        reason = await control.wait()
+        if process.returncode is None:
+            logger.warning("Stopping Nuclei process %d: %s", process.pid, reason)
+            control.reason = reason
+            _kill_process_group(process)
+
+    def _build_command(
+        self,
+        target_args: List[str],
+        severity: Optional[List[str]],
+        templates: Optional[List[str]],
+        output_file: Optional[str],
+        rate_limit: int,
+        timeout: int,
+        templates_dir: Optional[str] = None,
+        stats: bool = False,
+    ) -> List[str]:
+        """
+        Build Nuclei command line for ``-target`` or ``-list`` arguments.
+
+        With a templates directory, relative template paths are resolved
+        against it, all of its templates are used when no templates are
+        given, and Nuclei's own update check is disabled.
+        """
+        command = [
+            self.nuclei_path,
+            *target_args,
+            "-j",
+            "-rate-limit",
+            str(rate_limit),
+            "-timeout",
+            str(timeout),
+        ]
+
+        if severity:
+            command.extend(["-severity", ",".join(severity)])
+
+        if templates_dir:
+            templates = [
+                os.path.join(templates_dir, template)  # noqa: PTH118
+                for template in templates or [""]
+            ]
+            command.append("-duc")
+
+        if templates:
+            command.extend(["-t", ",".join(templates)])
+
+        if output_file:
+            command.extend(["-output", output_file])
+
+        if stats:
+            command.extend(["-stats", "-sj", "-si", str(STATS_INTERVAL)])
+
+        return command
+
     async def scan_target(
         self,
         target: str,
@@ -37,17 +386,34 @@ class NucleiService:
         output_file: Optional[str] = None,
         rate_limit: int = 150,
         timeout: int = 5,
-    ) -> Dict[str, Union[str, List[Dict]]]:
+        sink: Optional[FindingSink] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        templates_dir: Optional[str] = None,
+        on_progress: Optional[StatsSink] = None,
+        control: Optional[ScanControl] = None,
+    ) -> Dict[str, Any]:
         """
         Scan a target URL using Nuclei
 
+        When a sink is given, findings are passed to it in batches of at
+        most ``batch_size`` while Nuclei is still running and are not kept
+        in the returned dict, so memory stays flat regardless of the number
+        of findings. A scan stopped by ``control`` returns the findings
+        read until then with a "cancelled" or "timed_out" status.
+
         Args:
             target: URL to scan
             severity: List of severities to scan for (info, low, medium, high, critical)
             templates: List of specific template paths to use
             output_file: Path to save JSON results
             rate_limit: Number of requests per second
-            timeout: Timeout for each template execution in minutes
+            timeout: Seconds to wait for each request, passed as -timeout
+            sink: Optional coroutine receiving batches of findings
+            batch_size: Maximum number of findings per sink call
+            templates_dir: Template version directory to scan with
+            on_progress: Optional coroutine receiving progress reports,
+                see scan_progress
+            control: Optional deadline and cancellation of the scan
 
         Returns:
             Dict containing scan results and metadata
@@ -55,66 +421,140 @@ class NucleiService:
         if not target.startswith(("http://", "https://")):
             raise NucleiError("Target URL must start with http:// or https://")
 
-        command = [
-            self.nuclei_path,
-            "-target",
-            target,
-            "-j",
-            "-rate-limit",
-            str(rate_limit),
-            "-timeout",
-            str(timeout),
-        ]
+        command = self._build_command(
+            ["-target", target],
+            severity,
+            templates,
+            output_file,
+            rate_limit,
+            timeout,
+            templates_dir,
+            stats=on_progress is not None,
+        )
 
-        if severity:
-            command.extend(["-severity", ",".join(severity)])
+        try:
+            warnings: Deque[str] = deque(maxlen=50)
+            collector = _TargetResults(target, sink, batch_size)
+            on_stats = _progress_reporter([collector], [on_progress])
+            async for finding in self.stream_findings(
+                command,
+                warnings,
+                on_stats,
+                control,
+            ):
+                await collector.add(finding)
+            await collector.flush()
+            return collector.results(warnings, _stop_reason(control))
 
-        if templates:
-            command.extend(["-t", ",".join(templates)])
+        except NucleiError:
+            raise
+        except Exception as e:
+            raise NucleiError(f"Scan failed: {e!s}") from e
 
-        if output_file:
-            command.extend(["-output", output_file])
+    async def scan_targets(
+        self,
+        targets: List[str],
+        sinks: List[FindingSink],
+        severity: Optional[List[str]] = None,
+        templates: Optional[List[str]] = None,
+        rate_limit: int = 150,
+        timeout: int = 5,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        templates_dir: Optional[str] = None,
+        on_progress: Optional[List[Optional[StatsSink]]] = None,
+        control: Optional[ScanControl] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Scan several target URLs with a single Nuclei process.
+
+        Targets are passed with ``-list``, so templates are loaded once for
+        all of them. Every finding is routed back to the target it belongs
+        to using its ``url``, ``host`` and ``matched-at`` fields and handed
+        to that target's sink.
+
+        Args:
+            targets: URLs to scan, without duplicates
+            sinks: Coroutine receiving batches of findings of each target
+            severity: List of severities to scan for (info, low, medium, high, critical)
+            templates: List of specific template paths to use
+            rate_limit: Number of requests per second of the whole process
+            timeout: Seconds to wait for each request, passed as -timeout
+            batch_size: Maximum number of findings per sink call
+            templates_dir: Template version directory to scan with
+            on_progress: Optional coroutine receiving progress reports of
+                each target, see scan_progress
+            control: Optional deadline and cancellation of the process
+
+        Returns:
+            Results of each target, in the order of ``targets``
+        """
+        for target in targets:
+            if not target.startswith(("http://", "https://")):
+                raise NucleiError("Target URL must start with http:// or https://")
 
         try:
-            stdout, stderr = await self._run_command(command)
+            with tempfile.NamedTemporaryFile("w", suffix=".txt") as target_list:
+                target_list.write("\n".join(targets))
+                target_list.flush()
+                command = self._build_command(
+                    ["-list", target_list.name],
+                    severity,
+                    templates,
+                    None,
+                    rate_limit,
+                    timeout,
+                    templates_dir,
+                    stats=any(on_progress or ()),
+                )
+
+                warnings: Deque[str] = deque(maxlen=50)
+                matcher = _TargetMatcher(targets)
+                collectors = [
+                    _TargetResults(target, sink, batch_size)
+                    for target, sink in zip(targets, sinks)
+                ]
+                on_stats = _progress_reporter(collectors, on_progress or [])
+                async for finding in self.stream_findings(
+                    command,
+                    warnings,
+                    on_stats,
+                    control,
+                ):
+                    index = matcher.match(finding)
+                    if index is None:
+                        logger.warning(
+                            "Dropping finding not matching any target: %s",
+                            finding.matched_at or finding.host,
+                        )
+                        continue
+                    await collectors[index].add(finding)
 
-            results = []
-            print(stdout)
-            for line in stdout.splitlines():
-                if line.strip():
-                    try:
-                        result = json.loads(line)
-                        results.append(result)
-                    except json.JSONDecodeError:
-                        logger.warning(f"Failed to parse Nuclei output line: {line}")
-
-            scan_results = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "target": target,
-                "status": "completed",
-                "total_findings": len(results),
-                "findings": results,
-            }
-
-            if stderr:
-                scan_results["warnings"] = stderr
-
-            return scan_results
+            for collector in collectors:
+                await collector.flush()
+            status = _stop_reason(control)
+            return [collector.results(warnings, status) for collector in collectors]
 
+        except NucleiError:
+            raise
         except Exception as e:
             raise NucleiError(f"Scan failed: {e!s}")
 
-    async def update_templates(self) -> bool:
+    async def update_templates(self, template_dir: Optional[str] = None) -> bool:
         """
         Update Nuclei templates to the latest version
 
+        Args:
+            template_dir: Directory to install the templates into instead
+                of Nuclei's default one
+
         Returns:
             bool: True if update was successful
         """
+        command = [self.nuclei_path, "-update-templates"]
+        if template_dir:
+            command.extend(["-update-template-dir", template_dir])
         try:
-            stdout, stderr = await self._run_command(
-                [self.nuclei_path, "-update-templates"],
-            )
+            stdout, stderr = await self._run_command(command)
             return "Successfully updated nuclei-templates" in stdout
         except Exception as e:
             raise NucleiError(f"Failed to update templates: {e!s}")
@@ -124,17 +564,210 @@ class NucleiService:
         """
         Count findings by severity level
 
+        Counts are aggregated while the output is parsed, so results from
+        ``scan_target`` are not iterated again.
+
         Args:
             results: Scan results dictionary
 
         Returns:
             Dict containing count of findings by severity
         """
-        severity_count = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
+        if "severity_count" in results:
+            return dict(results["severity_count"])
+
+        severity_count = dict.fromkeys(SEVERITIES, 0)
 
         for finding in results.get("findings", []):
-            severity = finding.get("info", {}).get("severity", "").lower()
-            if severity in severity_count:
-                severity_count[severity] += 1
+            if finding.severity in severity_count:
+                severity_count[finding.severity] += 1
 
         return severity_count
+
+
+def scan_progress(stats: Dict[str, Any], findings: int) -> Dict[str, Any]:
+    """
+    Progress report built from a Nuclei ``-sj`` stats line.
+
+    Nuclei reports all numbers as strings and counts the requests of the
+    whole process, so with several targets percent and RPS are shared.
+
+    Args:
+        stats: Parsed stats line
+        findings: Findings of the target so far
+
+    Returns:
+        Dict with percent, requests, total, rps, duration and findings
+    """
+
+    def number(key: str) -> float:
+        try:
+            return float(stats.get(key) or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    return {
+        "percent": int(number("percent")),
+        "requests": int(number("requests")),
+        "total": int(number("total")),
+        "rps": round(number("rps"), 1),
+        "duration": str(stats.get("duration") or ""),
+        "findings": findings,
+    }
+
+
+def _decode_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """Decode a JSONL line of Nuclei, None for blank or invalid lines."""
+    if not line:
+        return None
+    try:
+        output = fastjson.loads(line)
+    except ValueError:
+        output = None
+    if not isinstance(output, dict):
+        logger.warning(
+            "Failed to parse Nuclei output line: %.200s",
+            line.decode(errors="replace"),
+        )
+        return None
+    return output
+
+
+def _is_stats(output: Any) -> bool:
+    """Whether a JSON line is a stats line rather than a finding."""
+    return (
+        isinstance(output, dict) and "percent" in output and "template-id" not in output
+    )
+
+
+def _progress_reporter(
+    collectors: List["_TargetResults"],
+    sinks: List[Optional[StatsSink]],
+) -> Optional[StatsSink]:
+    """Stats sink forwarding a progress report to every target."""
+    if not any(sinks):
+        return None
+
+    async def report(stats: Dict[str, Any]) -> None:
+        for collector, sink in zip(collectors, sinks):
+            if sink is not None:
+                await sink(scan_progress(stats, collector.total_findings))
+
+    return report
+
+
+def _stop_reason(control: Optional[ScanControl]) -> str:
+    """Result status of a finished scan."""
+    if control is None or control.reason is None:
+        return "completed"
+    return control.reason
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """Kill a process started with ``start_new_session`` and its children."""
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+class _TargetResults:
+    """Counts findings of one target and hands them to its sink in batches."""
+
+    def __init__(
+        self,
+        target: str,
+        sink: Optional[FindingSink],
+        batch_size: int,
+    ) -> None:
+        self.target = target
+        self.sink = sink
+        self.batch_size = batch_size
+        self.total_findings = 0
+        self.severity_count = dict.fromkeys(SEVERITIES, 0)
+        self.findings: List[Finding] = []
+
+    async def add(self, finding: Finding) -> None:
+        self.total_findings += 1
+        if finding.severity in self.severity_count:
+            self.severity_count[finding.severity] += 1
+        self.findings.append(finding)
+        if self.sink is not None and len(self.findings) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self.sink is not None and self.findings:
+            await self.sink(self.findings)
+            self.findings = []
+
+    def results(self, warnings: Deque[str], status: str) -> Dict[str, Any]:
+        scan_results: Dict[str, Any] = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "target": self.target,
+            "status": status,
+            "total_findings": self.total_findings,
+            "severity_count": self.severity_count,
+        }
+        if self.sink is None:
+            scan_results["findings"] = self.findings
+
+        if warnings:
+            scan_results["warnings"] = "\n".join(warnings)[-MAX_WARNINGS_LENGTH:]
+
+        return scan_results
+
+
+class _TargetMatcher:
+    """Finds which of the scanned targets a finding belongs to."""
+
+    def __init__(self, targets: List[str]) -> None:
+        self.targets = targets
+        self.exact: Dict[str, int] = {}
+        self.by_host: Dict[str, int] = {}
+        for index, target in enumerate(targets):
+            self.exact.setdefault(target, index)
+            self.exact.setdefault(target.rstrip("/"), index)
+            self.by_host.setdefault(_host(target), index)
+
+    def match(self, finding: Finding) -> Optional[int]:
+        values = [
+            value
+            for value in (finding.url, finding.host, finding.matched_at)
+            if value
+        ]
+        for value in values:
+            if value in self.exact:
+                return self.exact[value]
+            if value.rstrip("/") in self.exact:
+                return self.exact[value.rstrip("/")]
+
+        # Longest target that is a prefix of the matched URL.
+        matched_at = finding.matched_at or ""
+        best: Optional[int] = None
+        for index, target in enumerate(self.targets):
+            if matched_at.startswith(target.rstrip("/")) and (
+                best is None or len(target) > len(self.targets[best])
+            ):
+                best = index
+        if best is not None:
+            return best
+
+        for value in values:
+            if _host(value) in self.by_host:
+                return self.by_host[_host(value)]
+
+        if len(self.targets) == 1:
+            return 0
+        return None
+
+
+def _text(value: Any) -> Optional[str]:
+    """A JSON value as text, None if it is missing or empty."""
+    if value is None or value == "":
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def _host(value: str) -> str:
+    """Lowercased host of a URL or of a bare host[:port] value."""
+    if "://" not in value:
+        value = f"//{value}"
+    return (urlsplit(value).hostname or "").lower()
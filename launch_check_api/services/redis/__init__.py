@@ -0,0 +1 @@
+"""Redis service."""
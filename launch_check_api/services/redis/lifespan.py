@@ -0,0 +1,22 @@
+from fastapi import FastAPI
+from redis.asyncio import ConnectionPool
+
+from launch_check_api.settings import settings
+
+
+def init_redis(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates connection pool for redis.
+
+    :param app: current fastapi application.
+    """
+    app.state.redis_pool = ConnectionPool.from_url(settings.redis_url)
+
+
+async def shutdown_redis(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Closes redis connection pool.
+
+    :param app: current FastAPI app.
+    """
+    await app.state.redis_pool.disconnect()
@@ -0,0 +1,194 @@
+import io
+import logging
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from launch_check_api.db.dao.partition_dao import PartitionDAO
+from launch_check_api.db.partitions import (
+    add_months,
+    month_of,
+    months_between,
+    partition_name,
+)
+from launch_check_api.services.findings_store import (
+    BlobBackend,
+    FindingsArchive,
+    FindingsStore,
+)
+from launch_check_api.services.scan_cache import ScanCache
+
+logger = logging.getLogger(__name__)
+
+# Findings reference scans, so their partitions go first.
+TABLES = ("findings", "scans")
+# Advisory lock held while partitions are maintained.
+LOCK_KEY = 0x5CA4_0001
+# How long detaching and dropping partitions waits for locks before it
+# fails instead of queueing every query on the table behind it.
+LOCK_TIMEOUT = "10s"
+
+
+class ScanRetention:
+    """
+    Maintains the monthly partitions of scans and findings.
+
+    Creates partitions for the coming months and archives partitions
+    older than ``months`` months: each one is detached, exported as
+    compressed JSON lines to ``backend`` under
+    ``<table>/<partition>.jsonl.<codec>`` and dropped. Offloaded findings
+    payloads of archived scans are moved to ``backend`` as well, below
+    ``scans/<partition>/`` and cached responses of the scans are dropped
+    from ``scan_cache``. Every step can be repeated, a run that failed
+    halfway is finished by the next one. A ``months`` of 0 keeps all
+    partitions.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        backend: BlobBackend,
+        findings_store: FindingsStore,
+        scan_cache: ScanCache,
+        months: int,
+        ahead: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.backend = backend
+        self.findings_store = findings_store
+        self.scan_cache = scan_cache
+        self.months = months
+        self.ahead = ahead
+
+    async def run(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Create upcoming partitions and archive expired ones.
+
+        Does nothing while another process maintains the partitions.
+
+        :param now: current time, defaults to now.
+        :return: names of the archived partitions.
+        """
+        now = now or datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            dao = PartitionDAO(session)
+            if not await dao.try_lock(LOCK_KEY):
+                logger.info("Partitions are maintained by another process")
+                return []
+            try:
+                await self.ensure_partitions(now)
+                return await self.archive_expired(now)
+            finally:
+                await dao.unlock(LOCK_KEY)
+
+    async def ensure_partitions(self, now: datetime) -> None:
+        """
+        Create the partitions of the current and the next ``ahead`` months.
+
+        :param now: current time.
+        """
+        current = month_of(now)
+        months = list(months_between(current, add_months(current, self.ahead)))
+        for table in TABLES:
+            async with self.session_factory() as session, session.begin():
+                dao = PartitionDAO(session)
+                existing = await dao.get_partitions(table)
+                missing = [month for month in months if month not in existing]
+                if not missing:
+                    continue
+                await dao.set_lock_timeout(LOCK_TIMEOUT)
+                for month in missing:
+                    await dao.create_partition(
+                        table,
+                        partition_name(table, month),
+                        month,
+                    )
+                    logger.info("Created partition %s", partition_name(table, month))
+
+    async def archive_expired(self, now: datetime) -> List[str]:
+        """
+        Archive and drop partitions older than the retention period.
+
+        :param now: current time.
+        :return: names of the archived partitions.
+        """
+        if self.months <= 0:
+            return []
+        cutoff = add_months(month_of(now), -self.months)
+        async with self.session_factory() as session:
+            dao = PartitionDAO(session)
+            expired = sorted(
+                {
+                    month
+                    for table in TABLES
+                    for month in await dao.get_partitions(table)
+                    if month < cutoff
+                },
+            )
+        archived = []
+        for month in expired:
+            for table in TABLES:
+                if await self._archive_partition(table, month):
+                    archived.append(partition_name(table, month))
+        return archived
+
+    async def _archive_partition(self, table: str, month: date) -> bool:
+        """Detach, export and drop a partition, False if it is gone."""
+        name = partition_name(table, month)
+        async with self.session_factory() as session, session.begin():
+            dao = PartitionDAO(session)
+            partitions = await dao.get_partitions(table)
+            if month not in partitions:
+                return False
+            if partitions[month]:
+                await dao.set_lock_timeout(LOCK_TIMEOUT)
+                await dao.detach_partition(table, name)
+                logger.info("Detached partition %s", name)
+
+        if table == "scans":
+            await self._move_findings_payloads(name)
+            await self._invalidate_responses(name)
+        await self._export(table, name)
+
+        async with self.session_factory() as session, session.begin():
+            dao = PartitionDAO(session)
+            await dao.set_lock_timeout(LOCK_TIMEOUT)
+            await dao.drop_table(name)
+        logger.info("Archived and dropped partition %s", name)
+        return True
+
+    async def _export(self, table: str, name: str) -> None:
+        """Write all rows of a detached partition to the backend."""
+        archive = FindingsArchive()
+        try:
+            async with self.session_factory() as session, session.begin():
+                async for rows in PartitionDAO(session).stream_rows(name):
+                    archive.write_lines(rows)
+            await self.backend.put(
+                f"{table}/{name}.jsonl.{archive.codec}",
+                archive.finish(),
+            )
+        finally:
+            archive.close()
+        logger.info("Exported %d rows of %s", archive.count, name)
+
+    async def _move_findings_payloads(self, name: str) -> None:
+        """Move offloaded findings of archived scans next to the archive."""
+        async with self.session_factory() as session:
+            locations = await PartitionDAO(session).get_findings_locations(name)
+        for location in locations:
+            try:
+                data = await self.findings_store.backend.get(location)
+            except OSError:
+                # Moved by an earlier run that didn't finish.
+                continue
+            await self.backend.put(f"scans/{name}/{location}", io.BytesIO(data))
+            await self.findings_store.delete(location)
+
+    async def _invalidate_responses(self, name: str) -> None:
+        """Drop cached API responses of the scans of a detached partition."""
+        async with self.session_factory() as session:
+            scan_ids = await PartitionDAO(session).get_scan_ids(name)
+        for scan_id in scan_ids:
+            await self.scan_cache.invalidate(scan_id)
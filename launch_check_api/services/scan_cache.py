@@ -0,0 +1,137 @@
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from launch_check_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _responses_key(scan_id: int) -> str:
+    return f"launch_check:scan:{scan_id}:responses"
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong ETag of a response body.
+
+    :param body: serialized response.
+    :return: quoted entity tag.
+    """
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an entity tag.
+
+    Weak tags are compared by their value, as RFC 9110 asks for
+    If-None-Match.
+
+    :param if_none_match: header value, may list several tags.
+    :param etag: current entity tag.
+    :return: True if the client's copy is current.
+    """
+    if not if_none_match:
+        return False
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in tags)
+
+
+class ScanCache:
+    """
+    Serialized GET /api/scan/{scan_id} responses of finished scans.
+
+    Rows of finished scans don't change, so their responses are kept in
+    Redis for ``ttl`` seconds and shared by all API processes. Every scan
+    has one hash with an entry per selection of ``?fields``, updating or
+    deleting the scan drops the whole hash. Responses larger than
+    ``max_size`` bytes are not cached. Redis errors are logged and
+    treated as cache misses, a ``ttl`` of 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        redis_pool: ConnectionPool,
+        ttl: int,
+        max_size: int = 256 * 1024,
+    ) -> None:
+        self.redis_pool = redis_pool
+        self.ttl = ttl
+        self.max_size = max_size
+
+    async def get(self, scan_id: int, variant: str) -> Optional[bytes]:
+        """
+        Get a cached response.
+
+        :param scan_id: id of the scan.
+        :param variant: selected fields of the response.
+        :return: serialized response, None on a miss.
+        """
+        if self.ttl <= 0:
+            return None
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                body = await redis.hget(_responses_key(scan_id), variant)
+        except RedisError as error:
+            logger.warning("Failed to read cached scan %d: %s", scan_id, error)
+            return None
+        # Pools created with decode_responses return text.
+        return body.encode() if isinstance(body, str) else body
+
+    async def set(self, scan_id: int, variant: str, body: bytes) -> None:
+        """
+        Cache the response of a finished scan.
+
+        :param scan_id: id of the scan.
+        :param variant: selected fields of the response.
+        :param body: serialized response.
+        """
+        if self.ttl <= 0 or len(body) > self.max_size:
+            return
+        key = _responses_key(scan_id)
+        try:
+            async with Redis(
+                connection_pool=self.redis_pool,
+            ) as redis, redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, variant, body)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except RedisError as error:
+            logger.warning("Failed to cache scan %d: %s", scan_id, error)
+
+    async def invalidate(self, scan_id: int) -> None:
+        """
+        Drop all cached responses of a scan.
+
+        :param scan_id: id of the scan.
+        """
+        if self.ttl <= 0:
+            return
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.delete(_responses_key(scan_id))
+        except RedisError as error:
+            logger.warning(
+                "Failed to invalidate cached scan %d: %s",
+                scan_id,
+                error,
+            )
+
+
+@lru_cache(maxsize=1)
+def get_scan_cache() -> ScanCache:
+    """
+    Get the scan response cache configured in settings.
+
+    :return: scan response cache.
+    """
+    return ScanCache(
+        ConnectionPool.from_url(settings.redis_url),
+        ttl=settings.scan_response_cache_ttl,
+        max_size=settings.scan_response_cache_max_size,
+    )
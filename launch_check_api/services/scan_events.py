@@ -0,0 +1,95 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from taskiq import TaskiqDepends
+
+from launch_check_api.services.redis.dependency import get_redis_pool
+
+logger = logging.getLogger(__name__)
+
+# The last event of a scan is kept for clients connecting mid-scan.
+LAST_EVENT_TTL = 3600
+
+
+def _channel(scan_id: int) -> str:
+    return f"launch_check:scan:{scan_id}:events"
+
+
+def _last_event_key(scan_id: int) -> str:
+    return f"launch_check:scan:{scan_id}:last_event"
+
+
+class ScanEvents:
+    """
+    Live status and progress events of scans over Redis pub/sub.
+
+    Workers publish events of the scans they run, API processes subscribe
+    to the channel of a scan and forward its events to clients. Events are
+    ``{"event": "status" | "progress", "scan_id": ..., **data}`` dicts.
+    Publishing is best effort and never fails a scan.
+    """
+
+    def __init__(
+        self,
+        redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+    ) -> None:
+        self.redis_pool = redis_pool
+
+    async def publish(self, scan_id: int, event: str, **data: Any) -> None:
+        """
+        Publish an event of a scan.
+
+        :param scan_id: id of the scan.
+        :param event: event type, "status" or "progress".
+        :param data: event payload.
+        """
+        message = json.dumps({"event": event, "scan_id": scan_id, **data})
+        try:
+            async with Redis(
+                connection_pool=self.redis_pool,
+            ) as redis, redis.pipeline(transaction=False) as pipe:
+                pipe.publish(_channel(scan_id), message)
+                pipe.set(_last_event_key(scan_id), message, ex=LAST_EVENT_TTL)
+                await pipe.execute()
+        except RedisError as error:
+            logger.warning(
+                "Failed to publish %s event of scan %d: %s",
+                event,
+                scan_id,
+                error,
+            )
+
+    async def subscribe(
+        self,
+        scan_id: int,
+        timeout: float = 15,
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events of a scan as they are published.
+
+        Starts with the last published event, so clients connecting
+        mid-scan get the current progress right away. None is yielded
+        when no event arrived within ``timeout`` seconds, which lets
+        callers send keep-alives and notice closed connections.
+
+        :param scan_id: id of the scan.
+        :param timeout: seconds to wait for an event.
+        :yield: events.
+        """
+        async with Redis(
+            connection_pool=self.redis_pool,
+        ) as redis, redis.pubsub() as pubsub:
+            # Subscribe before reading the last event to not miss any.
+            await pubsub.subscribe(_channel(scan_id))
+            last = await redis.get(_last_event_key(scan_id))
+            if last:
+                yield json.loads(last)
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=timeout,
+                )
+                yield json.loads(message["data"]) if message else None
@@ -0,0 +1,136 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+
+from starlette.requests import Request
+from taskiq import TaskiqDepends
+
+logger = logging.getLogger(__name__)
+
+
+def _available_memory() -> Optional[int]:
+    """
+    Memory available for new processes in bytes.
+
+    Uses MemAvailable from /proc/meminfo and falls back to free physical
+    pages where it doesn't exist.
+    """
+    try:
+        with open("/proc/meminfo") as meminfo:  # noqa: PTH123
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def default_concurrency(process_memory_mb: int) -> int:
+    """
+    Number of Nuclei processes a worker can run at once.
+
+    It is the number of usable CPUs, lowered if the available memory
+    can't fit that many processes of ``process_memory_mb`` each.
+
+    :param process_memory_mb: expected peak memory of one Nuclei process.
+    :return: concurrency limit, at least 1.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    limit = cpus
+    memory = _available_memory()
+    if memory is not None and process_memory_mb > 0:
+        limit = min(limit, memory // (process_memory_mb * 1024 * 1024))
+    return max(1, limit)
+
+
+class NucleiScheduler:
+    """
+    Bounds the number of Nuclei processes running in a worker.
+
+    Scans past the limit wait for a free slot instead of all starting at
+    once. A freed slot goes to the waiting scan with the lowest
+    ``priority``, in arrival order among equal priorities, so interactive
+    scans don't queue behind bulk scans the worker already pulled.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.running = 0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._arrivals = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        """Number of scans waiting for a slot."""
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0) -> AsyncIterator[None]:
+        """
+        Wait for a free slot and hold it while the context is active.
+
+        :param priority: rank of the scan, lower ones get slots first.
+        """
+        if self.running < self.limit and not self._waiters:
+            self.running += 1
+        else:
+            logger.info(
+                "All %d Nuclei slots are busy, %d scans already waiting",
+                self.limit,
+                self.waiting,
+            )
+            await self._wait(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _wait(self, priority: int) -> None:
+        """Wait until a released slot is handed over."""
+        waiter = (
+            priority,
+            next(self._arrivals),
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._waiters, waiter)
+        try:
+            await waiter[2]
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            elif not waiter[2].cancelled():
+                # Cancelled right after the slot was handed over.
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        """Hand the slot to the next waiting scan or free it."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            # Skip scans cancelled while waiting that didn't resume yet.
+            if not future.done():
+                future.set_result(None)
+                return
+        self.running -= 1
+
+
+def get_nuclei_scheduler(request: Request = TaskiqDepends()) -> NucleiScheduler:
+    """
+    Get the Nuclei scheduler of the current worker.
+
+    :param request: current request.
+    :return: scheduler.
+    """
+    return request.app.state.nuclei_scheduler
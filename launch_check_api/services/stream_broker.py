@@ -0,0 +1,302 @@
+import logging
+import time
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from taskiq import (
+    AckableMessage,
+    AsyncBroker,
+    AsyncTaskiqDecoratedTask,
+    BrokerMessage,
+    TaskiqMessage,
+)
+from taskiq.labels import prepare_label
+from taskiq.utils import maybe_awaitable
+from taskiq_redis import RedisStreamBroker
+
+logger = logging.getLogger(__name__)
+
+# Messages sent to Redis in a single pipeline round trip.
+PIPELINE_SIZE = 500
+# Lane read from the broker's own queue_name stream.
+DEFAULT_LANE = "standard"
+# Seconds between two claims of messages abandoned by dead workers.
+CLAIM_INTERVAL = 30
+
+
+class ScanStreamBroker(RedisStreamBroker):
+    """
+    Redis stream broker with priority lanes.
+
+    Every lane is its own stream, ``standard`` is the broker's
+    ``queue_name`` and other lanes are ``<queue_name>:<lane>``. Messages go
+    to the lane named by their ``queue_name`` label. Workers take one
+    message at a time, walking the lanes in a smooth weighted round robin,
+    so with all lanes busy a lane with weight 8 gets 8 of every
+    ``sum(weights)`` messages and no lane with a weight starves. Empty
+    lanes are skipped. Many messages can also be enqueued at once.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        lane_weights: Optional[Mapping[str, int]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(url, **kwargs)
+        weights = {
+            lane: weight
+            for lane, weight in (lane_weights or {DEFAULT_LANE: 1}).items()
+            if weight > 0
+        }
+        self.lane_weights = {
+            self.lane(lane): weight for lane, weight in weights.items()
+        }
+        for stream in self.lane_weights:
+            if stream != self.queue_name:
+                self.additional_streams.setdefault(stream, ">")
+        self._schedule = _weighted_schedule(self.lane_weights)
+
+    def lane(self, name: str) -> str:
+        """
+        Stream of a lane.
+
+        :param name: name of the lane.
+        :return: stream name.
+        """
+        if name == DEFAULT_LANE:
+            return self.queue_name
+        return f"{self.queue_name}:{name}"
+
+    async def listen(self) -> AsyncGenerator[AckableMessage, None]:
+        """
+        Take messages from the lanes by weight.
+
+        Only one message is read per step, so a message arriving on a
+        heavier lane is taken as soon as the worker has a free slot instead
+        of queueing behind messages already read from lighter lanes.
+
+        :yield: messages.
+        """
+        streams = [self.queue_name, *self.additional_streams]
+        position = 0
+        claimed_at = time.monotonic()
+        async with Redis(connection_pool=self.connection_pool) as redis_conn:
+            while True:
+                fetched, position = await self._read_by_weight(redis_conn, position)
+                if not fetched:
+                    # Every lane is empty, wait for a message on any of them.
+                    fetched = await redis_conn.xreadgroup(
+                        self.consumer_group_name,
+                        self.consumer_name,
+                        {stream: ">" for stream in streams},
+                        block=self.block,
+                        count=1,
+                    )
+
+                for stream, messages in fetched or ():
+                    for message in self._ackable(stream, messages):
+                        yield message
+
+                if not fetched or time.monotonic() - claimed_at > CLAIM_INTERVAL:
+                    claimed_at = time.monotonic()
+                    for stream in streams:
+                        claimed = await self._claim_abandoned(redis_conn, stream)
+                        for message in self._ackable(stream, claimed):
+                            yield message
+
+    async def _read_by_weight(
+        self,
+        redis_conn: Redis,
+        position: int,
+    ) -> Tuple[Any, int]:
+        """Read one message from the next non-empty lane of the schedule."""
+        empty = set()
+        for step in range(len(self._schedule)):
+            stream = self._schedule[(position + step) % len(self._schedule)]
+            if stream in empty:
+                continue
+            fetched = await redis_conn.xreadgroup(
+                self.consumer_group_name,
+                self.consumer_name,
+                {stream: ">"},
+                count=1,
+            )
+            if fetched:
+                return fetched, (position + step + 1) % len(self._schedule)
+            empty.add(stream)
+        return None, position
+
+    def _ackable(
+        self,
+        stream: Any,
+        messages: Iterable[Any],
+    ) -> Iterable[AckableMessage]:
+        for message_id, message in messages:
+            yield AckableMessage(
+                data=message[b"data"],
+                ack=self._ack_generator(id=message_id, queue_name=stream),
+            )
+
+    async def _claim_abandoned(self, redis_conn: Redis, stream: str) -> List[Any]:
+        """Claim messages delivered to consumers that stopped acking."""
+        async with redis_conn.lock(
+            f"autoclaim:{self.consumer_group_name}:{stream}",
+            timeout=self.unacknowledged_lock_timeout,
+        ):
+            _, claimed, *_ = await redis_conn.xautoclaim(
+                name=stream,
+                groupname=self.consumer_group_name,
+                consumername=self.consumer_name,
+                min_idle_time=self.idle_timeout,
+                count=self.unacknowledged_batch_size,
+            )
+        if claimed:
+            logger.info("Claimed %d abandoned messages of %s", len(claimed), stream)
+        return claimed
+
+    async def kick_many(self, messages: Sequence[BrokerMessage]) -> None:
+        """
+        Add messages to their streams with pipelined XADDs.
+
+        :param messages: messages to send.
+        """
+        async with Redis(connection_pool=self.connection_pool) as redis_conn:
+            for start in range(0, len(messages), PIPELINE_SIZE):
+                pipe = redis_conn.pipeline(transaction=False)
+                for message in messages[start : start + PIPELINE_SIZE]:
+                    pipe.xadd(
+                        message.labels.get("queue_name") or self.queue_name,
+                        {b"data": message.message},
+                        maxlen=self.maxlen,
+                        approximate=self.approximate,
+                    )
+                await pipe.execute()
+
+    async def queue_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Depth and consumer lag of the streams this broker reads.
+
+        ``length`` is the number of entries in the stream, ``pending`` the
+        entries delivered to workers but not acknowledged yet and ``lag``
+        the entries not delivered to the consumer group yet. Redis before
+        7.0 doesn't report lag.
+
+        :return: stats of each stream.
+        """
+        streams = [self.queue_name, *self.additional_streams]
+        stats: Dict[str, Dict[str, float]] = {}
+        async with Redis(connection_pool=self.connection_pool) as redis_conn:
+            for stream in streams:
+                stats[stream] = {"length": await redis_conn.xlen(stream)}
+                try:
+                    groups = await redis_conn.xinfo_groups(stream)
+                except ResponseError:
+                    # The stream doesn't exist yet.
+                    continue
+                for group in groups:
+                    name = group["name"]
+                    if isinstance(name, bytes):
+                        name = name.decode()
+                    if name != self.consumer_group_name:
+                        continue
+                    stats[stream]["pending"] = group["pending"]
+                    if group.get("lag") is not None:
+                        stats[stream]["lag"] = group["lag"]
+        return stats
+
+
+def _weighted_schedule(weights: Mapping[str, int]) -> List[str]:
+    """
+    Order of lanes in one round of smooth weighted round robin.
+
+    Lanes are spread over the round instead of being taken in runs, e.g.
+    weights 2 and 1 give ``a b a``.
+    """
+    current = dict.fromkeys(weights, 0)
+    total = sum(weights.values())
+    schedule = []
+    for _ in range(total):
+        for lane, weight in weights.items():
+            current[lane] += weight
+        lane = max(current, key=current.__getitem__)
+        current[lane] -= total
+        schedule.append(lane)
+    return schedule
+
+
+def _prepare_arg(arg: Any) -> Any:
+    """Serialize a task argument, pydantic models are sent as dicts."""
+    if isinstance(arg, BaseModel):
+        return arg.model_dump(mode="json")
+    return arg
+
+
+def _task_message(
+    task: AsyncTaskiqDecoratedTask[Any, Any],
+    args: Sequence[Any],
+    labels: Dict[str, Any],
+) -> TaskiqMessage:
+    """Build the message ``task.kiq(*args)`` sends, with extra labels."""
+    kicker = task.kicker().with_labels(**labels)
+    prepared = {name: prepare_label(value) for name, value in kicker.labels.items()}
+    return TaskiqMessage(
+        task_id=kicker.broker.id_generator(),
+        task_name=kicker.task_name,
+        labels={name: value for name, (value, _) in prepared.items()},
+        labels_types={name: kind for name, (_, kind) in prepared.items()},
+        args=[_prepare_arg(arg) for arg in args],
+        kwargs={},
+    )
+
+
+async def kiq_many(
+    task: AsyncTaskiqDecoratedTask[Any, Any],
+    args_list: Iterable[Sequence[Any]],
+    labels: Optional[Iterable[Dict[str, Any]]] = None,
+) -> None:
+    """
+    Send many calls of a task in one go.
+
+    Builds the same messages as ``task.kiq`` for every set of arguments
+    and runs them through the broker's middlewares, but hands them all to
+    the broker at once, so a stream broker can pipeline them.
+
+    :param task: task to call.
+    :param args_list: positional arguments of each call.
+    :param labels: extra labels of each call, e.g. its ``queue_name``.
+    """
+    broker: AsyncBroker = task.broker
+    args_list = list(args_list)
+    labels_list = list(labels) if labels is not None else [{}] * len(args_list)
+    messages = []
+    for args, call_labels in zip(args_list, labels_list):
+        message = _task_message(task, args, call_labels)
+        for middleware in broker.middlewares:
+            message = await maybe_awaitable(middleware.pre_send(message))
+        messages.append(message)
+
+    broker_messages: List[BrokerMessage] = [
+        broker.formatter.dumps(message) for message in messages
+    ]
+    if isinstance(broker, ScanStreamBroker):
+        await broker.kick_many(broker_messages)
+    else:
+        for broker_message in broker_messages:
+            await broker.kick(broker_message)
+
+    for message in messages:
+        for middleware in reversed(broker.middlewares):
+            await maybe_awaitable(middleware.post_send(message))
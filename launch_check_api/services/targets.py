@@ -0,0 +1,68 @@
+import hashlib
+import json
+from typing import Iterable, Optional
+
+from yarl import URL
+
+
+def normalize_target_url(target_url: str) -> str:
+    """
+    Canonical form of a target URL.
+
+    Scheme and host are lowercased, default ports, fragments and
+    dot-segments are dropped and query parameters are sorted, so that
+    equivalent spellings of the same URL compare equal.
+
+    :param target_url: URL to normalize.
+    :return: normalized URL.
+    """
+    url = URL(target_url)
+    port = None if url.is_default_port() else url.port
+    query = sorted(url.query.items())
+    return str(
+        URL.build(
+            scheme=url.scheme.lower(),
+            user=url.user,
+            password=url.password,
+            host=url.host or "",
+            port=port,
+            path=url.path or "/",
+        ).with_query(query),
+    )
+
+
+def target_host(target_url: str) -> str:
+    """
+    Lowercased host of a target URL.
+
+    :param target_url: URL of the target.
+    :return: host name without port.
+    """
+    return (URL(target_url).host or "").lower()
+
+
+def scan_cache_key(
+    target_url: str,
+    severity_levels: Iterable[str],
+    templates: Optional[Iterable[str]],
+    rate_limit: int,
+) -> str:
+    """
+    Key identifying scans that produce the same results.
+
+    :param target_url: URL to be scanned.
+    :param severity_levels: severity levels to scan for.
+    :param templates: templates to use, None for the default set.
+    :param rate_limit: requested rate limit.
+    :return: hex digest of the scan parameters.
+    """
+    payload = json.dumps(
+        [
+            normalize_target_url(target_url),
+            sorted({level.lower() for level in severity_levels}),
+            sorted(set(templates or ())),
+            rate_limit,
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
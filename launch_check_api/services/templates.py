@@ -0,0 +1,226 @@
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional
+
+from starlette.requests import Request
+from taskiq import TaskiqDepends
+
+from launch_check_api.services.nuclei import NucleiError, NucleiService
+
+logger = logging.getLogger(__name__)
+
+# Shipped with nuclei-templates, changes whenever any template changes.
+CHECKSUM_FILE = "templates-checksum.txt"
+
+
+class TemplateManager:
+    """
+    Keeps Nuclei templates in a shared, versioned directory.
+
+    Every update is downloaded into ``versions/<version>`` below ``root``
+    and ``current`` is switched to it with an atomic symlink swap, so
+    scans never see a half-written template tree. Updates of all workers
+    sharing ``root`` are serialized with a lock file, and an update is
+    skipped when another process refreshed the templates less than
+    ``max_age`` seconds ago. Scans pin the version they use with a shared
+    lock below ``pins``, old versions are only removed once no scan of any
+    process holds them.
+    """
+
+    def __init__(self, root: Path, max_age: int, keep: int = 2) -> None:
+        self.root = root
+        self.max_age = max_age
+        self.keep = max(1, keep)
+        self.versions = root / "versions"
+        self.current_link = root / "current"
+        self.checked_file = root / ".checked"
+        self.lock_file = root / ".lock"
+        self.pins = root / "pins"
+
+    def current(self) -> Optional[Path]:
+        """
+        Directory of the current template version.
+
+        :return: resolved directory, None before the first update.
+        """
+        try:
+            return self.current_link.resolve(strict=True)
+        except OSError:
+            return None
+
+    @contextmanager
+    def pin(self) -> Iterator[Optional[Path]]:
+        """
+        Hold the current template version so it isn't removed while in use.
+
+        :yields: directory of the version, None before the first update.
+        """
+        while True:
+            current = self.current()
+            if current is None:
+                yield None
+                return
+            self.pins.mkdir(parents=True, exist_ok=True)
+            with self._pin_file(current.name).open("a") as pin:
+                try:
+                    fcntl.flock(pin.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Being removed, so it is no longer current.
+                    continue
+                if not current.is_dir():
+                    continue
+                try:
+                    yield current
+                finally:
+                    fcntl.flock(pin.fileno(), fcntl.LOCK_UN)
+                return
+
+    def current_version(self) -> Optional[str]:
+        """
+        Name of the current template version.
+
+        :return: version, None before the first update.
+        """
+        current = self.current()
+        return current.name if current else None
+
+    def is_fresh(self) -> bool:
+        """Whether templates exist and were checked within max_age."""
+        if self.current() is None:
+            return False
+        try:
+            checked_at = self.checked_file.stat().st_mtime
+        except OSError:
+            return False
+        return time.time() - checked_at < self.max_age
+
+    async def ensure(self, nuclei_service: NucleiService) -> Optional[str]:
+        """
+        Make sure fresh templates are installed, updating them if needed.
+
+        :param nuclei_service: service running Nuclei.
+        :return: current template version.
+        """
+        if self.is_fresh():
+            return self.current_version()
+        return await self.update(nuclei_service)
+
+    async def update(
+        self,
+        nuclei_service: NucleiService,
+        force: bool = False,
+    ) -> Optional[str]:
+        """
+        Download the latest templates and switch to them.
+
+        :param nuclei_service: service running Nuclei.
+        :param force: update even if the templates are fresh.
+        :return: current template version.
+        """
+        async with self._lock():
+            # Another process may have finished an update while we waited.
+            if not force and self.is_fresh():
+                return self.current_version()
+
+            staging = self.versions / f".staging-{uuid.uuid4().hex}"
+            try:
+                await nuclei_service.update_templates(str(staging))
+                if not staging.is_dir() or not any(staging.iterdir()):
+                    raise NucleiError("Template update produced no templates")
+                version = await asyncio.to_thread(_templates_version, staging)
+                target = self.versions / version
+                if target.exists():
+                    logger.info("Nuclei templates %s are up to date", version)
+                    os.utime(target)
+                else:
+                    staging.rename(target)
+                    logger.info("Installed Nuclei templates %s", version)
+                self._switch(target)
+            finally:
+                if staging.exists():
+                    await asyncio.to_thread(shutil.rmtree, staging, True)
+
+            self.checked_file.touch()
+            await asyncio.to_thread(self._prune)
+            return version
+
+    @asynccontextmanager
+    async def _lock(self) -> AsyncIterator[None]:
+        self.versions.mkdir(parents=True, exist_ok=True)
+        with self.lock_file.open("a") as lock:
+            # flock blocks, wait for it outside of the event loop.
+            await asyncio.to_thread(fcntl.flock, lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _switch(self, target: Path) -> None:
+        link = self.root / f".current-{uuid.uuid4().hex}"
+        link.symlink_to(target.relative_to(self.root))
+        link.replace(self.current_link)
+
+    def _pin_file(self, version: str) -> Path:
+        return self.pins / f"{version}.lock"
+
+    def _prune(self) -> None:
+        """Remove old versions no scan uses, keeping the newest ``keep``."""
+        current = self.current()
+        versions = sorted(
+            (
+                path
+                for path in self.versions.iterdir()
+                if path.is_dir()
+                and path != current
+                and not path.name.startswith(".staging-")
+            ),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        self.pins.mkdir(parents=True, exist_ok=True)
+        for path in versions[self.keep - 1 :]:
+            pin_file = self._pin_file(path.name)
+            with pin_file.open("a") as pin:
+                try:
+                    fcntl.flock(pin.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    logger.info(
+                        "Keeping Nuclei templates %s, scans use them",
+                        path.name,
+                    )
+                    continue
+                logger.info("Removing old Nuclei templates %s", path.name)
+                shutil.rmtree(path, ignore_errors=True)
+                pin_file.unlink(missing_ok=True)
+
+
+def _templates_version(directory: Path) -> str:
+    """Content hash identifying a template tree."""
+    digest = hashlib.sha256()
+    checksum = directory / CHECKSUM_FILE
+    if checksum.is_file():
+        digest.update(checksum.read_bytes())
+    else:
+        for path in sorted(directory.rglob("*")):
+            if path.is_file():
+                digest.update(str(path.relative_to(directory)).encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def get_template_manager(request: Request = TaskiqDepends()) -> TemplateManager:
+    """
+    Get the Nuclei template manager of the current worker.
+
+    :param request: current request.
+    :return: template manager.
+    """
+    return request.app.state.template_manager
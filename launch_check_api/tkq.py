@@ -1,16 +1,20 @@
+from typing import Dict
+
 import taskiq_fastapi
-from taskiq import AsyncBroker, InMemoryBroker
-from taskiq_redis import RedisStreamBroker
+from taskiq import AsyncBroker, InMemoryBroker, TaskiqScheduler
+from taskiq.schedule_sources import LabelScheduleSource
 
+from launch_check_api.services.stream_broker import ScanStreamBroker
 from launch_check_api.settings import settings
 
 # Configure Redis broker with settings
-broker: AsyncBroker = RedisStreamBroker(
-    url=settings.redis_url
+broker: AsyncBroker = ScanStreamBroker(
+    url=settings.redis_url,
+    lane_weights=settings.scan_lane_weights,
 )
 
-# Use in-memory broker for tests
-if settings.environment.lower() == "pytest":
+# Use in-memory broker for tests and benchmarks
+if settings.environment.lower() in ("pytest", "benchmark"):
     broker = InMemoryBroker()
 
 # Initialize FastAPI integration
@@ -18,3 +22,23 @@ taskiq_fastapi.init(
     broker,
     "launch_check_api.web.application:get_app",
 )
+
+# Kicks tasks declared with a schedule, run with `taskiq scheduler`.
+scheduler = TaskiqScheduler(broker, sources=[LabelScheduleSource(broker)])
+
+
+def lane_labels(priority: str) -> Dict[str, str]:
+    """
+    Labels sending a task to the lane of a priority.
+
+    Lanes workers don't read from fall back to the standard lane.
+
+    :param priority: name of the lane.
+    :return: labels for the task's kicker.
+    """
+    if not isinstance(broker, ScanStreamBroker):
+        return {}
+    stream = broker.lane(priority)
+    if stream not in broker.lane_weights:
+        stream = broker.queue_name
+    return {"queue_name": stream}
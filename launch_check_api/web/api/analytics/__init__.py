@@ -0,0 +1,5 @@
+"""Analytics API."""
+
+from launch_check_api.web.api.analytics.views import router
+
+__all__ = ["router"]
@@ -0,0 +1,45 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+from launch_check_api.db.models.rollup_model import RollupPeriod
+
+
+class SeverityCounts(BaseModel):
+    """Findings of the last completed scan of a bucket by severity."""
+
+    # Configuration the scans of the bucket ran with
+    target_url: str
+    severity_levels: list[str]
+    total_findings: int
+    critical_count: int
+    high_count: int
+    medium_count: int
+    low_count: int
+    info_count: int
+
+
+class TrendPoint(SeverityCounts):
+    """Severity counts of a scan configuration of a host in one day or week."""
+
+    period_start: date
+    # Completed scans in the bucket
+    scans: int
+    last_scan_id: int
+    last_scan_at: datetime
+
+
+class TargetTrend(BaseModel):
+    """Severity trend of a host."""
+
+    target_host: str
+    period: RollupPeriod
+    points: list[TrendPoint]
+
+
+class WorstHost(SeverityCounts):
+    """Host ranked by the latest completed scan of its worst configuration."""
+
+    target_host: str
+    last_scan_id: int
+    last_scan_at: datetime
@@ -0,0 +1,65 @@
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Query
+
+from launch_check_api.db.dao.rollup_dao import RollupDAO
+from launch_check_api.db.models.rollup_model import RollupPeriod
+from launch_check_api.web.api.analytics.schema import (
+    TargetTrend,
+    TrendPoint,
+    WorstHost,
+)
+
+router = APIRouter()
+
+
+def _today() -> date:
+    """Current UTC day, rollups use UTC days."""
+    return datetime.now(timezone.utc).date()
+
+
+@router.get("/targets/{host}/trend")
+async def get_target_trend(
+    host: str,
+    period: RollupPeriod = RollupPeriod.DAY,
+    days: int = Query(default=90, ge=1, le=3660),
+    rollup_dao: RollupDAO = Depends(),
+) -> TargetTrend:
+    """
+    Severity counts of a host per day or week.
+
+    Read from the rollups updated when scans complete. Each point holds
+    the counts of the last completed scan of one scan configuration in
+    its bucket, buckets without completed scans are left out. Covers the
+    last ``days`` days, the first week may start earlier.
+    """
+    since = period.start_of(_today() - timedelta(days=days - 1))
+    rollups = await rollup_dao.get_trend(host.lower(), period, since)
+    return TargetTrend(
+        target_host=host.lower(),
+        period=period,
+        points=[
+            TrendPoint.model_validate(rollup, from_attributes=True)
+            for rollup in rollups
+        ],
+    )
+
+
+@router.get("/hosts/worst")
+async def get_worst_hosts(
+    limit: int = Query(default=10, ge=1, le=100),
+    days: int = Query(default=30, ge=1, le=3660),
+    rollup_dao: RollupDAO = Depends(),
+) -> list[WorstHost]:
+    """
+    Hosts with the most severe findings.
+
+    Hosts are ranked by the last completed scan of their worst scan
+    configuration in the last ``days`` days: most critical findings
+    first, then high, medium and low ones.
+    """
+    since = _today() - timedelta(days=days - 1)
+    rollups = await rollup_dao.get_worst_hosts(since, limit)
+    return [
+        WorstHost.model_validate(rollup, from_attributes=True) for rollup in rollups
+    ]
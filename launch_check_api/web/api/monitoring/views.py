@@ -1,4 +1,15 @@
+import logging
+
 from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from redis.exceptions import RedisError
+
+from launch_check_api.services.metrics import SnapshotCollector, metrics_registry
+from launch_check_api.services.stream_broker import ScanStreamBroker
+from launch_check_api.tkq import broker
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -10,3 +21,44 @@ def health_check() -> None:
 
     It returns 200 if the project is healthy.
     """
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Exposes Prometheus metrics.
+
+    Besides the metrics recorded by API and worker processes, the depth
+    and lag of the task streams are read on every scrape.
+
+    :return: metrics in the Prometheus text format.
+    """
+    snapshot = SnapshotCollector()
+    if isinstance(broker, ScanStreamBroker):
+        try:
+            queues = await broker.queue_stats()
+        except RedisError as error:
+            logger.warning("Failed to read task queue stats: %s", error)
+        else:
+            for stat, documentation in (
+                ("length", "Entries in the task stream"),
+                ("pending", "Tasks delivered to workers but not acknowledged"),
+                ("lag", "Tasks not delivered to workers yet"),
+            ):
+                snapshot.add(
+                    f"launch_check_queue_{stat}",
+                    documentation,
+                    "stream",
+                    {
+                        stream: values[stat]
+                        for stream, values in queues.items()
+                        if stat in values
+                    },
+                )
+
+    registry = CollectorRegistry()
+    registry.register(snapshot)
+    return Response(
+        generate_latest(metrics_registry()) + generate_latest(registry),
+        media_type=CONTENT_TYPE_LATEST,
+    )
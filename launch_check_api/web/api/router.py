@@ -1,7 +1,8 @@
 from fastapi.routing import APIRouter
 
-from launch_check_api.web.api import monitoring, scan
+from launch_check_api.web.api import analytics, monitoring, scan
 
 api_router = APIRouter()
 api_router.include_router(monitoring.router)
 api_router.include_router(scan.router, prefix="/scan", tags=["scan"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
@@ -0,0 +1,59 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+def encode_scan_cursor(started_at: datetime, scan_id: int) -> str:
+    """
+    Encode the position after a scan as an opaque cursor.
+
+    :param started_at: start time of the last returned scan.
+    :param scan_id: id of the last returned scan.
+    :return: url-safe cursor.
+    """
+    raw = f"{started_at.isoformat()}|{scan_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_scan_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_scan_cursor.
+
+    :param cursor: cursor from a previous page.
+    :raises HTTPException: if the cursor is malformed.
+    :return: start time and id of the last seen scan.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        started_at, scan_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(started_at), int(scan_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def encode_finding_cursor(finding_id: int) -> str:
+    """
+    Encode the position after a finding as an opaque cursor.
+
+    :param finding_id: id of the last returned finding.
+    :return: url-safe cursor.
+    """
+    return base64.urlsafe_b64encode(str(finding_id).encode()).decode().rstrip("=")
+
+
+def decode_finding_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by encode_finding_cursor.
+
+    :param cursor: cursor from a previous page.
+    :raises HTTPException: if the cursor is malformed.
+    :return: id of the last seen finding.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        return int(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
@@ -1,17 +1,180 @@
-from pydantic import BaseModel, HttpUrl
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field, HttpUrl
 
 from launch_check_api.db.models.scan_model import ScanStatus
 
+# Largest number of scans accepted by one batch request.
+MAX_BATCH_SIZE = 5000
+
+
+class ScanPriority(str, Enum):
+    """Lane a scan is queued in, see settings.scan_lane_weights."""
+
+    # Someone is waiting for the result
+    INTERACTIVE = "interactive"
+    STANDARD = "standard"
+    # Scheduled rescans and other background work
+    BULK = "bulk"
+
+
 class ScanRequest(BaseModel):
     """Scan request model."""
+
     target_url: HttpUrl
     severity_levels: list[str] = ["info", "low", "medium", "high", "critical"]
     rate_limit: int = 100
+    # Seconds to wait for each request, passed to Nuclei's -timeout
     timeout: int = 10
+    # Seconds the scan may run before it is stopped, capped by
+    # settings.scan_max_duration
+    max_duration: Optional[int] = Field(default=None, gt=0)
+    templates: Optional[list[str]] = None
+    # Start a new scan even if an identical one can be reused
+    force: bool = False
+    priority: ScanPriority = ScanPriority.STANDARD
+
 
 class ScanResponse(BaseModel):
     """Scan response model."""
+
     scan_id: int
     target_url: str
     status: ScanStatus
     message: str
+    reused: bool = False
+
+
+class ScanSummary(BaseModel):
+    """Status and severity counters of a scan, without findings."""
+
+    scan_id: int
+    target_url: str
+    status: ScanStatus
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    duration: Optional[float] = None
+    total_findings: Optional[int] = None
+    critical_count: int = 0
+    high_count: int = 0
+    medium_count: int = 0
+    low_count: int = 0
+    info_count: int = 0
+
+
+class ScanDetail(BaseModel):
+    """
+    Scan returned by GET /api/scan/{scan_id}.
+
+    Every field is optional because ``?fields=`` only returns the requested
+    ones. The raw ``findings`` are only returned when asked for.
+    """
+
+    id: Optional[int] = None
+    target_url: Optional[str] = None
+    target_host: Optional[str] = None
+    status: Optional[ScanStatus] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    severity_levels: Optional[list[str]] = None
+    rate_limit: Optional[int] = None
+    timeout: Optional[int] = None
+    templates: Optional[list[str]] = None
+    cache_key: Optional[str] = None
+    batch_id: Optional[str] = None
+    template_version: Optional[str] = None
+    total_findings: Optional[int] = None
+    critical_count: Optional[int] = None
+    high_count: Optional[int] = None
+    medium_count: Optional[int] = None
+    low_count: Optional[int] = None
+    info_count: Optional[int] = None
+    error_message: Optional[str] = None
+    warnings: Optional[str] = None
+    findings: Optional[Any] = None
+    findings_summary: Optional[dict[str, int]] = None
+
+
+# Fields of ScanDetail returned when ``fields`` is not given
+DEFAULT_SCAN_FIELDS = tuple(
+    name for name in ScanDetail.model_fields if name != "findings"
+)
+
+
+class ScanListItem(BaseModel):
+    """Scan entry of a listing page."""
+
+    scan_id: int
+    target_url: str
+    status: ScanStatus
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    total_findings: Optional[int] = None
+
+
+class ScanPage(BaseModel):
+    """Page of scans with the cursor of the next page."""
+
+    items: list[ScanListItem]
+    next_cursor: Optional[str] = None
+
+
+class BatchScanRequest(BaseModel):
+    """Many scan requests submitted at once."""
+
+    scans: list[ScanRequest] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchScanResponse(BaseModel):
+    """Scans created for a batch, in the order of the request."""
+
+    batch_id: str
+    scan_ids: list[int]
+
+
+class BatchProgress(BaseModel):
+    """Aggregate status of the scans of a batch."""
+
+    batch_id: str
+    total: int
+    pending: int = 0
+    in_progress: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    timed_out: int = 0
+
+
+class FindingItem(BaseModel):
+    """A stored Nuclei finding."""
+
+    id: int
+    template_id: str
+    name: Optional[str] = None
+    severity: str
+    matcher_name: Optional[str] = None
+    host: Optional[str] = None
+    matched_at: Optional[str] = None
+    extracted_results: Optional[list[Any]] = None
+    # When the finding was first and last seen in a completed scan of the
+    # host, None before a completed scan recorded it
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+
+
+class FindingPage(BaseModel):
+    """Page of findings with the cursor of the next page."""
+
+    items: list[FindingItem]
+    next_cursor: Optional[str] = None
+
+
+class ScanDiff(BaseModel):
+    """Findings that appeared or disappeared since the previous scan."""
+
+    scan_id: int
+    previous_scan_id: Optional[int] = None
+    new: list[FindingItem]
+    resolved: list[FindingItem]
@@ -0,0 +1,57 @@
+import json
+from typing import Any, AsyncIterator, Dict
+
+from starlette.requests import Request
+
+from launch_check_api.db.models.scan_model import TERMINAL_STATUSES
+from launch_check_api.services.scan_events import ScanEvents
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Format a scan event as a Server-Sent Events message.
+
+    :param event: event with an "event" type.
+    :return: SSE message.
+    """
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+def is_final_event(event: Dict[str, Any]) -> bool:
+    """
+    Whether no more events follow this one.
+
+    :param event: scan event.
+    :return: True for status events with a terminal status.
+    """
+    return event["event"] == "status" and event.get("status") in {
+        status.value for status in TERMINAL_STATUSES
+    }
+
+
+async def stream_scan_events(
+    request: Request,
+    events: ScanEvents,
+    first: Dict[str, Any],
+) -> AsyncIterator[str]:
+    """
+    Stream events of a scan until it finishes or the client disconnects.
+
+    :param request: current request.
+    :param events: scan events.
+    :param first: current status of the scan, sent first.
+    :yield: SSE messages.
+    """
+    yield format_sse(first)
+    if is_final_event(first):
+        return
+
+    async for event in events.subscribe(first["scan_id"]):
+        if await request.is_disconnected():
+            return
+        if event is None:
+            yield ": keep-alive\n\n"
+            continue
+        yield format_sse(event)
+        if is_final_event(event):
+            return
@@ -1,31 +1,330 @@
-from datetime import datetime
+import asyncio
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
 import logging
 import traceback
-from typing import Annotated
+from typing import Annotated, Any, Collection, Dict, List, Optional, Tuple
 
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from launch_check_api.db.dao.finding_dao import FindingDAO
+from launch_check_api.db.dao.rollup_dao import RollupDAO
 from launch_check_api.db.dao.scan_dao import ScanDAO
-from launch_check_api.db.models.scan_model import ScanStatus
-from launch_check_api.services.nuclei import NucleiError, NucleiService
-from launch_check_api.web.api.scan.schema import ScanRequest
-from launch_check_api.tkq import broker
+from launch_check_api.db.dependencies import get_db_session_factory
+from launch_check_api.db.models.constants import SEVERITIES
+from launch_check_api.db.models.scan_model import ScanModel, ScanStatus
+from launch_check_api.services.findings_store import (
+    FindingsArchive,
+    FindingsStore,
+    LocalBlobBackend,
+    get_findings_store,
+)
+from launch_check_api.services.cancellation import ScanCancellation
+from launch_check_api.services.coalescer import ScanCoalescer, get_scan_coalescer
+from launch_check_api.services.host_limiter import HostRateLimiter
+from launch_check_api.services.nuclei import (
+    Finding,
+    NucleiError,
+    NucleiService,
+    ScanControl,
+)
+from launch_check_api.services.retention import ScanRetention
+from launch_check_api.services.scan_cache import ScanCache, get_scan_cache
+from launch_check_api.services.scan_events import ScanEvents
+from launch_check_api.services.targets import target_host
+from launch_check_api.services.templates import TemplateManager, get_template_manager
+from launch_check_api.settings import settings
+from launch_check_api.web.api.scan.schema import ScanPriority, ScanRequest
+from launch_check_api.tkq import broker, lane_labels
 from taskiq import TaskiqDepends
 
 logger = logging.getLogger(__name__)
 
+SessionFactory = async_sessionmaker[AsyncSession]
+# Nuclei slots of a worker go to interactive scans first, then standard
+# and bulk ones.
+SLOT_PRIORITY = {priority: rank for rank, priority in enumerate(ScanPriority)}
+
+
+def _max_duration(scan_request: ScanRequest) -> Optional[int]:
+    """Seconds a scan may run, None without a limit."""
+    limits = [
+        limit
+        for limit in (scan_request.max_duration, settings.scan_max_duration)
+        if limit
+    ]
+    return min(limits) if limits else None
+
+
+class _ScanRun:
+    """
+    One execution of the scan task.
+
+    Holds the state the callbacks of a running scan share. Database
+    sessions are only opened around each write, so no pooled connection
+    is held while Nuclei is running.
+    """
+
+    def __init__(
+        self,
+        scan_id: int,
+        scan_request: ScanRequest,
+        session_factory: SessionFactory,
+        scan_cache: ScanCache,
+        events: ScanEvents,
+        cancellation: ScanCancellation,
+    ) -> None:
+        self.scan_id = scan_id
+        self.scan_request = scan_request
+        self.session_factory = session_factory
+        self.scan_cache = scan_cache
+        self.events = events
+        self.cancellation = cancellation
+        self.host = target_host(str(scan_request.target_url))
+        # Raw findings are compressed while the scan runs
+        self.archive = FindingsArchive()
+        self.max_duration = _max_duration(scan_request)
+        self.control = ScanControl(self.max_duration)
+        self.watcher: Optional["asyncio.Task[None]"] = None
+        # Findings are stored in the partition of the scan's month
+        self.started_at: Optional[datetime] = None
+
+    async def update(
+        self,
+        update_data: Dict[str, Any],
+        expected_status: Optional[Collection[ScanStatus]] = None,
+    ) -> Optional[ScanModel]:
+        """Update the scan in its own short-lived session."""
+        async with self.session_factory() as session:
+            return await ScanDAO(session, self.scan_cache).update_scan(
+                self.scan_id,
+                update_data,
+                expected_status=expected_status,
+            )
+
+    async def start(
+        self,
+        leases: AsyncExitStack,
+        host_limiter: HostRateLimiter,
+        template_version: Optional[str],
+    ) -> Optional[int]:
+        """
+        Mark the scan IN_PROGRESS once Nuclei can run it.
+
+        Scans stay PENDING while they wait for a free Nuclei slot in this
+        worker and then for a share of the host's rate budget, which is
+        held in ``leases`` until the scan ends.
+
+        Args:
+            leases: Resources held until the scan ends
+            host_limiter: Shares the request budget of the target host
+            template_version: Version of the templates the scan runs with
+
+        Returns:
+            Requests per second the scan may send, None to skip it
+        """
+        rate_limit = await leases.enter_async_context(
+            host_limiter.lease(
+                self.host,
+                self.scan_id,
+                self.scan_request.rate_limit,
+            ),
+        )
+        logger.debug("Updating scan status to IN_PROGRESS")
+        scan = await self.update(
+            {
+                "status": ScanStatus.IN_PROGRESS,
+                "template_version": template_version,
+            },
+            expected_status=[ScanStatus.PENDING],
+        )
+        if scan is None:
+            logger.warning(
+                "Scan %d is missing or not pending, skipping it",
+                self.scan_id,
+            )
+            return None
+        self.started_at = scan.started_at
+        logger.info("Scan status updated to IN_PROGRESS")
+        self.watcher = asyncio.create_task(
+            self.cancellation.watch(self.scan_id, self.control),
+        )
+        await self.events.publish(
+            self.scan_id,
+            "status",
+            status=ScanStatus.IN_PROGRESS.value,
+        )
+        logger.info(
+            "Starting Nuclei scan | Rate Limit: %d | Timeout: %d",
+            rate_limit,
+            self.scan_request.timeout,
+        )
+        return rate_limit
+
+    async def publish_progress(self, progress: Dict[str, Any]) -> None:
+        """Publish Nuclei statistics to clients of the scan."""
+        await self.events.publish(self.scan_id, "progress", **progress)
+
+    async def store_findings(self, findings: List[Finding]) -> None:
+        """Archive and store a batch of findings."""
+        await asyncio.to_thread(self.archive.write, findings)
+        async with self.session_factory() as session:
+            await FindingDAO(session).bulk_create(
+                self.scan_id,
+                findings,
+                self.started_at,
+            )
+
+    async def finish(
+        self,
+        results: Dict[str, Any],
+        nuclei_service: NucleiService,
+        findings_store: FindingsStore,
+    ) -> None:
+        """
+        Save the results of a scan that ran.
+
+        Args:
+            results: Results of the Nuclei run
+            nuclei_service: Service that ran the scan
+            findings_store: Keeps the compressed raw findings of the scan
+        """
+        # Completed, or stopped with the findings collected until then
+        status = ScanStatus(results["status"])
+        findings_count, severity_count = await self._count_findings(
+            results,
+            nuclei_service,
+        )
+        has_warnings = bool(results.get("warnings"))
+        logger.info(
+            "Scan %s | Findings: %d | Has Warnings: %s",
+            status.value,
+            findings_count,
+            has_warnings,
+        )
+
+        if has_warnings:
+            logger.warning("Scan warnings: %s", results.get("warnings"))
+
+        error_message = None
+        if status == ScanStatus.TIMED_OUT:
+            error_message = (
+                f"Scan exceeded its maximum duration of {self.max_duration}s"
+            )
+        elif status == ScanStatus.CANCELLED:
+            error_message = "Scan cancelled"
+
+        # Update scan with results
+        logger.debug("Updating scan with results in database")
+        payload = {}
+        if self.archive.count:
+            payload = await findings_store.save(self.scan_id, self.archive)
+            # Partial runs would move last_seen of findings they didn't reach
+            if status == ScanStatus.COMPLETED:
+                async with self.session_factory() as session:
+                    await FindingDAO(session).track_fingerprints(
+                        self.scan_id,
+                        self.host,
+                    )
+        finished = await self.update(
+            {
+                "status": status,
+                "total_findings": findings_count,
+                **ScanModel.severity_columns(severity_count),
+                **payload,
+                "warnings": results.get("warnings"),
+                "error_message": error_message,
+                "completed_at": datetime.now(timezone.utc),
+            },
+            expected_status=[ScanStatus.IN_PROGRESS],
+        )
+        logger.info("Scan results saved successfully to database")
+        # Severity trends of the host only follow complete scans
+        if finished is not None and status == ScanStatus.COMPLETED:
+            async with self.session_factory() as session:
+                await RollupDAO(session).record_scan(finished)
+        await self.events.publish(
+            self.scan_id,
+            "status",
+            status=status.value,
+            total_findings=findings_count,
+            severity_count=severity_count,
+        )
+
+    async def _count_findings(
+        self,
+        results: Dict[str, Any],
+        nuclei_service: NucleiService,
+    ) -> Tuple[int, Dict[str, int]]:
+        """Number of findings and findings per severity of the scan."""
+        if "total_findings" in results:
+            return (
+                int(results["total_findings"]),
+                nuclei_service.get_severity_count(results),
+            )
+        # Cancelled while sharing a Nuclei process, count what was stored
+        async with self.session_factory() as session:
+            counts = await FindingDAO(session).count_by_severity(self.scan_id)
+        return self.archive.count, {
+            severity: counts.get(severity, 0) for severity in SEVERITIES
+        }
+
+    async def fail(self, error_message: str) -> None:
+        """Mark the scan FAILED."""
+        await self.update(
+            {
+                "status": ScanStatus.FAILED,
+                "error_message": error_message,
+            },
+            expected_status=[ScanStatus.PENDING, ScanStatus.IN_PROGRESS],
+        )
+        await self.events.publish(
+            self.scan_id,
+            "status",
+            status=ScanStatus.FAILED.value,
+            error_message=error_message,
+        )
+
+    def close(self) -> None:
+        """Stop watching for cancel requests and drop the archive."""
+        if self.watcher is not None:
+            self.watcher.cancel()
+        self.archive.close()
+
+
 @broker.task
 async def run_scan(
     scan_id: int, 
     scan_request: ScanRequest, 
-    scan_dao: Annotated[ScanDAO, TaskiqDepends()],
-    nuclei_service: Annotated[NucleiService, TaskiqDepends()]
+    session_factory: SessionFactory = TaskiqDepends(get_db_session_factory),
+    nuclei_service: NucleiService = TaskiqDepends(),
+    coalescer: ScanCoalescer = TaskiqDepends(get_scan_coalescer),
+    host_limiter: HostRateLimiter = TaskiqDepends(),
+    template_manager: TemplateManager = TaskiqDepends(get_template_manager),
+    events: ScanEvents = TaskiqDepends(),
+    findings_store: FindingsStore = TaskiqDepends(get_findings_store),
+    cancellation: ScanCancellation = TaskiqDepends(),
+    scan_cache: ScanCache = TaskiqDepends(get_scan_cache),
 ) -> None:
     """
     Execute a security scan task.
+
+    Database sessions are only opened around each write, so no pooled
+    connection is held while Nuclei is running. A scan that is cancelled
+    or runs longer than its maximum duration keeps the findings collected
+    until then and ends as CANCELLED or TIMED_OUT.
     
     Args:
         scan_id: The ID of the scan in the database
         scan_request: The scan request parameters
-        scan_dao: Data access object for scan operations
+        session_factory: Factory of short-lived database sessions
+        coalescer: Runs compatible scans of this worker in one Nuclei process
+        host_limiter: Shares the request budget of the target host
+        template_manager: Provides the current Nuclei template version
+        events: Publishes status and progress of the scan to clients
+        findings_store: Keeps the compressed raw findings of the scan
+        cancellation: Delivers cancel requests of the scan
+        scan_cache: Cached API responses, dropped when the scan changes
     """
     logger.info(
         "Starting scan task | ID: %d | Target: %s | Severity Levels: %s",
@@ -33,6 +332,14 @@ async def run_scan(
         scan_request.target_url,
         scan_request.severity_levels,
     )
+    run = _ScanRun(
+        scan_id,
+        scan_request,
+        session_factory,
+        scan_cache,
+        events,
+        cancellation,
+    )
     
     try:
         # Initialize Nuclei service
@@ -40,52 +347,32 @@ async def run_scan(
         
         logger.info("Nuclei service initialized successfully")
         
-        # Update scan status to in progress
-        logger.debug("Updating scan status to IN_PROGRESS")
-        await scan_dao.update_scan(
-            scan_id,
-            {"status": ScanStatus.IN_PROGRESS}
-        )
-        logger.info("Scan status updated to IN_PROGRESS")
-        
-        # Execute the scan
-        logger.info(
-            "Starting Nuclei scan | Rate Limit: %d | Timeout: %d",
-            scan_request.rate_limit,
-            scan_request.timeout,
-        )
-        results = await nuclei_service.scan_target(
-            target=str(scan_request.target_url),
-            severity=scan_request.severity_levels,
-            rate_limit=scan_request.rate_limit,
-            timeout=scan_request.timeout,
-        )
-        
-        # Log scan results summary
-        findings_count = len(results.get("findings", []))
-        has_warnings = bool(results.get("warnings"))
-        logger.info(
-            "Scan completed | Findings: %d | Has Warnings: %s",
-            findings_count,
-            has_warnings,
-        )
-        
-        if has_warnings:
-            logger.warning("Scan warnings: %s", results.get("warnings"))
-            
-        # Update scan with results
-        logger.debug("Updating scan with results in database")
-        await scan_dao.update_scan(
-            scan_id,
-            {
-                "status": ScanStatus.COMPLETED,
-                "findings": results,
-                "total_findings": findings_count,
-                "warnings": results.get("warnings"),
-                "completed_at": datetime.now()
-            }
-        )
-        logger.info("Scan results saved successfully to database")
+        async with AsyncExitStack() as leases:
+            # Pin the template version so an update during the scan
+            # doesn't change or remove the templates it runs with
+            templates_dir = leases.enter_context(template_manager.pin())
+            template_version = templates_dir.name if templates_dir else None
+
+            # Execute the scan, possibly in the same Nuclei process as
+            # other pending scans with identical options
+            results = await coalescer.scan(
+                nuclei_service,
+                target=str(scan_request.target_url),
+                on_start=lambda: run.start(leases, host_limiter, template_version),
+                sink=run.store_findings,
+                severity=scan_request.severity_levels,
+                templates=scan_request.templates,
+                timeout=scan_request.timeout,
+                templates_dir=str(templates_dir) if templates_dir else None,
+                on_progress=run.publish_progress,
+                control=run.control,
+                # Someone waits for interactive scans, they start alone
+                coalesce=scan_request.priority != ScanPriority.INTERACTIVE,
+                priority=SLOT_PRIORITY[scan_request.priority],
+            )
+
+        if results is not None:
+            await run.finish(results, nuclei_service, findings_store)
         
     except NucleiError as e:
         logger.error(
@@ -94,13 +381,7 @@ async def run_scan(
             str(e),
             exc_info=True,
         )
-        await scan_dao.update_scan(
-            scan_id,
-            {
-                "status": ScanStatus.FAILED,
-                "error_message": str(e)
-            }
-        )
+        await run.fail(str(e))
         logger.info("Scan status updated to FAILED due to Nuclei error")
         
     except Exception as e:
@@ -112,18 +393,56 @@ async def run_scan(
             str(e),
             error_trace,
         )
-        await scan_dao.update_scan(
-            scan_id,
-            {
-                "status": ScanStatus.FAILED,
-                "error_message": f"Unexpected error: {str(e)}"
-            }
-        )
+        await run.fail(f"Unexpected error: {str(e)}")
         logger.info("Scan status updated to FAILED due to unexpected error")
     
     finally:
+        run.close()
         logger.info(
             "Scan task completed | ID: %d | Target: %s",
             scan_id,
             scan_request.target_url,
-        )
\ No newline at end of file
+        )
+
+
+async def enqueue_scan(scan_id: int, scan_request: ScanRequest) -> None:
+    """
+    Send a scan task to the lane of its priority.
+
+    Args:
+        scan_id: The ID of the scan in the database
+        scan_request: The scan request parameters
+    """
+    kicker = run_scan.kicker().with_labels(**lane_labels(scan_request.priority.value))
+    await kicker.kiq(scan_id, scan_request)
+
+
+@broker.task(schedule=[{"cron": settings.scan_partition_schedule}])
+async def maintain_scan_partitions(
+    session_factory: Annotated[
+        SessionFactory,
+        TaskiqDepends(get_db_session_factory),
+    ],
+    findings_store: Annotated[FindingsStore, TaskiqDepends(get_findings_store)],
+    scan_cache: Annotated[ScanCache, TaskiqDepends(get_scan_cache)],
+) -> List[str]:
+    """
+    Create upcoming scan partitions and archive expired ones.
+
+    Args:
+        session_factory: Factory of database sessions
+        findings_store: Store holding offloaded findings of the scans
+        scan_cache: Cached API responses of the scans
+
+    Returns:
+        Names of the archived partitions
+    """
+    retention = ScanRetention(
+        session_factory,
+        LocalBlobBackend(settings.scan_archive_dir),
+        findings_store,
+        scan_cache,
+        months=settings.scan_retention_months,
+        ahead=settings.scan_partitions_ahead,
+    )
+    return await retention.run()
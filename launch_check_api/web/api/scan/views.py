@@ -1,14 +1,66 @@
 import logging
-from fastapi import APIRouter, Depends
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from redis.asyncio import ConnectionPool
+from redis.exceptions import RedisError
+from sqlalchemy import Row
+
+from launch_check_api.db.dao.finding_dao import FindingDAO
 from launch_check_api.db.dao.scan_dao import ScanDAO
-from launch_check_api.web.api.scan.schema import ScanRequest, ScanResponse
-from launch_check_api.web.api.scan.tasks import run_scan
+from launch_check_api.db.models.scan_model import TERMINAL_STATUSES, ScanStatus
+from launch_check_api.services.cancellation import ScanCancellation
+from launch_check_api.services.redis.dependency import get_redis_pool
+from launch_check_api.services.scan_cache import (
+    ScanCache,
+    etag_matches,
+    get_scan_cache,
+    make_etag,
+)
+from launch_check_api.services.scan_events import ScanEvents
+from launch_check_api.services.stream_broker import kiq_many
+from launch_check_api.services.targets import scan_cache_key
+from launch_check_api.settings import settings
+from launch_check_api.web.api.scan.pagination import (
+    decode_finding_cursor,
+    decode_scan_cursor,
+    encode_finding_cursor,
+    encode_scan_cursor,
+)
+from launch_check_api.web.api.scan.schema import (
+    BatchProgress,
+    BatchScanRequest,
+    BatchScanResponse,
+    DEFAULT_SCAN_FIELDS,
+    FindingItem,
+    FindingPage,
+    ScanDetail,
+    ScanDiff,
+    ScanListItem,
+    ScanPage,
+    ScanPriority,
+    ScanRequest,
+    ScanResponse,
+    ScanSummary,
+)
+from launch_check_api.web.api.scan.streaming import stream_scan_events
+from launch_check_api.web.api.scan.tasks import enqueue_scan, run_scan
+from launch_check_api.tkq import lane_labels
 
 router = APIRouter()
 
 logger= logging.getLogger(__name__)
 
+def _active_scan_max_age() -> int:
+    """Seconds a pending or running scan is reused for, 0 for ever."""
+    if settings.scan_max_duration <= 0:
+        return 0
+    return settings.scan_max_duration + settings.scan_reuse_grace
+
+
 @router.post("/")
 async def scan_site(
     scan_request: ScanRequest,
@@ -16,15 +68,58 @@ async def scan_site(
 ) -> ScanResponse:
     """
     Create a new scan job and launch it as a background task.
+
+    If an identical scan is pending or running, or completed within
+    ``scan_cache_ttl`` seconds, it is returned instead of starting Nuclei
+    again, unless ``force`` is set. Pending and running scans older than
+    ``scan_max_duration`` plus ``scan_reuse_grace`` are not reused. An
+    interactive request for a pending scan also queues it in the
+    interactive lane; whichever task comes first runs it.
     """
+    target_url = str(scan_request.target_url)
+    cache_key = scan_cache_key(
+        target_url,
+        scan_request.severity_levels,
+        scan_request.templates,
+        scan_request.rate_limit,
+    )
+
+    if not scan_request.force:
+        existing = await scan_dao.find_reusable_scan(
+            cache_key,
+            settings.scan_cache_ttl,
+            active_max_age=_active_scan_max_age(),
+        )
+        if existing is not None:
+            logger.info(
+                "Reusing scan %d for %s | Status: %s",
+                existing.id,
+                target_url,
+                existing.status,
+            )
+            if (
+                existing.status == ScanStatus.PENDING
+                and scan_request.priority == ScanPriority.INTERACTIVE
+            ):
+                await enqueue_scan(existing.id, scan_request)
+            return ScanResponse(
+                scan_id=existing.id,
+                target_url=existing.target_url,
+                status=existing.status,
+                message="Identical scan reused",
+                reused=True,
+            )
+
     scan = await scan_dao.create_scan(
-        target_url=str(scan_request.target_url),
+        target_url=target_url,
         severity_levels=scan_request.severity_levels,
         rate_limit=scan_request.rate_limit,
         timeout=scan_request.timeout,
+        templates=scan_request.templates,
+        cache_key=cache_key,
     )
    
-    await run_scan.kiq(scan.id, scan_request)
+    await enqueue_scan(scan.id, scan_request)
     
     return ScanResponse(
         scan_id=scan.id,
@@ -33,7 +128,395 @@ async def scan_site(
         message="Scan job created successfully"
     )
 
-@router.get("/{scan_id}")
-async def get_scan(scan_id: int, scan_dao: ScanDAO = Depends()):
-    result = await scan_dao.get_scan_by_id(scan_id)
-    return result.__dict__
+@router.post("/batch")
+async def scan_batch(
+    batch_request: BatchScanRequest,
+    scan_dao: ScanDAO = Depends(),
+) -> BatchScanResponse:
+    """
+    Create many scan jobs and launch them as background tasks.
+
+    All scans are inserted with multi-row statements and their tasks are
+    sent to the broker in pipelined batches. Identical requests within the
+    batch share one scan unless ``force`` is set.
+    """
+    batch_id = str(uuid.uuid4())
+    rows: list[Dict[str, Any]] = []
+    requests: list[ScanRequest] = []
+    # Position of each requested scan in `rows`
+    positions: list[int] = []
+    seen: Dict[str, int] = {}
+
+    for scan_request in batch_request.scans:
+        target_url = str(scan_request.target_url)
+        cache_key = scan_cache_key(
+            target_url,
+            scan_request.severity_levels,
+            scan_request.templates,
+            scan_request.rate_limit,
+        )
+        if not scan_request.force and cache_key in seen:
+            positions.append(seen[cache_key])
+            continue
+
+        seen.setdefault(cache_key, len(rows))
+        positions.append(len(rows))
+        requests.append(scan_request)
+        rows.append(
+            {
+                "target_url": target_url,
+                "severity_levels": scan_request.severity_levels,
+                "rate_limit": scan_request.rate_limit,
+                "timeout": scan_request.timeout,
+                "templates": scan_request.templates,
+                "cache_key": cache_key,
+                "batch_id": batch_id,
+            },
+        )
+
+    scan_ids = await scan_dao.create_scans(rows)
+    await kiq_many(
+        run_scan,
+        zip(scan_ids, requests),
+        labels=[lane_labels(request.priority.value) for request in requests],
+    )
+    logger.info("Batch %s created with %d scans", batch_id, len(scan_ids))
+
+    return BatchScanResponse(
+        batch_id=batch_id,
+        scan_ids=[scan_ids[position] for position in positions],
+    )
+
+@router.get("/batch/{batch_id}")
+async def get_batch_progress(
+    batch_id: str,
+    scan_dao: ScanDAO = Depends(),
+) -> BatchProgress:
+    """Get the number of scans of a batch in each status."""
+    counts = await scan_dao.get_batch_progress(batch_id)
+    if not counts:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    return BatchProgress(
+        batch_id=batch_id,
+        total=sum(counts.values()),
+        **{status.value: count for status, count in counts.items()},
+    )
+
+@router.get("/")
+async def list_scans(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    status: Optional[ScanStatus] = None,
+    host: Optional[str] = Query(default=None, max_length=255),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    scan_dao: ScanDAO = Depends(),
+) -> ScanPage:
+    """
+    List scans, newest first, with cursor pagination.
+
+    Pass ``next_cursor`` of a page as ``cursor`` to get the next one.
+    ``host`` matches target hosts starting with the given prefix.
+    """
+    scans = await scan_dao.get_scans(
+        limit=limit + 1,
+        after=decode_scan_cursor(cursor) if cursor else None,
+        status=status,
+        host_prefix=host,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+    next_cursor = None
+    if len(scans) > limit:
+        scans = scans[:limit]
+        next_cursor = encode_scan_cursor(scans[-1].started_at, scans[-1].id)
+
+    return ScanPage(
+        items=[
+            ScanListItem(
+                scan_id=scan.id,
+                target_url=scan.target_url,
+                status=scan.status,
+                started_at=scan.started_at,
+                completed_at=scan.completed_at,
+                total_findings=scan.total_findings,
+            )
+            for scan in scans
+        ],
+        next_cursor=next_cursor,
+    )
+
+@router.get("/{scan_id}", response_model=ScanDetail)
+async def get_scan(
+    scan_id: int,
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma separated fields to return",
+    ),
+    if_none_match: Optional[str] = Header(default=None),
+    scan_dao: ScanDAO = Depends(),
+    finding_dao: FindingDAO = Depends(),
+    scan_cache: ScanCache = Depends(get_scan_cache),
+) -> Response:
+    """
+    Get a scan with a per-severity summary of its findings.
+
+    ``fields`` limits the response to the given fields, e.g.
+    ``?fields=status,total_findings``. The raw ``findings`` payload is
+    only loaded and decompressed when it is requested explicitly.
+
+    Responses carry a strong ETag and ``If-None-Match`` is answered with
+    304 Not Modified. Responses of finished scans are served from the
+    scan cache without touching the database.
+    """
+    selected = DEFAULT_SCAN_FIELDS
+    if fields:
+        requested = (field.strip() for field in fields.split(","))
+        selected = tuple(dict.fromkeys(field for field in requested if field))
+        unknown = set(selected) - set(ScanDetail.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+
+    variant = ",".join(selected)
+    body = await scan_cache.get(scan_id, variant)
+    if body is None:
+        columns = [
+            field
+            for field in selected
+            if field not in ("findings", "findings_summary")
+        ]
+        # The status decides whether the response can be cached.
+        row = await scan_dao.get_scan_fields(
+            scan_id,
+            columns if "status" in columns else [*columns, "status"],
+        )
+        if row is None:
+            raise HTTPException(status_code=404, detail="Scan not found")
+
+        values = row._asdict()
+        scan = {column: values[column] for column in columns}
+        if "findings" in selected:
+            scan["findings"] = await scan_dao.load_findings(scan_id)
+        if "findings_summary" in selected:
+            scan["findings_summary"] = await finding_dao.count_by_severity(scan_id)
+        body = ScanDetail(**scan).model_dump_json(exclude_unset=True).encode()
+        if row.status in TERMINAL_STATUSES:
+            await scan_cache.set(scan_id, variant, body)
+
+    etag = make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _finding_item(row: Row[Any]) -> FindingItem:
+    """
+    Build the API model of a finding.
+
+    :param row: finding with its sightings, see FindingDAO.get_findings.
+    :return: finding item.
+    """
+    item = FindingItem.model_validate(row.FindingModel, from_attributes=True)
+    item.first_seen = row.first_seen
+    item.last_seen = row.last_seen
+    return item
+
+
+@router.get("/{scan_id}/findings")
+async def get_scan_findings(
+    scan_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    severity: Optional[List[str]] = Query(default=None),
+    scan_dao: ScanDAO = Depends(),
+    finding_dao: FindingDAO = Depends(),
+) -> FindingPage:
+    """
+    List findings of a scan with cursor pagination.
+
+    Pass ``next_cursor`` of a page as ``cursor`` to get the next one.
+    ``severity`` can be repeated to filter on several severities.
+    Findings carry when they were first and last seen in a completed scan
+    of the host.
+    """
+    findings = await finding_dao.get_findings(
+        scan_id,
+        limit=limit + 1,
+        after=decode_finding_cursor(cursor) if cursor else None,
+        severities=[level.lower() for level in severity] if severity else None,
+    )
+    if not findings and await scan_dao.get_scan_fields(scan_id, ["id"]) is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    next_cursor = None
+    if len(findings) > limit:
+        findings = findings[:limit]
+        next_cursor = encode_finding_cursor(findings[-1].FindingModel.id)
+
+    return FindingPage(
+        items=[_finding_item(finding) for finding in findings],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/{scan_id}/diff")
+async def get_scan_diff(
+    scan_id: int,
+    limit: int = Query(default=500, ge=1, le=5000),
+    scan_dao: ScanDAO = Depends(),
+    finding_dao: FindingDAO = Depends(),
+) -> ScanDiff:
+    """
+    Compare the findings of a scan with the previous completed scan.
+
+    The previous scan is the last completed one of the same target and
+    configuration. Findings are matched by fingerprint, ``new`` and
+    ``resolved`` hold at most ``limit`` findings each. Without a previous
+    scan every finding is new. Each finding carries when it was first and
+    last seen in a completed scan of the host.
+    """
+    if await scan_dao.get_scan_fields(scan_id, ["id"]) is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    previous_scan_id = await scan_dao.get_previous_scan_id(scan_id)
+    new = await finding_dao.get_findings_not_in(scan_id, previous_scan_id, limit)
+    resolved: List[FindingItem] = []
+    if previous_scan_id is not None:
+        resolved = [
+            _finding_item(finding)
+            for finding in await finding_dao.get_findings_not_in(
+                previous_scan_id,
+                scan_id,
+                limit,
+            )
+        ]
+
+    return ScanDiff(
+        scan_id=scan_id,
+        previous_scan_id=previous_scan_id,
+        new=[_finding_item(finding) for finding in new],
+        resolved=resolved,
+    )
+
+
+@router.get("/{scan_id}/summary")
+async def get_scan_summary(
+    scan_id: int,
+    scan_dao: ScanDAO = Depends(),
+) -> ScanSummary:
+    """Get status, duration and severity counters of a scan."""
+    row = await scan_dao.get_scan_summary(scan_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    duration = None
+    if row.completed_at and row.started_at:
+        duration = (row.completed_at - row.started_at).total_seconds()
+
+    return ScanSummary(
+        scan_id=row.id,
+        target_url=row.target_url,
+        status=row.status,
+        started_at=row.started_at,
+        completed_at=row.completed_at,
+        duration=duration,
+        total_findings=row.total_findings,
+        critical_count=row.critical_count,
+        high_count=row.high_count,
+        medium_count=row.medium_count,
+        low_count=row.low_count,
+        info_count=row.info_count,
+    )
+
+
+@router.get("/{scan_id}/events")
+async def get_scan_events(
+    scan_id: int,
+    request: Request,
+    scan_dao: ScanDAO = Depends(),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> StreamingResponse:
+    """
+    Stream status and progress of a scan as Server-Sent Events.
+
+    The current status is sent first, followed by ``progress`` events
+    while Nuclei runs and ``status`` events on every status change. The
+    stream ends once the scan finished.
+    """
+    row = await scan_dao.get_scan_summary(scan_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    current = {"event": "status", "scan_id": scan_id, "status": row.status.value}
+    if row.total_findings is not None:
+        current["total_findings"] = row.total_findings
+
+    return StreamingResponse(
+        stream_scan_events(request, ScanEvents(redis_pool), current),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{scan_id}/cancel", status_code=202)
+async def cancel_scan(
+    scan_id: int,
+    scan_dao: ScanDAO = Depends(),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> ScanResponse:
+    """
+    Cancel a pending or running scan.
+
+    Pending scans are cancelled right away. Running scans are stopped by
+    their worker, which keeps the findings collected so far and marks the
+    scan as cancelled shortly after.
+    """
+    scan = await scan_dao.update_scan(
+        scan_id,
+        {
+            "status": ScanStatus.CANCELLED,
+            "error_message": "Scan cancelled",
+            "completed_at": datetime.now(timezone.utc),
+        },
+        expected_status=[ScanStatus.PENDING],
+    )
+    if scan is not None:
+        await ScanEvents(redis_pool).publish(
+            scan_id,
+            "status",
+            status=ScanStatus.CANCELLED.value,
+        )
+        return ScanResponse(
+            scan_id=scan.id,
+            target_url=scan.target_url,
+            status=scan.status,
+            message="Scan cancelled",
+        )
+
+    row = await scan_dao.get_scan_summary(scan_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    if row.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail="Scan already finished")
+
+    try:
+        await ScanCancellation(redis_pool).request(scan_id)
+    except RedisError as error:
+        logger.error("Failed to request cancellation of scan %d: %s", scan_id, error)
+        raise HTTPException(
+            status_code=503,
+            detail="Cancellation could not be requested",
+        ) from error
+
+    return ScanResponse(
+        scan_id=row.id,
+        target_url=row.target_url,
+        status=row.status,
+        message="Cancellation requested",
+    )
@@ -1,10 +1,11 @@
 from importlib import metadata
 
 from fastapi import FastAPI
-from fastapi.responses import UJSONResponse
 
 from launch_check_api.web.api.router import api_router
 from launch_check_api.web.lifespan import lifespan_setup
+from launch_check_api.web.middleware import RequestMetricsMiddleware
+from launch_check_api.web.responses import FastJSONResponse
 
 
 def get_app() -> FastAPI:
@@ -22,9 +23,11 @@ def get_app() -> FastAPI:
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         openapi_url="/api/openapi.json",
-        default_response_class=UJSONResponse,
+        default_response_class=FastJSONResponse,
     )
 
+    app.add_middleware(RequestMetricsMiddleware)
+
     # Main router for the API.
     app.include_router(router=api_router, prefix="/api")
 
@@ -1,12 +1,64 @@
+import logging
+import os
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from prometheus_client import start_http_server
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 
+from launch_check_api.db.pool import TimedAsyncAdaptedQueuePool
+from launch_check_api.db.routing import REPLICAS_KEY
+from launch_check_api.services import fastjson
+from launch_check_api.services.coalescer import ScanCoalescer
+from launch_check_api.services.metrics import metrics_registry
+from launch_check_api.services.nuclei import NucleiError, NucleiService
+from launch_check_api.services.redis.lifespan import init_redis, shutdown_redis
+from launch_check_api.services.scheduler import NucleiScheduler, default_concurrency
+from launch_check_api.services.templates import TemplateManager
 from launch_check_api.settings import settings
 from launch_check_api.tkq import broker
 
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(
+    url: str,
+    pool_size: int,
+    max_overflow: int,
+    pool_pre_ping: bool,
+    statement_cache_size: int,
+) -> AsyncEngine:  # pragma: no cover
+    """
+    Creates an engine with a timed connection pool.
+
+    :param url: database URL.
+    :param pool_size: connections kept open.
+    :param max_overflow: connections opened on top of pool_size under load.
+    :param pool_pre_ping: check connections before handing them out.
+    :param statement_cache_size: prepared statements cached per connection.
+    :return: engine.
+    """
+    return create_async_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=pool_pre_ping,
+        # JSON columns use the encoder of findings and API responses
+        json_serializer=fastjson.dumps_str,
+        json_deserializer=fastjson.loads,
+        connect_args={
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": statement_cache_size,
+        },
+    )
+
 
 def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     """
@@ -15,18 +67,121 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     This function creates SQLAlchemy engine instance,
     session_factory for creating sessions
     and stores them in the application's state property.
+    Engines of read replicas are passed to sessions in their info,
+    see replica_bind.
+
+    :param app: fastAPI application.
+    """
+    engine, *replicas = (
+        _create_engine(
+            url,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            statement_cache_size=settings.db_statement_cache_size,
+        )
+        for url in (str(settings.db_url), *settings.db_replica_urls)
+    )
+    session_factory = async_sessionmaker(
+        engine,
+        expire_on_commit=False,
+        info={REPLICAS_KEY: replicas},
+    )
+    app.state.db_engine = engine
+    app.state.db_replica_engines = replicas
+    app.state.db_session_factory = session_factory
+
+
+def _setup_worker_db(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates connection to the database for taskiq workers.
+
+    Workers get their own engine with a pool sized for short-lived
+    sessions around database writes, instead of the API's pool.
 
     :param app: fastAPI application.
     """
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    engine = _create_engine(
+        str(settings.db_url),
+        pool_size=settings.worker_db_pool_size,
+        max_overflow=settings.worker_db_max_overflow,
+        pool_pre_ping=settings.worker_db_pool_pre_ping,
+        statement_cache_size=settings.worker_db_statement_cache_size,
+    )
     session_factory = async_sessionmaker(
         engine,
         expire_on_commit=False,
     )
     app.state.db_engine = engine
+    app.state.db_replica_engines = []
     app.state.db_session_factory = session_factory
 
 
+def _setup_nuclei_scheduler(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the Nuclei scheduler and scan coalescer.
+
+    The scheduler bounds concurrent Nuclei processes and the coalescer
+    shares them between compatible scans.
+
+    :param app: fastAPI application.
+    """
+    limit = settings.nuclei_max_concurrency or default_concurrency(
+        settings.nuclei_process_memory_mb,
+    )
+    app.state.nuclei_scheduler = NucleiScheduler(limit)
+    app.state.scan_coalescer = ScanCoalescer(
+        app.state.nuclei_scheduler,
+        max_targets=settings.scan_coalesce_max_targets,
+    )
+
+
+async def _setup_templates(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the Nuclei template manager and warms up its templates.
+
+    Templates are downloaded before the worker takes scans, unless another
+    worker sharing the directory did it recently. A failed update is only
+    logged, scans then use the last installed version.
+
+    :param app: fastAPI application.
+    """
+    manager = TemplateManager(
+        settings.nuclei_templates_dir,
+        max_age=settings.nuclei_templates_max_age,
+        keep=settings.nuclei_templates_keep,
+    )
+    app.state.template_manager = manager
+    try:
+        version = await manager.ensure(NucleiService())
+    except NucleiError as error:
+        logger.warning("Could not warm up Nuclei templates: %s", error)
+    else:
+        logger.info("Using Nuclei templates %s", version)
+
+
+def _setup_worker_metrics() -> None:  # pragma: no cover
+    """
+    Serves metrics of the workers on a separate port.
+
+    The worker process that binds the port first serves the metrics, the
+    others only log. Only with PROMETHEUS_MULTIPROC_DIR set for the
+    workers, as the API doesn't set it for them, do these include the
+    metrics of all worker processes.
+    """
+    if not settings.worker_metrics_port:
+        return
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set, worker metrics only cover "
+            "the process serving them",
+        )
+    try:
+        start_http_server(settings.worker_metrics_port, registry=metrics_registry())
+    except OSError as error:
+        logger.info("Worker metrics are not served by this process: %s", error)
+
+
 @asynccontextmanager
 async def lifespan_setup(
     app: FastAPI,
@@ -44,10 +199,19 @@ async def lifespan_setup(
     app.middleware_stack = None
     if not broker.is_worker_process:
         await broker.startup()
-    _setup_db(app)
+        _setup_db(app)
+    else:
+        _setup_worker_db(app)
+        _setup_nuclei_scheduler(app)
+        _setup_worker_metrics()
+        await _setup_templates(app)
+    init_redis(app)
     app.middleware_stack = app.build_middleware_stack()
 
     yield
     if not broker.is_worker_process:
         await broker.shutdown()
     await app.state.db_engine.dispose()
+    for replica in app.state.db_replica_engines:
+        await replica.dispose()
+    await shutdown_redis(app)
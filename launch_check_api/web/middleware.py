@@ -0,0 +1,46 @@
+import time
+from typing import Optional
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from launch_check_api.services.metrics import http_request_duration
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the latency of API requests by method, route and status.
+
+    Requests are labelled with the route template, e.g.
+    ``/api/scans/{scan_id}``, so the number of series stays bounded.
+    Streaming responses are timed until the stream ends.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Time a request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope.
+            route: Optional[BaseRoute] = scope.get("route")
+            http_request_duration.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,18 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from launch_check_api.services import fastjson
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded like findings and JSON columns, see fastjson."""
+
+    def render(self, content: Any) -> bytes:
+        """
+        Encode the response body.
+
+        :param content: JSON compatible content.
+        :return: compact UTF-8 JSON.
+        """
+        return fastjson.dumps(content)
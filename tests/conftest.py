@@ -1,8 +1,11 @@
+import stat
+from pathlib import Path
 from typing import Any, AsyncGenerator
 
 import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient
+from redis.asyncio import ConnectionPool
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -12,6 +15,8 @@ from sqlalchemy.ext.asyncio import (
 
 from launch_check_api.db.dependencies import get_db_session
 from launch_check_api.db.utils import create_database, drop_database
+from launch_check_api.services.nuclei import NucleiService
+from launch_check_api.services.scan_cache import ScanCache, get_scan_cache
 from launch_check_api.settings import settings
 from launch_check_api.web.application import get_app
 
@@ -92,6 +97,11 @@ def fastapi_app(
     """
     application = get_app()
     application.dependency_overrides[get_db_session] = lambda: dbsession
+    # Test databases reuse scan ids, never serve responses cached by other runs.
+    application.dependency_overrides[get_scan_cache] = lambda: ScanCache(
+        ConnectionPool(),
+        ttl=0,
+    )
     return application
 
 
@@ -108,3 +118,31 @@ async def client(
     """
     async with AsyncClient(app=fastapi_app, base_url="http://test", timeout=2.0) as ac:
         yield ac
+
+
+FAKE_NUCLEI = """#!/bin/sh
+i=0
+while [ "$i" -lt 7 ]; do
+  echo '{"template-id": "tpl-'$i'", "info": {"severity": "high"}}'
+  i=$((i + 1))
+done
+echo "not json"
+echo "[WRN] fake warning" >&2
+echo '{"duration": "0:00:01", "percent": "100", "requests": "20", "rps": "20"}' >&2
+"""
+
+
+@pytest.fixture
+def nuclei_service(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> NucleiService:
+    """
+    Nuclei service backed by a fake nuclei binary.
+
+    :param tmp_path: temporary directory for the fake binary.
+    :param monkeypatch: pytest monkeypatch.
+    :return: nuclei service.
+    """
+    binary = tmp_path / "nuclei"
+    binary.write_text(FAKE_NUCLEI)
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    return NucleiService()
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from launch_check_api.db.dao.rollup_dao import RollupDAO
+from launch_check_api.db.dao.scan_dao import ScanDAO
+from launch_check_api.db.models.rollup_model import RollupPeriod
+from launch_check_api.db.models.scan_model import ScanModel, ScanStatus
+from launch_check_api.services.targets import scan_cache_key
+
+
+async def complete_scan(
+    dbsession: AsyncSession,
+    target_url: str,
+    started_at: datetime,
+    counts: Dict[str, int],
+    severity_levels: Optional[List[str]] = None,
+) -> ScanModel:
+    """
+    Store a completed scan and add it to the rollups.
+
+    :param dbsession: database session.
+    :param target_url: scanned URL.
+    :param started_at: start of the scan.
+    :param counts: findings by severity column.
+    :param severity_levels: severities scanned for, high by default.
+    :return: completed scan.
+    """
+    dao = ScanDAO(dbsession)
+    severity_levels = severity_levels or ["high"]
+    scan = await dao.create_scan(
+        target_url=target_url,
+        severity_levels=severity_levels,
+        cache_key=scan_cache_key(target_url, severity_levels, None, 150),
+    )
+    finished = await dao.update_scan(
+        scan.id,
+        {
+            "status": ScanStatus.COMPLETED,
+            "started_at": started_at,
+            "total_findings": sum(counts.values()),
+            **counts,
+        },
+    )
+    assert finished is not None
+    await RollupDAO(dbsession).record_scan(finished)
+    return finished
+
+
+@pytest.mark.anyio
+async def test_target_trend(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Trends hold the last scan of each bucket and configuration.
+
+    Worst hosts are ranked by their worst configuration.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    now = datetime.now(timezone.utc).replace(hour=12)
+    yesterday = now - timedelta(days=1)
+    await complete_scan(dbsession, "https://a.example/", yesterday, {"high_count": 3})
+    latest = await complete_scan(
+        dbsession,
+        "https://a.example/",
+        now,
+        {"high_count": 1, "info_count": 2},
+    )
+    # Recording the last scan of a bucket again changes nothing
+    await RollupDAO(dbsession).record_scan(latest)
+    # Started before the other scan of the day, doesn't replace its counts
+    await complete_scan(
+        dbsession,
+        "https://a.example/",
+        now - timedelta(hours=1),
+        {"high_count": 9},
+    )
+    # Other configurations of the host get their own points
+    await complete_scan(
+        dbsession,
+        "https://a.example/admin",
+        now,
+        {"high_count": 4},
+    )
+    await complete_scan(
+        dbsession,
+        "https://a.example/",
+        now,
+        {"low_count": 5},
+        severity_levels=["low"],
+    )
+    await complete_scan(dbsession, "https://b.example/", now, {"critical_count": 1})
+
+    url = fastapi_app.url_path_for("get_target_trend", host="A.example")
+    trend = (await client.get(url, params={"days": 7})).json()
+    assert trend["target_host"] == "a.example"
+    points = [
+        (
+            point["period_start"],
+            point["target_url"],
+            point["severity_levels"],
+            point["scans"],
+            point["total_findings"],
+        )
+        for point in trend["points"]
+    ]
+    assert points[0] == (
+        yesterday.date().isoformat(),
+        "https://a.example/",
+        ["high"],
+        1,
+        3,
+    )
+    assert sorted(points[1:]) == [
+        (now.date().isoformat(), "https://a.example/", ["high"], 2, 3),
+        (now.date().isoformat(), "https://a.example/", ["low"], 1, 5),
+        (now.date().isoformat(), "https://a.example/admin", ["high"], 1, 4),
+    ]
+
+    weekly = (await client.get(url, params={"period": RollupPeriod.WEEK.value})).json()
+    this_week = [
+        point
+        for point in weekly["points"]
+        if point["period_start"] == RollupPeriod.WEEK.start_of(now.date()).isoformat()
+        and point["target_url"] == "https://a.example/"
+        and point["severity_levels"] == ["high"]
+    ]
+    assert [point["high_count"] for point in this_week] == [1]
+
+    worst = (await client.get(fastapi_app.url_path_for("get_worst_hosts"))).json()
+    assert [
+        (host["target_host"], host["target_url"], host["high_count"]) for host in worst
+    ] == [
+        ("b.example", "https://b.example/", 0),
+        ("a.example", "https://a.example/admin", 4),
+    ]
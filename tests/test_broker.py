@@ -0,0 +1,85 @@
+import json
+from typing import Any, AsyncGenerator, Dict, List
+
+import pytest
+from taskiq import AsyncBroker, BrokerMessage
+
+from launch_check_api.services.stream_broker import ScanStreamBroker, kiq_many
+from launch_check_api.web.api.scan.schema import ScanRequest
+
+
+class RecordingBroker(AsyncBroker):
+    """Broker keeping the messages it is asked to send."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: List[BrokerMessage] = []
+
+    async def kick(self, message: BrokerMessage) -> None:
+        """
+        Keep a message instead of sending it.
+
+        :param message: message to send.
+        """
+        self.sent.append(message)
+
+    async def listen(self) -> AsyncGenerator[bytes, None]:
+        """
+        Never receive anything.
+
+        :yield: nothing.
+        """
+        messages: List[bytes] = []
+        for message in messages:
+            yield message
+
+
+def _decoded(message: BrokerMessage) -> Dict[str, Any]:
+    """
+    Decode a sent message, without its random task id.
+
+    :param message: sent message.
+    :return: message fields.
+    """
+    fields = json.loads(message.message)
+    assert fields.pop("task_id") == message.task_id
+    return {**fields, "broker_labels": message.labels}
+
+
+def test_priority_lanes() -> None:
+    """Lanes get their own streams and share reads by weight."""
+    broker = ScanStreamBroker(
+        "redis://localhost",
+        lane_weights={"interactive": 2, "standard": 1, "bulk": 0},
+        queue_name="scans",
+    )
+
+    assert broker.lane("standard") == "scans"
+    assert broker.lane("interactive") == "scans:interactive"
+    assert broker.lane_weights == {"scans:interactive": 2, "scans": 1}
+    assert list(broker.additional_streams) == ["scans:interactive"]
+    assert broker._schedule == [  # noqa: SLF001
+        "scans:interactive",
+        "scans",
+        "scans:interactive",
+    ]
+
+
+@pytest.mark.anyio
+async def test_kiq_many_sends_what_kiq_sends() -> None:
+    """Batched messages match the ones kiq sends for the same call."""
+    broker = RecordingBroker()
+
+    @broker.task(task_name="scan", retry_on_error=False)
+    async def scan(scan_id: int, scan_request: ScanRequest) -> None:
+        """Do nothing."""
+
+    scan_request = ScanRequest.model_validate({"target_url": "https://example.com/"})
+    labels = {"queue_name": "scans:interactive"}
+    await scan.kicker().with_labels(**labels).kiq(1, scan_request)
+    await kiq_many(scan, [(1, scan_request), (2, scan_request)], [labels, {}])
+
+    kiq, *batch = [_decoded(message) for message in broker.sent]
+    assert batch[0] == kiq
+    assert batch[1]["args"] == [2, kiq["args"][1]]
+    assert batch[1]["labels"] == {"retry_on_error": "False"}
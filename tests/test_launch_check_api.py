@@ -1,8 +1,11 @@
 import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from launch_check_api.db.dao.scan_dao import ScanDAO
+
 
 @pytest.mark.anyio
 async def test_health(client: AsyncClient, fastapi_app: FastAPI) -> None:
@@ -15,3 +18,45 @@ async def test_health(client: AsyncClient, fastapi_app: FastAPI) -> None:
     url = fastapi_app.url_path_for("health_check")
     response = await client.get(url)
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.anyio
+async def test_metrics(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Checks the metrics endpoint.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    url = fastapi_app.url_path_for("metrics")
+    before = _sample(
+        (await client.get(url)).text,
+        'launch_check_scan_status_changes_total{status="pending"}',
+    )
+    await ScanDAO(dbsession).create_scan("https://example.com", ["high"])
+    await client.get(fastapi_app.url_path_for("health_check"))
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert 'launch_check_scan_status_changes_total{status="completed"}' in (
+        response.text
+    )
+    assert (
+        _sample(
+            response.text,
+            'launch_check_scan_status_changes_total{status="pending"}',
+        )
+        == before + 1
+    )
+    assert 'route="/api/health"' in response.text
+
+
+def _sample(text: str, series: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(f"{series} "):
+            return float(line.split()[-1])
+    raise AssertionError(f"{series} not exposed")
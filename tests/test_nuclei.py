@@ -0,0 +1,364 @@
+import asyncio
+import stat
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from benchmarks import fake_nuclei
+from launch_check_api.services.coalescer import ScanCoalescer
+from launch_check_api.services.nuclei import Finding, NucleiService, ScanControl
+from launch_check_api.services.scheduler import NucleiScheduler
+from launch_check_api.services.templates import TemplateManager
+
+
+@pytest.mark.anyio
+async def test_scan_target_streams_batches(nuclei_service: NucleiService) -> None:
+    """
+    Findings are passed to the sink in bounded batches.
+
+    :param nuclei_service: nuclei service with a fake binary.
+    """
+    batches: List[List[Finding]] = []
+    progress: List[Dict[str, Any]] = []
+
+    async def sink(findings: List[Finding]) -> None:
+        batches.append(findings)
+
+    async def on_progress(report: Dict[str, Any]) -> None:
+        progress.append(report)
+
+    results = await nuclei_service.scan_target(
+        "https://example.com",
+        sink=sink,
+        batch_size=3,
+        on_progress=on_progress,
+    )
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert batches[0][0].template_id == "tpl-0"
+    assert batches[0][0].severity == "high"
+    assert batches[0][0].raw.startswith(b'{"template-id": "tpl-0"')
+    assert results["total_findings"] == 7
+    assert results["severity_count"]["high"] == 7
+    assert "findings" not in results
+    assert "fake warning" in str(results["warnings"])
+    assert "percent" not in str(results["warnings"])
+    assert progress[-1]["percent"] == 100
+    assert progress[-1]["rps"] == 20
+
+
+@pytest.mark.anyio
+async def test_scan_target_collects_without_sink(
+    nuclei_service: NucleiService,
+) -> None:
+    """
+    Without a sink all findings are returned.
+
+    :param nuclei_service: nuclei service with a fake binary.
+    """
+    results = await nuclei_service.scan_target("https://example.com")
+
+    assert results["total_findings"] == 7
+    assert len(results["findings"]) == 7
+
+
+FAKE_NUCLEI_SLOW = """#!/bin/sh
+echo '{"template-id": "tpl-0", "info": {"severity": "high"}}'
+echo '{"template-id": "tpl-1", "info": {"severity": "low"}}'
+sleep 30
+"""
+
+
+@pytest.mark.anyio
+async def test_scan_target_deadline(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    A scan over its deadline is killed and keeps its findings.
+
+    The fake binary waits in a child process holding stdout, so the scan
+    only ends this early if the whole process group is killed.
+
+    :param tmp_path: temporary directory for the fake binary.
+    :param monkeypatch: pytest monkeypatch.
+    """
+    binary = tmp_path / "nuclei"
+    binary.write_text(FAKE_NUCLEI_SLOW)
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}:/usr/bin:/bin")
+
+    results = await asyncio.wait_for(
+        NucleiService().scan_target(
+            "https://example.com",
+            control=ScanControl(max_duration=0.5),
+        ),
+        timeout=10,
+    )
+
+    assert results["status"] == "timed_out"
+    assert results["total_findings"] == 2
+    assert results["severity_count"]["low"] == 1
+
+    control = ScanControl()
+    scan = asyncio.create_task(
+        NucleiService().scan_target("https://example.com", control=control),
+    )
+    await asyncio.sleep(0.2)
+    control.cancel()
+    results = await asyncio.wait_for(scan, timeout=10)
+    assert results["status"] == "cancelled"
+    assert results["total_findings"] == 2
+
+
+@pytest.mark.anyio
+async def test_scheduler_bounds_concurrency() -> None:
+    """Scans past the limit wait until a slot is released."""
+    scheduler = NucleiScheduler(2)
+    peak = 0
+
+    async def scan() -> None:
+        nonlocal peak
+        async with scheduler.slot():
+            peak = max(peak, scheduler.running)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(scan() for _ in range(5)))
+
+    assert peak == 2
+    assert scheduler.running == 0
+    assert scheduler.waiting == 0
+
+
+@pytest.mark.anyio
+async def test_scheduler_prefers_priority() -> None:
+    """Freed slots go to the lowest priority first, then in arrival order."""
+    scheduler = NucleiScheduler(1)
+    order: List[str] = []
+
+    async def scan(name: str, priority: int) -> None:
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    async with scheduler.slot():
+        waiting = [
+            asyncio.create_task(scan("bulk", 2)),
+            asyncio.create_task(scan("standard", 1)),
+            asyncio.create_task(scan("cancelled", 0)),
+            asyncio.create_task(scan("interactive", 0)),
+        ]
+        await asyncio.sleep(0.01)
+        waiting[2].cancel()
+        assert scheduler.waiting == 4
+    await asyncio.gather(*waiting, return_exceptions=True)
+
+    assert order == ["interactive", "standard", "bulk"]
+    assert scheduler.running == 0
+    assert scheduler.waiting == 0
+
+
+FAKE_NUCLEI_LIST = """#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls"
+while [ "$#" -gt 0 ]; do
+  if [ "$1" = "-list" ]; then list="$2"; fi
+  shift
+done
+while read -r target || [ -n "$target" ]; do
+  low='"info": {"severity": "low"}'
+  info='"info": {"severity": "info"}'
+  echo '{"template-id": "tpl", "host": "'$target'", '$low'}'
+  echo '{"template-id": "dns", "host": "'${target#https://}'", '$info'}'
+done < "$list"
+"""
+
+
+@pytest.mark.anyio
+async def test_coalescer_shares_one_process(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Compatible scans share one Nuclei process and get their own findings.
+
+    :param tmp_path: temporary directory for the fake binary.
+    :param monkeypatch: pytest monkeypatch.
+    """
+    binary = tmp_path / "nuclei"
+    binary.write_text(FAKE_NUCLEI_LIST)
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}:/usr/bin:/bin")
+    nuclei_service = NucleiService()
+    scheduler = NucleiScheduler(1)
+    coalescer = ScanCoalescer(scheduler, max_targets=10)
+    targets = ["https://a.example.com", "https://b.example.com", "https://c.example"]
+    found: Dict[str, List[Finding]] = {target: [] for target in targets}
+
+    async def scan(target: str) -> Any:
+        async def start() -> Optional[int]:
+            return None if target == "https://c.example" else 20
+
+        async def sink(findings: List[Finding]) -> None:
+            found[target].extend(findings)
+
+        return await coalescer.scan(
+            nuclei_service,
+            target=target,
+            on_start=start,
+            sink=sink,
+        )
+
+    # Scans arriving while the only slot is busy join one group
+    async with scheduler.slot():
+        scans = asyncio.gather(*(scan(target) for target in targets))
+        await asyncio.sleep(0.05)
+    results = await scans
+
+    calls = (tmp_path / "calls").read_text().splitlines()
+    assert len(calls) == 1
+    assert "-rate-limit 40" in calls[0]
+    assert results[2] is None
+    for target, target_results in zip(targets[:2], results):
+        assert target_results["total_findings"] == 2
+        assert {finding.template_id for finding in found[target]} == {
+            "tpl",
+            "dns",
+        }
+        assert all(str(finding.host) in target for finding in found[target])
+
+
+@pytest.mark.anyio
+async def test_coalescer_splits_hosts(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Scans of the same host never share a Nuclei process.
+
+    :param tmp_path: temporary directory for the fake binary.
+    :param monkeypatch: pytest monkeypatch.
+    """
+    binary = tmp_path / "nuclei"
+    binary.write_text(FAKE_NUCLEI_LIST)
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}:/usr/bin:/bin")
+    nuclei_service = NucleiService()
+    scheduler = NucleiScheduler(1)
+    coalescer = ScanCoalescer(scheduler, max_targets=10)
+
+    async def scan(target: str) -> Any:
+        async def start() -> Optional[int]:
+            return 20
+
+        async def sink(findings: List[Finding]) -> None:
+            """Drop findings."""
+
+        return await coalescer.scan(
+            nuclei_service,
+            target=target,
+            on_start=start,
+            sink=sink,
+        )
+
+    async with scheduler.slot():
+        scans = asyncio.gather(
+            scan("https://a.example.com/one"),
+            scan("https://a.example.com/two"),
+        )
+        await asyncio.sleep(0.05)
+    results = await scans
+
+    assert len((tmp_path / "calls").read_text().splitlines()) == 2
+    assert all(result["status"] == "completed" for result in results)
+
+
+FAKE_NUCLEI_UPDATE = """#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls"
+mkdir -p "$3/http"
+cat "$(dirname "$0")/release" > "$3/templates-checksum.txt"
+echo "id: tpl" > "$3/http/tpl.yaml"
+"""
+
+
+@pytest.mark.anyio
+async def test_template_manager_versions(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Templates are installed per version and only updated when stale.
+
+    :param tmp_path: temporary directory for the fake binary.
+    :param monkeypatch: pytest monkeypatch.
+    """
+    binary = tmp_path / "nuclei"
+    binary.write_text(FAKE_NUCLEI_UPDATE)
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}:/usr/bin:/bin")
+    nuclei_service = NucleiService()
+    manager = TemplateManager(tmp_path / "templates", max_age=60, keep=1)
+
+    (tmp_path / "release").write_text("v1")
+    first = await manager.ensure(nuclei_service)
+    assert first is not None
+    current = manager.current()
+    assert current == tmp_path / "templates" / "versions" / first
+    assert (current / "http" / "tpl.yaml").is_file()
+
+    # Fresh templates are not downloaded again.
+    assert await manager.ensure(nuclei_service) == first
+    assert len((tmp_path / "calls").read_text().splitlines()) == 1
+
+    (tmp_path / "release").write_text("v2")
+    with manager.pin() as pinned:
+        second = await manager.update(nuclei_service, force=True)
+        # A scan still uses the previous version.
+        assert pinned is not None
+        assert pinned.name == first
+        assert pinned.is_dir()
+    assert second != first
+    assert manager.current_version() == second
+
+    (tmp_path / "release").write_text("v3")
+    third = await manager.update(nuclei_service, force=True)
+    assert [path.name for path in manager.versions.iterdir()] == [third]
+
+
+@pytest.mark.anyio
+async def test_benchmark_fake_nuclei(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Output of the benchmark's fake Nuclei is parsed and routed to targets.
+
+    :param tmp_path: temporary directory for the fake binary.
+    :param monkeypatch: pytest monkeypatch.
+    """
+    binary = tmp_path / "nuclei"
+    binary.write_text(f'#!/bin/sh\nexec {sys.executable} {fake_nuclei.__file__} "$@"\n')
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}:/usr/bin:/bin")
+    monkeypatch.setenv("FAKE_NUCLEI_FINDINGS", "30")
+    monkeypatch.setenv("FAKE_NUCLEI_PAYLOAD_SIZE", "128")
+    targets = ["https://a.example.com", "https://b.example.com"]
+    found: Dict[str, int] = dict.fromkeys(targets, 0)
+
+    def sink(target: str) -> Any:
+        async def count(findings: List[Finding]) -> None:
+            found[target] += len(findings)
+
+        return count
+
+    results = await NucleiService().scan_targets(
+        targets,
+        [sink(target) for target in targets],
+        severity=["high", "critical"],
+    )
+
+    assert found == dict.fromkeys(targets, 30)
+    for target_results in results:
+        assert target_results["total_findings"] == 30
+        counts = target_results["severity_count"]
+        assert counts["high"] + counts["critical"] == 30
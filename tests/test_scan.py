@@ -0,0 +1,858 @@
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from starlette import status
+
+from launch_check_api.db.dao.finding_dao import FindingDAO
+from launch_check_api.db.dao.partition_dao import PartitionDAO
+from launch_check_api.db.dao.scan_dao import ScanDAO
+from launch_check_api.db.models.fingerprint_model import FingerprintModel
+from launch_check_api.db.models.scan_model import ScanModel, ScanStatus
+from launch_check_api.db.partitions import partition_name
+from launch_check_api.db.routing import REPLICAS_KEY
+from launch_check_api.services.cancellation import ScanCancellation
+from launch_check_api.services.coalescer import ScanCoalescer
+from launch_check_api.services.findings_store import (
+    GZIP,
+    ZSTD,
+    FindingsArchive,
+    FindingsStore,
+    LocalBlobBackend,
+    _decompress,
+)
+from launch_check_api.services.host_limiter import HostRateLimiter
+from launch_check_api.services.nuclei import Finding, NucleiService
+from launch_check_api.services.redis.dependency import get_redis_pool
+from launch_check_api.services.retention import ScanRetention
+from launch_check_api.services.scan_cache import ScanCache, get_scan_cache
+from launch_check_api.services.scan_events import ScanEvents
+from launch_check_api.services.scheduler import NucleiScheduler
+from launch_check_api.services.templates import TemplateManager
+from launch_check_api.settings import settings
+from launch_check_api.web.api.scan import views
+from launch_check_api.web.api.scan.schema import DEFAULT_SCAN_FIELDS, ScanRequest
+from launch_check_api.web.api.scan.tasks import run_scan
+
+
+def nuclei_finding(template_id: str, severity: str) -> Finding:
+    """
+    Build a minimal Nuclei finding.
+
+    :param template_id: id of the template.
+    :param severity: severity of the finding.
+    :return: finding.
+    """
+    return Finding.from_dict(
+        {
+            "template-id": template_id,
+            "info": {"name": template_id, "severity": severity},
+            "host": "example.com",
+            "matched-at": "https://example.com/",
+            "extracted-results": ["value"],
+        },
+    )
+
+
+@pytest.mark.anyio
+async def test_get_scan_findings_summary(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Scan details summarize findings stored in the findings table.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    scan = await ScanDAO(dbsession).create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high", "low"],
+    )
+    findings = [
+        nuclei_finding("a", "high"),
+        nuclei_finding("b", "high"),
+        nuclei_finding("c", "low"),
+    ]
+    assert await FindingDAO(dbsession).bulk_create(scan.id, findings) == 3
+
+    url = fastapi_app.url_path_for("get_scan", scan_id=scan.id)
+    response = await client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["id"] == scan.id
+    assert "findings" not in body
+    assert body["findings_summary"] == {"high": 2, "low": 1}
+
+
+@pytest.mark.anyio
+async def test_get_scan_fields(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Only requested fields are returned.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    scan = await ScanDAO(dbsession).create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    url = fastapi_app.url_path_for("get_scan", scan_id=scan.id)
+
+    response = await client.get(url, params={"fields": "status,total_findings"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "pending", "total_findings": None}
+
+    response = await client.get(url, params={"fields": "status,secret"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class MemoryScanCache(ScanCache):
+    """Scan cache keeping responses in a dict."""
+
+    def __init__(self) -> None:
+        super().__init__(ConnectionPool(), ttl=60)
+        self.responses: Dict[Tuple[int, str], bytes] = {}
+
+    async def get(self, scan_id: int, variant: str) -> Optional[bytes]:
+        """Get a kept response."""
+        return self.responses.get((scan_id, variant))
+
+    async def set(self, scan_id: int, variant: str, body: bytes) -> None:
+        """Keep a response."""
+        self.responses[scan_id, variant] = body
+
+    async def invalidate(self, scan_id: int) -> None:
+        """Drop the kept responses of a scan."""
+        for key in [key for key in self.responses if key[0] == scan_id]:
+            del self.responses[key]
+
+
+@pytest.mark.anyio
+async def test_scan_cache_skips_large_responses(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """
+    Responses over the size limit never reach Redis.
+
+    :param caplog: captured log records.
+    """
+    # Nothing listens there, every write that is attempted fails.
+    cache = ScanCache(
+        ConnectionPool.from_url("redis://127.0.0.1:1"),
+        ttl=60,
+        max_size=8,
+    )
+
+    await cache.set(1, "findings", b"x" * 9)
+    assert not caplog.records
+
+    await cache.set(1, "status", b"x" * 8)
+    assert "Failed to cache scan 1" in caplog.text
+
+
+@pytest.mark.anyio
+async def test_get_scan_etag(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Scans carry an ETag and only responses of finished scans are cached.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    cache = MemoryScanCache()
+    fastapi_app.dependency_overrides[get_scan_cache] = lambda: cache
+    dao = ScanDAO(dbsession, cache)
+    scan = await dao.create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    url = fastapi_app.url_path_for("get_scan", scan_id=scan.id)
+
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["etag"]
+    assert not cache.responses
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+
+    await dao.update_scan(
+        scan.id,
+        {"status": ScanStatus.COMPLETED, "total_findings": 0},
+    )
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    assert response.json()["status"] == "completed"
+    etag = response.headers["etag"]
+    cached = cache.responses[scan.id, ",".join(DEFAULT_SCAN_FIELDS)]
+    assert cached == response.content
+
+    response = await client.get(url, params={"fields": "total_findings"})
+    assert response.json() == {"total_findings": 0}
+    assert (scan.id, "total_findings") in cache.responses
+
+    # Updates drop every cached response of the scan.
+    await dao.update_scan(scan.id, {"warnings": "late"})
+    assert not cache.responses
+    response = await client.get(url)
+    etag = response.headers["etag"]
+
+    # Served from the cache once the row is gone.
+    await dbsession.delete(scan)
+    await dbsession.flush()
+    response = await client.get(url, headers={"If-None-Match": f"W/{etag}"})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    await cache.invalidate(scan.id)
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_get_scan_compressed_findings(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+    tmp_path: Path,
+) -> None:
+    """
+    Compressed raw findings are only loaded when requested.
+
+    Archives are written with zstd, older gzip archives still load.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    :param tmp_path: directory for offloaded payloads.
+    """
+    dao = ScanDAO(dbsession)
+    scan = await dao.create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    archive = FindingsArchive()
+    archive.write([nuclei_finding("a", "high"), nuclei_finding("b", "high")])
+    store = FindingsStore(LocalBlobBackend(tmp_path), inline_max_size=1024 * 1024)
+    await dao.update_scan(scan.id, await store.save(scan.id, archive))
+    url = fastapi_app.url_path_for("get_scan", scan_id=scan.id)
+
+    assert "findings" not in (await client.get(url)).json()
+
+    response = await client.get(url, params={"fields": "findings"})
+    assert [finding["template-id"] for finding in response.json()["findings"]] == [
+        "a",
+        "b",
+    ]
+    assert archive.codec == ZSTD
+
+    legacy = gzip.compress(b'{"template-id": "c"}\n')
+    checksum = hashlib.sha256(legacy).hexdigest()
+    assert await store.load(GZIP, checksum, data=legacy) == [{"template-id": "c"}]
+
+
+@pytest.mark.anyio
+async def test_get_scan_findings_pages(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Findings are paginated with a cursor and filtered by severity.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    scan = await ScanDAO(dbsession).create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high", "low"],
+    )
+    findings = [nuclei_finding(str(index), "high") for index in range(3)]
+    findings.append(nuclei_finding("low", "low"))
+    await FindingDAO(dbsession).bulk_create(scan.id, findings)
+    url = fastapi_app.url_path_for("get_scan_findings", scan_id=scan.id)
+
+    first = (await client.get(url, params={"limit": 2, "severity": "HIGH"})).json()
+    assert [item["template_id"] for item in first["items"]] == ["0", "1"]
+    assert first["items"][0]["extracted_results"] == ["value"]
+
+    second = (
+        await client.get(
+            url,
+            params={"limit": 2, "severity": "high", "cursor": first["next_cursor"]},
+        )
+    ).json()
+    assert [item["template_id"] for item in second["items"]] == ["2"]
+    assert second["next_cursor"] is None
+
+    missing = fastapi_app.url_path_for("get_scan_findings", scan_id=scan.id + 1000)
+    response = await client.get(missing)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_reads_use_replica(dbsession: AsyncSession) -> None:
+    """
+    Read-only queries go to a replica, missing scans fall back to the primary.
+
+    The "replica" is a separate engine, so it doesn't see the scan created
+    in the test transaction yet, like a lagging replica.
+
+    :param dbsession: database session.
+    """
+    scan = await ScanDAO(dbsession).create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    replica = create_async_engine(str(settings.db_url))
+    dbsession.info[REPLICAS_KEY] = [replica]
+    scan_dao = ScanDAO(dbsession)
+
+    try:
+        assert await scan_dao.get_scans() == []
+        summary = await scan_dao.get_scan_summary(scan.id)
+        assert summary is not None
+        assert summary.id == scan.id
+        assert await scan_dao.get_scan_by_id(scan.id) is not None
+    finally:
+        await dbsession.close()
+        await replica.dispose()
+
+
+@pytest.mark.anyio
+async def test_get_missing_scan(client: AsyncClient, fastapi_app: FastAPI) -> None:
+    """
+    Unknown scans return 404.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    url = fastapi_app.url_path_for("get_scan", scan_id=0)
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_get_scan_summary(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Summary returns counters and status without findings.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    dao = ScanDAO(dbsession)
+    scan = await dao.create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    await dao.update_scan(
+        scan.id,
+        {
+            "status": ScanStatus.COMPLETED,
+            "completed_at": scan.started_at + timedelta(seconds=90),
+            "total_findings": 3,
+            **ScanModel.severity_columns({"high": 2, "low": 1}),
+        },
+    )
+
+    url = fastapi_app.url_path_for("get_scan_summary", scan_id=scan.id)
+    response = await client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["status"] == ScanStatus.COMPLETED.value
+    assert body["duration"] == 90
+    assert body["high_count"] == 2
+    assert body["low_count"] == 1
+    assert body["critical_count"] == 0
+    assert "findings" not in body
+
+
+@pytest.mark.anyio
+async def test_identical_scan_is_reused(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Identical requests are coalesced onto the pending scan.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param monkeypatch: pytest monkeypatch.
+    """
+    kicked: List[int] = []
+
+    async def kiq(scan_id: int, *args: Any) -> None:
+        kicked.append(scan_id)
+
+    monkeypatch.setattr(views, "enqueue_scan", kiq)
+    url = fastapi_app.url_path_for("scan_site")
+
+    first = await client.post(url, json={"target_url": "https://Example.com:443"})
+    second = await client.post(url, json={"target_url": "https://example.com/"})
+    forced = await client.post(
+        url,
+        json={"target_url": "https://example.com/", "force": True},
+    )
+
+    assert first.json()["reused"] is False
+    assert second.json()["reused"] is True
+    assert second.json()["scan_id"] == first.json()["scan_id"]
+    assert forced.json()["scan_id"] != first.json()["scan_id"]
+    assert kicked == [first.json()["scan_id"], forced.json()["scan_id"]]
+
+
+@pytest.mark.anyio
+async def test_stale_running_scan_is_not_reused(dbsession: AsyncSession) -> None:
+    """
+    Running scans left behind by a dead worker are not reused.
+
+    :param dbsession: database session.
+    """
+    dao = ScanDAO(dbsession)
+    stale = await dao.create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+        cache_key="stale",
+    )
+    await dbsession.execute(
+        update(ScanModel)
+        .where(ScanModel.id == stale.id)
+        .values(
+            status=ScanStatus.IN_PROGRESS,
+            started_at=datetime.now(timezone.utc) - timedelta(hours=3),
+        ),
+    )
+    await dbsession.commit()
+
+    assert await dao.find_reusable_scan("stale", 0, active_max_age=7200) is None
+    reused = await dao.find_reusable_scan("stale", 0)
+    assert reused is not None
+    assert reused.id == stale.id
+
+    fresh = await dao.create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+        cache_key="stale",
+    )
+    reused = await dao.find_reusable_scan("stale", 0, active_max_age=7200)
+    assert reused is not None
+    assert reused.id == fresh.id
+
+
+@pytest.mark.anyio
+async def test_list_scans_pagination(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Listing walks all scans newest first through cursors.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    dao = ScanDAO(dbsession)
+    created = [
+        await dao.create_scan(target_url=url, severity_levels=["high"])
+        for url in (
+            "https://a.example.com/",
+            "https://b.example.com/",
+            "https://api.example.com/",
+        )
+    ]
+
+    url = fastapi_app.url_path_for("list_scans")
+    seen: List[int] = []
+    cursor = None
+    while True:
+        params: Dict[str, Any] = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = (await client.get(url, params=params)).json()
+        seen.extend(item["scan_id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [scan.id for scan in reversed(created)]
+
+    response = await client.get(url, params={"host": "A"})
+    assert [item["scan_id"] for item in response.json()["items"]] == [
+        created[2].id,
+        created[0].id,
+    ]
+
+    response = await client.get(url, params={"cursor": "not a cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.anyio
+async def test_conditional_status_transition(dbsession: AsyncSession) -> None:
+    """
+    Status updates with an expected status only apply once.
+
+    :param dbsession: database session.
+    """
+    dao = ScanDAO(dbsession)
+    scan = await dao.create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+
+    started = await dao.update_scan(
+        scan.id,
+        {"status": ScanStatus.IN_PROGRESS},
+        expected_status=[ScanStatus.PENDING],
+    )
+    again = await dao.update_scan(
+        scan.id,
+        {"status": ScanStatus.IN_PROGRESS},
+        expected_status=[ScanStatus.PENDING],
+    )
+
+    assert started is not None
+    assert started.status == ScanStatus.IN_PROGRESS
+    assert again is None
+    assert await dao.delete_scan(scan.id) is True
+    assert await dao.delete_scan(scan.id) is False
+
+
+@pytest.mark.anyio
+async def test_run_scan(
+    dbsession: AsyncSession,
+    nuclei_service: NucleiService,
+    tmp_path: Path,
+) -> None:
+    """
+    Scan task stores findings and counters of a Nuclei run.
+
+    :param dbsession: database session.
+    :param nuclei_service: nuclei service with a fake binary.
+    :param tmp_path: directory for templates.
+    """
+    scan = await ScanDAO(dbsession).create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    session_factory = async_sessionmaker(dbsession.bind, expire_on_commit=False)
+    host_limiter = HostRateLimiter(ConnectionPool())
+    host_limiter.budget = 0
+    # Offload every payload to the blob backend
+    findings_store = FindingsStore(
+        LocalBlobBackend(tmp_path / "findings"),
+        inline_max_size=0,
+    )
+
+    await run_scan.original_func(
+        scan.id,
+        ScanRequest.model_validate({"target_url": "https://example.com/"}),
+        session_factory=session_factory,
+        nuclei_service=nuclei_service,
+        coalescer=ScanCoalescer(NucleiScheduler(1), max_targets=1),
+        host_limiter=host_limiter,
+        template_manager=TemplateManager(tmp_path / "templates", max_age=60),
+        events=ScanEvents(ConnectionPool()),
+        findings_store=findings_store,
+        cancellation=ScanCancellation(ConnectionPool()),
+        scan_cache=ScanCache(ConnectionPool(), ttl=0),
+    )
+
+    summary = await ScanDAO(dbsession).get_scan_summary(scan.id)
+    assert summary is not None
+    assert summary.status == ScanStatus.COMPLETED
+    assert summary.total_findings == 7
+    assert summary.high_count == 7
+    assert await FindingDAO(dbsession).count_by_severity(scan.id) == {"high": 7}
+
+    payload = await ScanDAO(dbsession).get_scan_fields(
+        scan.id,
+        ["findings_codec", "findings_checksum", "findings_location"],
+    )
+    assert payload is not None
+    assert payload.findings_location is not None
+    raw = await findings_store.load(
+        payload.findings_codec,
+        payload.findings_checksum,
+        location=payload.findings_location,
+    )
+    assert [finding["template-id"] for finding in raw] == [
+        f"tpl-{index}" for index in range(7)
+    ]
+
+
+@pytest.mark.anyio
+async def test_cancel_pending_scan(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Pending scans are cancelled right away, finished ones can't be.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    fastapi_app.dependency_overrides[get_redis_pool] = lambda: ConnectionPool()
+    scan = await ScanDAO(dbsession).create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    url = fastapi_app.url_path_for("cancel_scan", scan_id=scan.id)
+
+    response = await client.post(url)
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["status"] == ScanStatus.CANCELLED.value
+
+    response = await client.post(url)
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    missing = fastapi_app.url_path_for("cancel_scan", scan_id=scan.id + 1000)
+    response = await client.post(missing)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_scan_batch(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Batch submission creates and enqueues scans in one go.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param monkeypatch: pytest monkeypatch.
+    """
+    kicked: List[Any] = []
+
+    async def kiq_many(task: Any, args_list: Any, labels: Any) -> None:
+        kicked.extend(args_list)
+
+    monkeypatch.setattr(views, "kiq_many", kiq_many)
+    url = fastapi_app.url_path_for("scan_batch")
+
+    response = await client.post(
+        url,
+        json={
+            "scans": [
+                {"target_url": "https://a.example.com/"},
+                {"target_url": "https://b.example.com/"},
+                {"target_url": "https://A.example.com"},
+            ],
+        },
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    scan_ids = body["scan_ids"]
+    assert len(scan_ids) == 3
+    assert scan_ids[0] == scan_ids[2]
+    assert [scan_id for scan_id, _ in kicked] == scan_ids[:2]
+
+    url = fastapi_app.url_path_for("get_batch_progress", batch_id=body["batch_id"])
+    progress = (await client.get(url)).json()
+    assert progress["total"] == 2
+    assert progress["pending"] == 2
+
+
+@pytest.mark.anyio
+async def test_events_of_finished_scan(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Finished scans get their final status as a single event.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    fastapi_app.dependency_overrides[get_redis_pool] = lambda: ConnectionPool()
+    dao = ScanDAO(dbsession)
+    scan = await dao.create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    await dao.update_scan(
+        scan.id,
+        {"status": ScanStatus.COMPLETED, "total_findings": 3},
+    )
+
+    url = fastapi_app.url_path_for("get_scan_events", scan_id=str(scan.id))
+    response = await client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: status\n")
+    assert response.text.count("event:") == 1
+    assert '"total_findings": 3' in response.text
+
+
+@pytest.mark.anyio
+async def test_scan_diff(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Diff returns findings new and resolved since the previous scan.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    :param dbsession: database session.
+    """
+    dao = ScanDAO(dbsession)
+    finding_dao = FindingDAO(dbsession)
+    scan_ids = []
+    for templates in (["a", "b"], ["b", "c"]):
+        scan = await dao.create_scan(
+            target_url="https://example.com/",
+            severity_levels=["high"],
+            cache_key="same-setup",
+        )
+        await finding_dao.bulk_create(
+            scan.id,
+            [nuclei_finding(template, "high") for template in templates],
+        )
+        await finding_dao.track_fingerprints(scan.id, "example.com")
+        await dao.update_scan(scan.id, {"status": ScanStatus.COMPLETED})
+        scan_ids.append(scan.id)
+
+    url = fastapi_app.url_path_for("get_scan_diff", scan_id=scan_ids[1])
+    diff = (await client.get(url)).json()
+
+    assert diff["previous_scan_id"] == scan_ids[0]
+    assert [finding["template_id"] for finding in diff["new"]] == ["c"]
+    assert [finding["template_id"] for finding in diff["resolved"]] == ["a"]
+    # Sightings come from the fingerprints of the host
+    assert diff["new"][0]["first_seen"] == diff["new"][0]["last_seen"]
+    assert diff["new"][0]["first_seen"] is not None
+    assert diff["resolved"][0]["last_seen"] is not None
+
+    url = fastapi_app.url_path_for("get_scan_findings", scan_id=scan_ids[1])
+    items = (await client.get(url)).json()["items"]
+    assert [item["template_id"] for item in items] == ["b", "c"]
+    assert all(item["last_seen"] is not None for item in items)
+
+    fingerprints = await dbsession.execute(
+        select(
+            FingerprintModel.template_id,
+            FingerprintModel.first_scan_id,
+            FingerprintModel.last_scan_id,
+        ).order_by(FingerprintModel.template_id),
+    )
+    assert fingerprints.tuples().all() == [
+        ("a", scan_ids[0], scan_ids[0]),
+        ("b", scan_ids[0], scan_ids[1]),
+        ("c", scan_ids[1], scan_ids[1]),
+    ]
+
+
+@pytest.mark.anyio
+async def test_scan_retention(dbsession: AsyncSession, tmp_path: Path) -> None:
+    """
+    Expired partitions are archived and dropped, upcoming ones created.
+
+    :param dbsession: database session.
+    :param tmp_path: directory for blobs and archives.
+    """
+    old_month = date(2020, 1, 1)
+    partitions = PartitionDAO(dbsession)
+    for table in ("scans", "findings"):
+        await partitions.create_partition(
+            table,
+            partition_name(table, old_month),
+            old_month,
+        )
+    findings_store = FindingsStore(LocalBlobBackend(tmp_path / "findings"), 0)
+    await findings_store.backend.put("scans/0/1.jsonl.gzip", io.BytesIO(b"raw"))
+
+    dao = ScanDAO(dbsession)
+    scan = await dao.create_scan(
+        target_url="https://example.com/",
+        severity_levels=["high"],
+    )
+    started_at = datetime(2020, 1, 15, tzinfo=timezone.utc)
+    await dao.update_scan(
+        scan.id,
+        {"started_at": started_at, "findings_location": "scans/0/1.jsonl.gzip"},
+    )
+    await FindingDAO(dbsession).bulk_create(
+        scan.id,
+        [nuclei_finding("a", "high")],
+        started_at,
+    )
+
+    cache = MemoryScanCache()
+    await cache.set(scan.id, "status", b"{}")
+    await cache.set(scan.id + 1, "status", b"{}")
+
+    archive = LocalBlobBackend(tmp_path / "archive")
+    retention = ScanRetention(
+        async_sessionmaker(dbsession.bind, expire_on_commit=False),
+        archive,
+        findings_store,
+        cache,
+        months=12,
+        ahead=1,
+    )
+    now = datetime(2026, 10, 17, tzinfo=timezone.utc)
+    assert await retention.run(now) == ["findings_p2020_01", "scans_p2020_01"]
+
+    existing = await partitions.get_partitions("scans")
+    assert old_month not in existing
+    assert existing[date(2026, 10, 1)] is existing[date(2026, 11, 1)] is True
+    assert await dao.get_scan_by_id(scan.id) is None
+    assert list(cache.responses) == [(scan.id + 1, "status")]
+
+    codec = FindingsArchive().codec
+    for table, column, value in (
+        ("scans", "id", scan.id),
+        ("findings", "scan_id", scan.id),
+    ):
+        data = await archive.get(f"{table}/{table}_p2020_01.jsonl.{codec}")
+        rows = await asyncio.to_thread(_decompress, codec, data)
+        assert [json.loads(row)[column] for row in rows.splitlines()] == [value]
+    assert await archive.get("scans/scans_p2020_01/scans/0/1.jsonl.gzip") == b"raw"
+    assert not (tmp_path / "findings" / "scans/0/1.jsonl.gzip").exists()